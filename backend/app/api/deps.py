@@ -11,6 +11,7 @@ from app.db.session import get_db
 from app.models.user import User
 from app.core.security import decode_token
 from app.core.exceptions import UnauthorizedException, ForbiddenException
+from app.services.user_cache import user_cache
 
 
 # HTTP Bearer token scheme
@@ -46,11 +47,11 @@ def get_current_user(
     
     # Get user ID from token
     user_id: Optional[int] = payload.get("sub")
-    if user_id is None:
+    if user_id is None or not str(user_id).isdigit():
         raise UnauthorizedException("Invalid token payload")
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    # Get user (cached snapshot, or from database)
+    user = user_cache.get_user(db, int(user_id))
     if user is None:
         raise UnauthorizedException("User not found")
     
@@ -107,10 +108,12 @@ def get_optional_user(
             return None
         
         user_id = payload.get("sub")
-        if user_id is None:
+        if user_id is None or not str(user_id).isdigit():
             return None
         
-        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+        user = user_cache.get_user(db, int(user_id))
+        if user is None or not user.is_active:
+            return None
         return user
     except Exception:
         return None
@@ -19,6 +19,8 @@ from app.schemas.absensi import (
 )
 from app.schemas.common import PaginatedResponse
 from app.services.attendance_service import attendance_service
+from app.services.embedding_backends import get_backend
+from app.services.face_gallery import load_user_embeddings
 from app.services.face_recognition_service import face_service
 from app.utils.image_processing import decode_base64_image
 from app.core.exceptions import BadRequestException, DuplicateException
@@ -47,29 +49,21 @@ async def submit_attendance(
         # Decode image
         image = decode_base64_image(request.image_base64)
         
-        # Get user's face encodings
-        from app.models.face_encoding import FaceEncoding
-        face_encodings_db = db.query(FaceEncoding).filter(
-            FaceEncoding.user_id == current_user.id
-        ).all()
+        # Get user's face encodings for the configured backend
+        backend = get_backend()
+        known_encodings = load_user_embeddings(db, backend, current_user.id)
         
-        if not face_encodings_db:
+        if not known_encodings:
             raise BadRequestException("Face encodings not found. Please re-register your face.")
         
-        # Deserialize encodings
-        known_encodings = [
-            face_service.deserialize_encoding(fe.encoding_data)
-            for fe in face_encodings_db
-        ]
-        
         # Get face encoding from submitted image
-        face_encoding = face_service.encode_face(image)
+        face_encoding = backend.embed(image)
         
         if face_encoding is None:
             raise BadRequestException("No face detected in image. Please try again.")
         
         # Verify face matches user's registered face
-        is_match, confidence = face_service.compare_faces(known_encodings, face_encoding)
+        is_match, confidence = backend.verify(face_encoding, known_encodings)
         
         if not is_match:
             raise HTTPException(
@@ -142,33 +136,35 @@ async def get_attendance_history(
     limit: int = Query(50, ge=1, le=1000),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Set to false to skip counting"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get attendance history for current user.
-    Supports pagination and date filtering.
+    Supports cursor (keyset) pagination, legacy skip/limit and date filtering.
     """
     # Get attendance records
-    records = attendance_service.get_user_attendance_history(
+    records, next_cursor = attendance_service.get_user_attendance_history(
         db=db,
         user_id=current_user.id,
         skip=skip,
         limit=limit,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        cursor=cursor
     )
     
     # Count total records
-    from app.models.absensi import Absensi
-    from sqlalchemy import and_
-    
-    query = db.query(Absensi).filter(Absensi.user_id == current_user.id)
-    if start_date:
-        query = query.filter(Absensi.date >= start_date)
-    if end_date:
-        query = query.filter(Absensi.date <= end_date)
-    total = query.count()
+    total = None
+    if include_total:
+        total = attendance_service.count_user_attendance(
+            db=db,
+            user_id=current_user.id,
+            start_date=start_date,
+            end_date=end_date
+        )
     
     # Convert to response models
     items = [
@@ -188,9 +184,10 @@ async def get_attendance_history(
     return PaginatedResponse(
         items=items,
         total=total,
-        page=skip // limit + 1,
+        page=None if cursor else skip // limit + 1,
         page_size=limit,
-        total_pages=(total + limit - 1) // limit
+        total_pages=(total + limit - 1) // limit if total is not None else None,
+        next_cursor=next_cursor
     )
 
 
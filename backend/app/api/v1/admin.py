@@ -6,27 +6,92 @@ Endpoints for admin dashboard, user management, and reports.
 from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, select
 from datetime import date
 from typing import Optional, List
-import io
-import csv
 
 from app.api.deps import get_current_admin, get_db
 from app.models.user import User
 from app.models.absensi import Absensi
+from app.models.absensi_archive import AbsensiArchive
+from app.models.absensi_sesi import AbsensiSesi
 from app.models.face_encoding import FaceEncoding
 from app.schemas.user import UserResponse, UserCreate, UserUpdate, UserWithStats
 from app.schemas.absensi import AbsensiResponse, AbsensiSubmitRequest
 from app.schemas.common import ResponseBase, PaginatedResponse
-from app.services.attendance_service import attendance_service
+from app.services.archive_service import AttendanceArchiveService
+from app.services.attendance_queue import attendance_queue
+from app.services.audit_service import audit_log
+from app.services.attendance_service import AttendanceService, attendance_service, REPORT_COLUMNS
+from app.services.daily_summary_service import DailySummaryService
+from app.services.embedding_backends import get_backend
+from app.services.face_gallery import face_gallery
+from app.services.recognition_batcher import recognition_batcher
 from app.services.face_recognition_service import face_service
+from app.services.job_service import JobService, job_to_dict
+from app.services.kelas_service import kelas_id_for_code
+from app.services.provisioning_service import count_csv_rows, has_student_csv_header
+from app.services.user_cache import user_cache
 from app.utils.image_processing import decode_base64_image
-from app.core.security import get_password_hash
+from app.utils.pagination import paginate_attendance
+from app.utils.csv_export import stream_rows, iter_csv
+from app.core.security import get_password_hash_async, password_hash_metrics
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+def _page_with_user_stats(query, service: AttendanceService, skip: int, limit: int):
+    """
+    One page of a User query with per-user face encoding counts and
+    attendance statistics joined in as grouped subqueries, so a listing
+    page is a single SELECT. The subqueries only aggregate the page's
+    users, so the cost of a page does not grow with the attendance table.
+    """
+    page = query.with_entities(User.id).order_by(User.id).offset(skip).limit(limit).subquery()
+    page_ids = select(page.c.id)
+    
+    encodings = service.db.query(
+        FaceEncoding.user_id.label("user_id"),
+        func.count(FaceEncoding.id).label("encodings_count")
+    ).filter(
+        FaceEncoding.user_id.in_(page_ids)
+    ).group_by(FaceEncoding.user_id).subquery()
+    
+    stats = service.get_statistics_subquery(user_ids=page_ids)
+    
+    return query.filter(User.id.in_(page_ids)).order_by(User.id).outerjoin(
+        encodings, encodings.c.user_id == User.id
+    ).outerjoin(
+        stats, stats.c.user_id == User.id
+    ).add_columns(
+        encodings.c.encodings_count,
+        stats.c.total_attendance,
+        stats.c.total_present
+    )
+
+
+def _user_with_stats(row, service: AttendanceService) -> UserWithStats:
+    """Build a UserWithStats item from a `_page_with_user_stats` row."""
+    user, encodings_count, total_attendance, total_present = row
+    stats = service.build_statistics(user, total_attendance, total_present)
+    
+    return UserWithStats(
+        id=user.id,
+        nim=user.nim,
+        name=user.name,
+        email=user.email,
+        role=user.role,
+        kelas=user.kelas,
+        is_active=user.is_active,
+        has_face=user.has_face,
+        created_at=user.created_at,
+        total_attendance=stats["total_attendance"],
+        attendance_rate=stats["attendance_rate"],
+        current_streak=stats["current_streak"],
+        encodings_count=encodings_count or 0
+    )
+
+
 @router.get("/dashboard")
 async def get_dashboard(
     current_admin: User = Depends(get_current_admin),
@@ -36,29 +101,20 @@ async def get_dashboard(
     Get dashboard overview statistics.
     Requires admin role.
     """
-    # Total users (students)
-    total_students = db.query(User).filter(User.role == "user").count()
+    # Total students and students with face registered, in one query
+    total_students, students_with_face = db.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.has_face == True, 1), else_=0)), 0)
+    ).filter(User.role == "user").one()
     
-    # Students with face registered
-    students_with_face = db.query(User).filter(
-        User.role == "user",
-        User.has_face == True
-    ).count()
-    
-    # Today's attendance
+    # Today's statistics (read from the daily attendance summary)
     today = date.today()
-    today_attendance = attendance_service.get_all_today_attendance(db)
-    total_present_today = len(today_attendance)
-    
-    # Today's statistics
     today_stats = attendance_service.get_date_statistics(db, today)
+    total_present_today = today_stats["total_present"]
     
     # This month's statistics
-    from datetime import datetime
     first_day = date.today().replace(day=1)
-    month_stats = db.query(Absensi).filter(
-        Absensi.date >= first_day
-    ).count()
+    month_stats = DailySummaryService(db).get_total(first_day)
     
     return {
         "total_students": total_students,
@@ -73,6 +129,28 @@ async def get_dashboard(
     }
 
 
+@router.get("/metrics")
+async def get_metrics(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Get runtime metrics of this API process.
+    Requires admin role.
+    - password_hashing: bcrypt pool size, queue wait and hash time
+    - user_cache: authenticated user cache size and hit rate
+    - audit_log: audit writer queue depth and fallback file usage
+    - recognition_batcher: recognition requests per batch
+    - attendance_queue: pending and dead-lettered attendance marks
+    """
+    return {
+        "password_hashing": password_hash_metrics.snapshot(),
+        "user_cache": user_cache.stats(),
+        "audit_log": audit_log.stats(),
+        "recognition_batcher": recognition_batcher.stats(),
+        "attendance_queue": attendance_queue.stats()
+    }
+
+
 @router.get("/attendance", response_model=PaginatedResponse[AbsensiResponse])
 async def get_all_attendance(
     skip: int = Query(0, ge=0),
@@ -81,67 +159,75 @@ async def get_all_attendance(
     end_date: Optional[date] = None,
     kelas: Optional[str] = None,
     user_id: Optional[int] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Set to false to skip counting"),
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """
     Get all attendance records with optional filters.
     Returns individual attendance records with student info.
+    Supports cursor (keyset) pagination alongside skip/limit.
     Requires admin role.
     """
-    # Build query with join to User table
-    query = db.query(Absensi).join(User, Absensi.user_id == User.id)
+    # Build query with join to User table (student columns come from the join);
+    # archived academic years are included when the range reaches them
+    source = AttendanceArchiveService(db).source(start_date)
+    query = db.query(source, User).join(User, source.user_id == User.id)
     
     # Apply filters
     if start_date:
-        query = query.filter(Absensi.date >= start_date)
+        query = query.filter(source.date >= start_date)
     if end_date:
-        query = query.filter(Absensi.date <= end_date)
+        query = query.filter(source.date <= end_date)
     if kelas:
-        query = query.filter(User.kelas == kelas)
+        query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
     if user_id:
-        query = query.filter(Absensi.user_id == user_id)
-    
-    # Order by date and time descending (most recent first)
-    query = query.order_by(Absensi.date.desc(), Absensi.timestamp.desc())
+        query = query.filter(source.user_id == user_id)
     
-    # Get total count
-    total = query.count()
+    # Get total count (from the daily summary counters unless filtered by user)
+    total = None
+    if include_total:
+        if user_id:
+            total = query.count()
+        else:
+            total = DailySummaryService(db).get_range_counts(start_date, end_date, kelas)["total"]
     
-    # Get paginated results
-    attendance_list = query.offset(skip).limit(limit).all()
+    # Get paginated results, most recent first
+    attendance_list, next_cursor = paginate_attendance(
+        query, limit, cursor=cursor, skip=skip, key=lambda row: row[0], entity=source
+    )
     
     # Build response with user information
     items = []
-    for att in attendance_list:
-        user = db.query(User).filter(User.id == att.user_id).first()
-        if user:
-            items.append(AbsensiResponse(
-                id=att.id,
-                user_id=att.user_id,
-                nim=user.nim,
-                name=user.name,
-                date=att.date,
-                time_in=att.timestamp.strftime('%H:%M:%S') if att.timestamp else None,
-                timestamp=att.timestamp,
-                status=att.status or "hadir",
-                confidence=att.confidence,
-                image_path=att.image_path,
-                user={
-                    "nim": user.nim,
-                    "name": user.name,
-                    "kelas": user.kelas
-                },
-                already_submitted=False,
-                message=f"Absensi pada {att.timestamp.strftime('%H:%M:%S')}" if att.timestamp else ""
-            ))
+    for att, user in attendance_list:
+        items.append(AbsensiResponse(
+            id=att.id,
+            user_id=att.user_id,
+            nim=user.nim,
+            name=user.name,
+            date=att.date,
+            time_in=att.timestamp.strftime('%H:%M:%S') if att.timestamp else None,
+            timestamp=att.timestamp,
+            status=att.status or "hadir",
+            confidence=att.confidence,
+            image_path=att.image_path,
+            user={
+                "nim": user.nim,
+                "name": user.name,
+                "kelas": user.kelas
+            },
+            already_submitted=False,
+            message=f"Absensi pada {att.timestamp.strftime('%H:%M:%S')}" if att.timestamp else ""
+        ))
     
     return PaginatedResponse(
         items=items,
         total=total,
-        page=skip // limit + 1 if limit > 0 else 1,
+        page=None if cursor else skip // limit + 1,
         page_size=limit,
-        total_pages=(total + limit - 1) // limit if limit > 0 else 1
+        total_pages=(total + limit - 1) // limit if total is not None else None,
+        next_cursor=next_cursor
     )
 
 
@@ -170,7 +256,7 @@ async def get_all_students(
         )
     
     if kelas:
-        query = query.filter(User.kelas == kelas)
+        query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
     
     if has_face is not None:
         query = query.filter(User.has_face == has_face)
@@ -178,35 +264,12 @@ async def get_all_students(
     # Get total count
     total = query.count()
     
-    # Get paginated results
-    users = query.offset(skip).limit(limit).all()
+    # Get paginated results with encoding counts and attendance stats joined in
+    service = AttendanceService(db)
+    rows = _page_with_user_stats(query, service, skip, limit).all()
     
     # Build response with statistics
-    items = []
-    for user in users:
-        # Get user statistics
-        stats = attendance_service.get_user_statistics(db, user.id)
-        
-        # Get face encodings count
-        encodings_count = db.query(FaceEncoding).filter(
-            FaceEncoding.user_id == user.id
-        ).count()
-        
-        items.append(UserWithStats(
-            id=user.id,
-            nim=user.nim,
-            name=user.name,
-            email=user.email,
-            role=user.role,
-            kelas=user.kelas,
-            is_active=user.is_active,
-            has_face=user.has_face,
-            created_at=user.created_at,
-            total_attendance=stats["total_attendance"],
-            attendance_rate=stats["attendance_rate"],
-            current_streak=stats["current_streak"],
-            encodings_count=encodings_count
-        ))
+    items = [_user_with_stats(row, service) for row in rows]
     
     return PaginatedResponse(
         items=items,
@@ -234,35 +297,12 @@ async def get_all_teachers(
     # Get total count
     total = query.count()
     
-    # Get paginated results
-    users = query.offset(skip).limit(limit).all()
+    # Get paginated results with encoding counts and attendance stats joined in
+    service = AttendanceService(db)
+    rows = _page_with_user_stats(query, service, skip, limit).all()
     
     # Build response with statistics
-    items = []
-    for user in users:
-        # Get user statistics
-        stats = attendance_service.get_user_statistics(db, user.id)
-        
-        # Get face encodings count
-        encodings_count = db.query(FaceEncoding).filter(
-            FaceEncoding.user_id == user.id
-        ).count()
-        
-        items.append(UserWithStats(
-            id=user.id,
-            nim=user.nim,
-            name=user.name,
-            email=user.email,
-            role=user.role,
-            kelas=user.kelas,
-            is_active=user.is_active,
-            has_face=user.has_face,
-            created_at=user.created_at,
-            total_attendance=stats["total_attendance"],
-            attendance_rate=stats["attendance_rate"],
-            current_streak=stats["current_streak"],
-            encodings_count=encodings_count
-        ))
+    items = [_user_with_stats(row, service) for row in rows]
     
     return PaginatedResponse(
         items=items,
@@ -318,32 +358,39 @@ async def get_student_attendance(
     limit: int = Query(30, ge=1, le=100),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Set to false to skip counting"),
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """
     Get attendance history for a specific student.
+    Supports cursor (keyset) pagination alongside skip/limit.
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    # Build query
-    query = db.query(Absensi).filter(Absensi.user_id == user_id)
-    
-    if start_date:
-        query = query.filter(Absensi.date >= start_date)
-    if end_date:
-        query = query.filter(Absensi.date <= end_date)
-    
-    # Order by date descending (most recent first)
-    query = query.order_by(Absensi.date.desc(), Absensi.timestamp.desc())
+    # Get paginated results, most recent first
+    attendance_list, next_cursor = attendance_service.get_user_attendance_history(
+        db=db,
+        user_id=user_id,
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date,
+        cursor=cursor
+    )
     
     # Get total count
-    total = query.count()
-    
-    # Get paginated results
-    attendance_list = query.offset(skip).limit(limit).all()
+    total = None
+    if include_total:
+        total = attendance_service.count_user_attendance(
+            db=db,
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date
+        )
     
     # Build response
     items = [
@@ -365,9 +412,10 @@ async def get_student_attendance(
     return PaginatedResponse(
         items=items,
         total=total,
-        page=skip // limit + 1,
+        page=None if cursor else skip // limit + 1,
         page_size=limit,
-        total_pages=(total + limit - 1) // limit
+        total_pages=(total + limit - 1) // limit if total is not None else None,
+        next_cursor=next_cursor
     )
 
 
@@ -403,7 +451,7 @@ async def create_student(
         nim=user_data.nim,
         name=user_data.name,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         role="user",
         kelas=user_data.kelas,
         is_active=True,
@@ -447,12 +495,18 @@ async def update_student(
                 detail="Email already used by another user"
             )
         user.email = user_data.email
+    old_kelas_id = user.kelas_id
     if user_data.kelas:
         user.kelas = user_data.kelas
     if user_data.is_active is not None:
         user.is_active = user_data.is_active
     if user_data.password:
-        user.password_hash = get_password_hash(user_data.password)
+        user.password_hash = await get_password_hash_async(user_data.password)
+    
+    # kelas_id is resolved from the new code on flush; the student's
+    # attendance counters follow them to the new class
+    db.flush()
+    DailySummaryService(db).move_students([user.id], old_kelas_id, user.kelas_id)
     
     db.commit()
     db.refresh(user)
@@ -480,11 +534,21 @@ async def delete_student(
             detail="Cannot delete admin user"
         )
     
+    # Drop marks still waiting in the write queue (they would be flushed
+    # as orphan rows and counted again)
+    attendance_queue.discard_user(user_id)
+    
+    # Uncount the student's records from the daily summary
+    DailySummaryService(db).remove_students([user_id], user.kelas_id)
+    
     # Delete face encodings
     db.query(FaceEncoding).filter(FaceEncoding.user_id == user_id).delete()
     
-    # Delete attendance records
+    # Delete attendance records, live and archived (SQLite does not
+    # enforce the ON DELETE CASCADE foreign keys)
     db.query(Absensi).filter(Absensi.user_id == user_id).delete()
+    db.query(AbsensiArchive).filter(AbsensiArchive.user_id == user_id).delete()
+    db.query(AbsensiSesi).filter(AbsensiSesi.user_id == user_id).delete()
     
     # Delete user
     db.delete(user)
@@ -532,7 +596,7 @@ async def create_teacher(
         nim=user_data.nim,
         name=user_data.name,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         role="teacher",
         kelas=user_data.kelas,
         is_active=True,
@@ -560,47 +624,39 @@ async def get_attendance_report(
     Supports JSON and CSV formats.
     """
     try:
-        # Get report data
-        report_data = attendance_service.get_attendance_report(
-            db=db,
-            start_date=start_date,
-            end_date=end_date,
-            kelas=kelas
-        )
-        
         if format == "csv":
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.DictWriter(
-                output,
-                fieldnames=["date", "nim", "name", "kelas", "timestamp", "status", "confidence"]
+            # Stream rows from a server-side cursor straight into CSV chunks
+            rows = stream_rows(
+                lambda export_db: AttendanceService.report_query(export_db, start_date, end_date, kelas)
             )
-            writer.writeheader()
-            writer.writerows(report_data)
             
-            # Return CSV response
-            output.seek(0)
             return StreamingResponse(
-                iter([output.getvalue()]),
+                iter_csv(REPORT_COLUMNS, AttendanceService.format_report_rows(rows)),
                 media_type="text/csv",
                 headers={
                     "Content-Disposition": f"attachment; filename=attendance_report_{start_date}_{end_date}.csv"
                 }
             )
         
-        # Calculate overview statistics
+        # Calculate overview statistics from the per-day summary blocks
+        summary_service = DailySummaryService(db)
+        range_counts = summary_service.get_range_counts(start_date, end_date, kelas)
+        
         total_students = db.query(User).filter(User.role == "user").count()
-        total_absensi = len(report_data)
+        total_absensi = range_counts["total"]
         
         # Count by status
-        by_status = {}
-        for record in report_data:
-            status_val = record.get("status", "unknown")
-            by_status[status_val] = by_status.get(status_val, 0) + 1
+        by_status = {
+            status_val: range_counts[status_val]
+            for status_val in ("hadir", "terlambat", "izin", "sakit", "alpa")
+            if range_counts[status_val]
+        }
         
         # Today's count
         today = date.today()
-        today_count = sum(1 for r in report_data if r.get("date") == today.isoformat())
+        today_count = 0
+        if start_date <= today <= end_date:
+            today_count = summary_service.get_date_counts(today, kelas)["total"]
         
         # Calculate attendance rate for today
         attendance_rate_today = round((today_count / total_students * 100) if total_students > 0 else 0, 1)
@@ -612,23 +668,16 @@ async def get_attendance_report(
             print(f"Error counting registered faces: {e}")
             registered_faces = 0
         
-        # Unique users who attended
-        unique_users = len(set(r.get("nim") for r in report_data if r.get("nim")))
+        # Student breakdown (one grouped query, one row per student)
+        student_attendance = attendance_service.get_student_breakdown(
+            db=db,
+            start_date=start_date,
+            end_date=end_date,
+            kelas=kelas
+        )
         
-        # Student breakdown
-        student_attendance = {}
-        for record in report_data:
-            nim = record.get("nim")
-            if not nim:
-                continue
-                
-            if nim not in student_attendance:
-                student_attendance[nim] = {
-                    "name": record.get("name", "Unknown"),
-                    "nim": nim,
-                    "total_attendance": 0
-                }
-            student_attendance[nim]["total_attendance"] += 1
+        # Unique users who attended
+        unique_users = len(student_attendance)
         
         # Calculate attendance rate per student
         total_days = (end_date - start_date).days + 1
@@ -637,12 +686,9 @@ async def get_attendance_report(
                 **data,
                 "attendance_rate": round((data["total_attendance"] / total_days * 100) if total_days > 0 else 0, 1)
             }
-            for data in student_attendance.values()
+            for data in student_attendance
         ]
         
-        # Sort by total attendance
-        student_breakdown.sort(key=lambda x: x["total_attendance"], reverse=True)
-        
         # Return JSON with enhanced structure
         return {
             "period": {
@@ -657,9 +703,9 @@ async def get_attendance_report(
                 "registered_faces": registered_faces,
                 "unique_users": unique_users,
                 "by_status": by_status,
-                "daily_summary": [],
-                "weekly_summary": [],
-                "by_kelas": []
+                "daily_summary": summary_service.get_daily_counts(start_date, end_date, kelas),
+                "weekly_summary": summary_service.get_weekly_counts(start_date, end_date, kelas),
+                "by_kelas": summary_service.get_kelas_counts(start_date, end_date, kelas)
             },
             "student_breakdown": student_breakdown
         }
@@ -702,43 +748,18 @@ async def bulk_create_students(
     """
     Bulk create students.
     Requires admin role.
+    Runs as a background job; poll /jobs/{job_id} for progress and result.
     """
-    created_count = 0
-    skipped_count = 0
-    errors = []
-    
-    for student_data in students:
-        # Check if NIM exists
-        existing = db.query(User).filter(User.nim == student_data.nim).first()
-        if existing:
-            skipped_count += 1
-            errors.append(f"NIM {student_data.nim} already exists")
-            continue
-        
-        try:
-            user = User(
-                nim=student_data.nim,
-                name=student_data.name,
-                email=student_data.email,
-                password_hash=get_password_hash(student_data.password),
-                role="user",
-                kelas=student_data.kelas,
-                is_active=True,
-                has_face=False
-            )
-            
-            db.add(user)
-            created_count += 1
-        except Exception as e:
-            skipped_count += 1
-            errors.append(f"Error creating {student_data.nim}: {str(e)}")
-    
-    db.commit()
+    job = JobService(db).enqueue(
+        "student_bulk_create",
+        {"students": [student.model_dump() for student in students]},
+        created_by=current_admin.id
+    )
     
     return ResponseBase(
         success=True,
-        message=f"Created {created_count} students, skipped {skipped_count}",
-        data={"created": created_count, "skipped": skipped_count, "errors": errors}
+        message=f"Bulk create of {len(students)} students queued",
+        data=job_to_dict(job)
     )
 
 
@@ -753,6 +774,8 @@ async def import_students_from_csv(
     CSV format: nim,nama (headers required)
     Password will be set to same as NIM.
     If NIM already exists, it will be skipped.
+    The header is checked here; rows are parsed and the students created by
+    a background job. Poll /jobs/{job_id} for progress and result.
     """
     # Validate file type
     if not file.filename.endswith('.csv'):
@@ -761,80 +784,29 @@ async def import_students_from_csv(
             detail="File must be a CSV"
         )
     
+    # Read CSV content; rows are parsed and created by the job
+    content = await file.read()
     try:
-        # Read CSV content
-        content = await file.read()
-        decoded = content.decode('utf-8')
-        
-        # Parse CSV
-        reader = csv.DictReader(io.StringIO(decoded))
-        
-        created_count = 0
-        skipped_count = 0
-        skipped_nims = []
-        
-        for row in reader:
-            # Get NIM and name from row (support different column names)
-            nim = row.get('nim') or row.get('NIM') or row.get('Nim') or ''
-            nama = row.get('nama') or row.get('name') or row.get('Nama') or row.get('NAME') or ''
-            kelas = row.get('kelas') or row.get('Kelas') or row.get('class') or None
-            
-            nim = str(nim).strip()
-            nama = str(nama).strip()
-            
-            if not nim or not nama:
-                continue
-            
-            # Check if NIM already exists
-            existing = db.query(User).filter(User.nim == nim).first()
-            if existing:
-                skipped_count += 1
-                skipped_nims.append(nim)
-                continue
-            
-            # Create user with password = NIM
-            try:
-                # Generate email from NIM (optional)
-                email = f"{nim}@mhs.harkatnegeri.ac.id"
-                
-                user = User(
-                    nim=nim,
-                    name=nama,
-                    email=email,
-                    password_hash=get_password_hash(nim),  # Password = NIM
-                    role="user",
-                    kelas=kelas,
-                    is_active=True,
-                    has_face=False
-                )
-                
-                db.add(user)
-                created_count += 1
-            except Exception as e:
-                print(f"⚠️ Error creating user {nim}: {e}")
-                skipped_count += 1
-                skipped_nims.append(nim)
-        
-        db.commit()
-        
-        print(f"✅ CSV Import: Created {created_count}, Skipped {skipped_count}")
-        
-        return ResponseBase(
-            success=True,
-            message=f"Berhasil import {created_count} mahasiswa, {skipped_count} dilewati (NIM sudah ada)",
-            data={
-                "created": created_count, 
-                "skipped": skipped_count,
-                "skipped_nims": skipped_nims[:10]  # Show first 10 only
-            }
-        )
-        
-    except Exception as e:
-        print(f"❌ CSV Import error: {e}")
+        decoded = content.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error parsing CSV: {str(e)}"
         )
+    
+    if not has_student_csv_header(decoded):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must have a header with nim and nama columns"
+        )
+    
+    job = JobService(db).enqueue("student_import", {"csv": decoded}, created_by=current_admin.id)
+    
+    return ResponseBase(
+        success=True,
+        message=f"Import {count_csv_rows(decoded)} mahasiswa sedang diproses",
+        data=job_to_dict(job)
+    )
 
 @router.post("/submit-attendance", response_model=AbsensiResponse)
 async def admin_submit_attendance(
@@ -850,54 +822,34 @@ async def admin_submit_attendance(
         # Decode image
         image = decode_base64_image(request.image_base64)
         
-        # Get face encoding from submitted image
-        face_encoding = face_service.encode_face(image)
+        # Find matching user among all registered faces (cached gallery)
+        backend = get_backend()
+        gallery = face_gallery.get(db, backend)
         
-        if face_encoding is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No face detected in image. Please try again."
-            )
-        
-        # Find matching user by comparing with all registered faces
-        from app.models.face_encoding import FaceEncoding
-        
-        face_encodings_db = db.query(FaceEncoding).all()
-        
-        if not face_encodings_db:
+        if len(gallery) == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No registered faces in database"
             )
         
-        # Group encodings by user
-        user_encodings = {}
-        for fe in face_encodings_db:
-            if fe.user_id not in user_encodings:
-                user_encodings[fe.user_id] = []
-            try:
-                enc = face_service.deserialize_encoding(fe.encoding_data)
-                user_encodings[fe.user_id].append(enc)
-            except Exception as e:
-                print(f"Failed to deserialize encoding for user {fe.user_id}: {e}")
-                continue
+        # Embed and match (batched with concurrent scans)
+        face_detected, match = await recognition_batcher.recognize(backend, image, gallery)
         
-        # Find best match
-        best_match_id = None
-        best_confidence = 0.0
-        
-        for user_id, encodings in user_encodings.items():
-            is_match, confidence = face_service.compare_faces(encodings, face_encoding)
-            if is_match and confidence > best_confidence:
-                best_confidence = confidence
-                best_match_id = user_id
+        if not face_detected:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No face detected in image. Please try again."
+            )
         
-        if best_match_id is None:
+        if match is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Face not recognized. Student not registered."
             )
         
+        best_match_id = match["user_id"]
+        best_confidence = match["confidence"]
+        
         # Get user info
         user = db.query(User).filter(User.id == best_match_id).first()
         
@@ -3,13 +3,12 @@ Authentication routes.
 Handles user registration, login, logout, token refresh, and password management.
 """
 
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.user import User
-from app.models.refresh_token import RefreshToken
 from app.schemas.auth import (
     LoginRequest,
     RegisterRequest,
@@ -19,14 +18,16 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserResponse
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
     create_access_token,
-    create_refresh_token,
     decode_token
 )
 from app.core.exceptions import UnauthorizedException, BadRequestException, ConflictException
 from app.api.deps import get_current_user
+from app.services.audit_service import audit_log
+from app.services.token_service import RefreshTokenService
 
 router = APIRouter()
 
@@ -60,7 +61,7 @@ async def register(
         nim=request.nim,
         name=request.name,
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         role="user",
         is_active=True
     )
@@ -69,17 +70,9 @@ async def register(
     db.commit()
     db.refresh(new_user)
     
-    # Create tokens
+    # Create tokens (only the refresh token's hash is stored)
     access_token = create_access_token(data={"sub": new_user.id, "role": new_user.role})
-    refresh_token_str = create_refresh_token(data={"sub": new_user.id})
-    
-    # Save refresh token to database
-    refresh_token = RefreshToken(
-        user_id=new_user.id,
-        token=refresh_token_str,
-        expires_at=datetime.utcnow() + timedelta(days=7)
-    )
-    db.add(refresh_token)
+    refresh_token_str = RefreshTokenService(db).issue(new_user.id)
     db.commit()
     
     return TokenResponse(
@@ -92,6 +85,7 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: LoginRequest,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -102,29 +96,33 @@ async def login(
     # Find user by NIM
     user = db.query(User).filter(User.nim == request.nim).first()
     
-    if not user or not verify_password(request.password, user.password_hash):
+    if not user or not await verify_password_async(request.password, user.password_hash):
+        audit_log.log(
+            "login_failed",
+            user_id=user.id if user else None,
+            details={"nim": request.nim},
+            request=http_request
+        )
         raise UnauthorizedException("Incorrect NIM or password")
     
     if not user.is_active:
         raise UnauthorizedException("Account is inactive")
     
+    # Upgrade the hash if the configured bcrypt work factor changed
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(request.password)
+    
     # Update last login
     user.last_login = datetime.utcnow()
     db.commit()
     
-    # Create tokens
+    # Create tokens (only the refresh token's hash is stored)
     access_token = create_access_token(data={"sub": user.id, "role": user.role})
-    refresh_token_str = create_refresh_token(data={"sub": user.id})
-    
-    # Save refresh token to database
-    refresh_token = RefreshToken(
-        user_id=user.id,
-        token=refresh_token_str,
-        expires_at=datetime.utcnow() + timedelta(days=7)
-    )
-    db.add(refresh_token)
+    refresh_token_str = RefreshTokenService(db).issue(user.id)
     db.commit()
     
+    audit_log.log("login", user_id=user.id, entity_type="user", entity_id=user.id, request=http_request)
+    
     return TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token_str,
@@ -150,13 +148,9 @@ async def refresh_token(
     if not user_id:
         raise UnauthorizedException("Invalid token payload")
     
-    # Check if refresh token exists and is valid
-    refresh_token_db = db.query(RefreshToken).filter(
-        RefreshToken.token == request.refresh_token,
-        RefreshToken.user_id == user_id,
-        RefreshToken.revoked == False,
-        RefreshToken.expires_at > datetime.utcnow()
-    ).first()
+    # Check if refresh token exists and is valid (lookup by hash)
+    tokens = RefreshTokenService(db)
+    refresh_token_db = tokens.get_active(request.refresh_token, user_id)
     
     if not refresh_token_db:
         raise UnauthorizedException("Refresh token is invalid or expired")
@@ -169,19 +163,9 @@ async def refresh_token(
     # Create new access token
     access_token = create_access_token(data={"sub": user.id, "role": user.role})
     
-    # Optionally create new refresh token (refresh token rotation)
-    new_refresh_token = create_refresh_token(data={"sub": user.id})
-    
-    # Revoke old refresh token
+    # Refresh token rotation: revoke the old one, issue a new one
     refresh_token_db.revoked = True
-    
-    # Save new refresh token
-    new_refresh_token_db = RefreshToken(
-        user_id=user.id,
-        token=new_refresh_token,
-        expires_at=datetime.utcnow() + timedelta(days=7)
-    )
-    db.add(new_refresh_token_db)
+    new_refresh_token = tokens.issue(user.id)
     db.commit()
     
     return TokenResponse(
@@ -193,20 +177,19 @@ async def refresh_token(
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Logout user by revoking all refresh tokens.
     """
-    # Revoke all user's refresh tokens
-    db.query(RefreshToken).filter(
-        RefreshToken.user_id == current_user.id,
-        RefreshToken.revoked == False
-    ).update({"revoked": True})
-    
+    # Revoke all user's refresh tokens (single indexed update)
+    RefreshTokenService(db).revoke_all(current_user.id)
     db.commit()
     
+    audit_log.log("logout", user_id=current_user.id, entity_type="user", entity_id=current_user.id, request=http_request)
+    
     return {"message": "Successfully logged out"}
 
 
@@ -223,6 +206,7 @@ async def get_current_user_info(
 @router.put("/change-password", status_code=status.HTTP_200_OK)
 async def change_password(
     request: ChangePasswordRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -230,18 +214,17 @@ async def change_password(
     Change user password.
     """
     # Verify current password
-    if not verify_password(request.current_password, current_user.password_hash):
+    if not await verify_password_async(request.current_password, current_user.password_hash):
         raise BadRequestException("Current password is incorrect")
     
     # Update password
-    current_user.password_hash = get_password_hash(request.new_password)
+    current_user.password_hash = await get_password_hash_async(request.new_password)
     db.commit()
     
     # Revoke all refresh tokens for security
-    db.query(RefreshToken).filter(
-        RefreshToken.user_id == current_user.id,
-        RefreshToken.revoked == False
-    ).update({"revoked": True})
+    RefreshTokenService(db).revoke_all(current_user.id)
     db.commit()
     
+    audit_log.log("change_password", user_id=current_user.id, entity_type="user", entity_id=current_user.id, request=http_request)
+    
     return {"message": "Password changed successfully. Please login again."}
@@ -15,9 +15,11 @@ from app.api.deps import get_db
 from app.models.user import User
 from app.models.absensi import Absensi
 from app.models.kelas import Kelas
-from app.models.face_encoding import FaceEncoding
-from app.services.face_recognition_service import FaceRecognitionService as FaceService
 from app.services.attendance_service import AttendanceService
+from app.services.embedding_backends import get_backend
+from app.services.face_gallery import face_gallery
+from app.services.recognition_batcher import recognition_batcher
+from app.core.exceptions import BadRequestException
 from app.utils.image_processing import decode_base64_image
 
 
@@ -51,7 +53,7 @@ async def mark_public_attendance(
     
     **Process:**
     1. Decode base64 image
-    2. Recognize face using FaceRecognitionService
+    2. Recognize face with the configured embedding backend
     3. Verify student exists and registered
     4. Check if already marked today
     5. Create attendance record
@@ -71,39 +73,22 @@ async def mark_public_attendance(
         pil_image = decode_base64_image(image)
         print(f"[PublicAttendance] PIL Image size: {pil_image.size}")
         
-        # Initialize face service
-        face_service = FaceService()
+        # Registered faces of the configured backend (cached gallery)
+        backend = get_backend()
+        gallery = face_gallery.get(db, backend)
+        print(f"[PublicAttendance] Gallery: {len(gallery)} face encodings ({backend.name})")
         
-        # Load face encodings from database
-        print(f"[PublicAttendance] Loading face encodings from database...")
-        face_encodings_db = db.query(FaceEncoding).all()
-        print(f"[PublicAttendance] Found {len(face_encodings_db)} face encodings")
-        
-        if not face_encodings_db:
+        if len(gallery) == 0:
             raise HTTPException(
                 status_code=404,
                 detail="No registered faces in database"
             )
         
-        # Deserialize encodings
-        import pickle
-        known_encodings = []
-        user_ids = []
-        
-        for fe in face_encodings_db:
-            try:
-                encoding = pickle.loads(fe.encoding_data)
-                known_encodings.append(encoding)
-                user_ids.append(fe.user_id)
-            except Exception as e:
-                print(f"[PublicAttendance] Error deserializing encoding for user {fe.user_id}: {e}")
-                continue
-        
-        print(f"[PublicAttendance] Loaded {len(known_encodings)} valid encodings")
-        
         # Recognize face
         print(f"[PublicAttendance] Starting face recognition...")
-        result = face_service.recognize_face(pil_image, known_encodings, user_ids)
+        face_detected, result = await recognition_batcher.recognize(backend, pil_image, gallery)
+        if not face_detected:
+            raise BadRequestException("No face detected in image")
         print(f"[PublicAttendance] Face recognition result: {result}")
         
         if result is None:
@@ -127,16 +112,18 @@ async def mark_public_attendance(
                 detail="Face registration incomplete. Please register your face first."
             )
         
-        # Get today's date
-        today = date.today()
-        
-        # Check if already marked today
-        existing = db.query(Absensi).filter(
-            Absensi.user_id == user_id,
-            Absensi.date == today
-        ).first()
+        # Record attendance (goes through the write queue when enabled,
+        # so duplicates are answered without waiting on the database)
+        attendance, is_duplicate = AttendanceService(db).submit_attendance(
+            user_id=user_id,
+            confidence=confidence,
+            image_path=None,
+            status="hadir",
+            device_info=f"Kiosk attendance - {location}" if location else "Kiosk attendance"
+        )
         
-        if existing:
+        if is_duplicate:
+            existing = attendance
             waktu_absen = existing.timestamp.strftime("%H:%M:%S") if existing.timestamp else ""
             return {
                 "success": True,  # Changed to True for better UX
@@ -159,21 +146,7 @@ async def mark_public_attendance(
                 "confidence": confidence
             }
         
-        # Create attendance record
-        now = datetime.now()
-        
-        new_attendance = Absensi(
-            user_id=user_id,
-            date=today,
-            timestamp=now,
-            status="hadir",
-            confidence=confidence,
-            device_info=f"Kiosk attendance - {location}" if location else "Kiosk attendance"
-        )
-        
-        db.add(new_attendance)
-        db.commit()
-        db.refresh(new_attendance)
+        new_attendance = attendance
         
         waktu_absen = new_attendance.timestamp.strftime("%H:%M:%S") if new_attendance.timestamp else ""
         return {
@@ -315,33 +288,20 @@ async def check_face_registration(
         # Decode to PIL
         pil_image = decode_base64_image(image)
         
-        # Initialize face service
-        face_service = FaceService()
-        
-        # Load face encodings from database
-        face_encodings_db = db.query(FaceEncoding).all()
+        # Registered faces of the configured backend (cached gallery)
+        backend = get_backend()
+        gallery = face_gallery.get(db, backend)
         
-        if not face_encodings_db:
+        if len(gallery) == 0:
             return {
                 "registered": False,
                 "message": "No registered faces in database"
             }
         
-        # Deserialize encodings
-        import pickle
-        known_encodings = []
-        user_ids = []
-        
-        for fe in face_encodings_db:
-            try:
-                encoding = pickle.loads(fe.encoding_data)
-                known_encodings.append(encoding)
-                user_ids.append(fe.user_id)
-            except:
-                continue
-        
         # Recognize face
-        result = face_service.recognize_face(pil_image, known_encodings, user_ids)
+        face_detected, result = await recognition_batcher.recognize(backend, pil_image, gallery)
+        if not face_detected:
+            raise BadRequestException("No face detected in image")
         
         if result is None:
             return {
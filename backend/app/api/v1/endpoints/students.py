@@ -8,22 +8,29 @@ Handles all student-related operations:
 - Profile management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime
+from PIL import Image
+import io
 
 from app.api import deps
 from app.models.user import User
-from app.models.absensi import Absensi
 from app.models.face_encoding import FaceEncoding
 from app.schemas.user import UserProfile, UpdateUserProfile
 from app.schemas.absensi import AttendanceRecord, AttendanceHistoryResponse
 from app.schemas.face import FaceRegistrationStatus, FacePhoto
 from app.schemas.common import ChangePasswordRequest
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
 from app.services.face_recognition_service import FaceRecognitionService as FaceService
+from app.services.archive_service import AttendanceArchiveService
 from app.services.attendance_service import AttendanceService
+from app.services.audit_service import audit_log
+from app.services.embedding_backends import get_backend
+from app.services.face_gallery import load_user_embeddings
+from app.utils.pagination import paginate_attendance
+from app.utils.csv_export import stream_rows, iter_csv
 
 router = APIRouter()
 
@@ -40,26 +47,13 @@ def get_student_dashboard_summary(
     """
     attendance_service = AttendanceService(db)
     
-    # Get all attendance records for this student
-    total_hadir = db.query(Absensi).filter(
-        Absensi.user_id == current_user.id,
-        Absensi.status == "hadir"
-    ).count()
+    # Count all attendance records for this student in one grouped query
+    counts = attendance_service.get_status_counts(current_user.id)
     
-    total_sakit = db.query(Absensi).filter(
-        Absensi.user_id == current_user.id,
-        Absensi.status == "sakit"
-    ).count()
-    
-    total_izin = db.query(Absensi).filter(
-        Absensi.user_id == current_user.id,
-        Absensi.status == "izin"
-    ).count()
-    
-    total_alpa = db.query(Absensi).filter(
-        Absensi.user_id == current_user.id,
-        Absensi.status == "alpa"
-    ).count()
+    total_hadir = counts.get("hadir", 0)
+    total_sakit = counts.get("sakit", 0)
+    total_izin = counts.get("izin", 0)
+    total_alpa = counts.get("alpa", 0)
     
     total_pertemuan = total_hadir + total_sakit + total_izin + total_alpa
     
@@ -104,43 +98,53 @@ def get_attendance_history(
     search: Optional[str] = Query(None, description="Search by subject/teacher"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=1000, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Set to false to skip counting"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_student)
 ):
     """
     Get attendance history with filters and pagination
+    Pass `cursor` (the previous response's next_cursor) for keyset paging;
+    `page` is kept for existing clients.
     """
-    query = db.query(Absensi).filter(Absensi.user_id == current_user.id)
-    
-    # Apply filters
+    start_date = None
     if date_start:
         try:
             start_date = datetime.strptime(date_start, "%Y-%m-%d").date()
-            query = query.filter(Absensi.date >= start_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date_start format. Use YYYY-MM-DD")
     
+    # Live table, plus the archive when the range reaches closed academic years
+    source = AttendanceArchiveService(db).source(start_date)
+    query = db.query(source).filter(source.user_id == current_user.id)
+    
+    # Apply filters
+    if start_date:
+        query = query.filter(source.date >= start_date)
+    
     if date_end:
         try:
             end_date = datetime.strptime(date_end, "%Y-%m-%d").date()
-            query = query.filter(Absensi.date <= end_date)
+            query = query.filter(source.date <= end_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date_end format. Use YYYY-MM-DD")
     
     if status and status in ["hadir", "sakit", "izin", "alpa"]:
-        query = query.filter(Absensi.status == status)
+        query = query.filter(source.status == status)
     
     # TODO: Add search by subject/teacher (requires kelas relationship)
     
     # Count total before pagination
-    total = query.count()
+    total = query.count() if include_total else None
     
     # Apply pagination
-    skip = (page - 1) * page_size
-    records = query.order_by(Absensi.date.desc(), Absensi.timestamp.desc()).offset(skip).limit(page_size).all()
+    records, next_cursor = paginate_attendance(
+        query, page_size, cursor=cursor, skip=(page - 1) * page_size, entity=source
+    )
     
     # Calculate total pages
-    total_pages = (total + page_size - 1) // page_size  # Ceiling division
+    total_pages = (total + page_size - 1) // page_size if total is not None else None  # Ceiling division
     
     # Convert ORM objects to Pydantic models explicitly with error handling
     attendance_records = []
@@ -157,10 +161,11 @@ def get_attendance_history(
     # Return response
     return AttendanceHistoryResponse(
         data=attendance_records,
-        total=len(attendance_records),  # Use actual count after filtering
-        page=page,
+        total=total,
+        page=None if cursor else page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor
     )
 
 
@@ -174,51 +179,55 @@ def export_attendance_history(
 ):
     """
     Export attendance history to CSV
+    Rows are streamed from a server-side cursor in chunks.
     """
-    import csv
-    from io import StringIO
     from fastapi.responses import StreamingResponse
     
-    query = db.query(Absensi).filter(Absensi.user_id == current_user.id)
-    
     # Apply same filters as history endpoint
-    if date_start:
-        start_date = datetime.strptime(date_start, "%Y-%m-%d").date()
-        query = query.filter(Absensi.date >= start_date)
-    
-    if date_end:
-        end_date = datetime.strptime(date_end, "%Y-%m-%d").date()
-        query = query.filter(Absensi.date <= end_date)
-    
-    if status:
-        query = query.filter(Absensi.status == status)
-    
-    records = query.order_by(Absensi.date.desc()).all()
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(["Tanggal", "Waktu", "Mata Pelajaran", "Guru", "Status", "Method", "Confidence", "Keterangan"])
-    
-    # Rows
-    for record in records:
-        writer.writerow([
-            record.date.strftime("%Y-%m-%d") if record.date else "",
-            record.timestamp.strftime("%H:%M:%S") if record.timestamp else "",
-            "",  # Mata Pelajaran - not in current model
-            "",  # Guru - not in current model  
-            record.status,
-            "face_recognition" if record.confidence else "manual",
-            f"{record.confidence:.1%}" if record.confidence else "",
-            ""  # Keterangan - not in current model
-        ])
+    try:
+        start_date = datetime.strptime(date_start, "%Y-%m-%d").date() if date_start else None
+        end_date = datetime.strptime(date_end, "%Y-%m-%d").date() if date_end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    user_id = current_user.id
+    
+    def build_query(export_db: Session):
+        source = AttendanceArchiveService(export_db).source(start_date)
+        query = export_db.query(
+            source.date,
+            source.timestamp,
+            source.status,
+            source.confidence
+        ).filter(source.user_id == user_id)
+        
+        if start_date:
+            query = query.filter(source.date >= start_date)
+        if end_date:
+            query = query.filter(source.date <= end_date)
+        if status:
+            query = query.filter(source.status == status)
+        
+        return query.order_by(source.date.desc())
+    
+    def rows():
+        for day, timestamp, record_status, confidence in stream_rows(build_query):
+            yield [
+                day.strftime("%Y-%m-%d") if day else "",
+                timestamp.strftime("%H:%M:%S") if timestamp else "",
+                "",  # Mata Pelajaran - not in current model
+                "",  # Guru - not in current model  
+                record_status,
+                "face_recognition" if confidence else "manual",
+                f"{confidence:.1%}" if confidence else "",
+                ""  # Keterangan - not in current model
+            ]
+    
+    header = ["Tanggal", "Waktu", "Mata Pelajaran", "Guru", "Status", "Method", "Confidence", "Keterangan"]
     
     # Return as downloadable CSV
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter_csv(header, rows()),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=attendance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
     )
@@ -271,6 +280,7 @@ def get_face_registration_status(
 
 @router.post("/face/register", response_model=FacePhoto)
 async def register_face_photo(
+    request: Request,
     image: UploadFile = File(...),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_student)
@@ -297,6 +307,15 @@ async def register_face_photo(
             filename=image.filename
         )
         
+        audit_log.log(
+            "register_face",
+            user_id=current_user.id,
+            entity_type="face",
+            entity_id=result["encoding_id"],
+            details={"quality_score": result["quality_score"]},
+            request=request
+        )
+        
         return {
             "id": result["encoding_id"],
             "image_url": result["image_path"],
@@ -385,7 +404,7 @@ def update_student_profile(
 
 
 @router.post("/password/change")
-def change_password(
+async def change_password(
     password_data: ChangePasswordRequest,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_student)
@@ -394,7 +413,7 @@ def change_password(
     Change password
     """
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.password_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Validate new password
@@ -402,7 +421,7 @@ def change_password(
         raise HTTPException(status_code=400, detail="New password must be at least 8 characters")
     
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    current_user.password_hash = await get_password_hash_async(password_data.new_password)
     db.commit()
     
     return {"message": "Password changed successfully"}
@@ -422,60 +441,57 @@ async def mark_attendance(
     """
     Mark attendance (student self-check-in)
     Can be manual or face_recognition
+    
+    Recorded through AttendanceService like the other check-in paths (write
+    queue, daily summary, streak, audit log); `kelas_id` is accepted for
+    compatibility, the class comes from the student's profile.
     """
     attendance_service = AttendanceService(db)
     
-    # Check if already marked today
-    today = date.today()
-    existing = db.query(Absensi).filter(
-        Absensi.user_id == current_user.id,
-        Absensi.date == today
-    ).first()
-    
-    if existing:
+    # Check if already marked today (includes marks still in the write queue)
+    if attendance_service.get_today_attendance(current_user.id):
         raise HTTPException(status_code=400, detail="Attendance already marked for today")
     
     confidence = None
     
     # If face recognition
     if method == "face_recognition" and image:
-        face_service = FaceService()
         image_data = await image.read()
         
         try:
-            # Recognize face
-            result = face_service.recognize_face(image_data)
-            
-            if not result["matched"]:
-                raise HTTPException(status_code=400, detail="Face not recognized")
-            
-            if result["user_id"] != current_user.id:
-                raise HTTPException(status_code=400, detail="Face does not match your profile")
-            
-            confidence = result["confidence"]
-            
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Face recognition failed: {str(e)}")
+            pil_image = Image.open(io.BytesIO(image_data)).convert("RGB")
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid image file")
+        
+        # Verify the face against the student's own registered faces
+        backend = get_backend()
+        known_encodings = load_user_embeddings(db, backend, current_user.id)
+        embedding = backend.embed(pil_image)  # BadRequestException (400) for a poor image
+        if embedding is None:
+            raise HTTPException(status_code=400, detail="Face not recognized")
+        
+        is_match, confidence = backend.verify(embedding, known_encodings)
+        if not is_match:
+            raise HTTPException(status_code=400, detail="Face does not match your profile")
+    
+    device_info = f"Student self check-in ({method})"
+    if keterangan:
+        device_info = f"{device_info} - {keterangan}"
     
-    # Create attendance record
-    absensi = Absensi(
+    attendance, is_duplicate = attendance_service.submit_attendance(
         user_id=current_user.id,
-        kelas_id=kelas_id,
-        tanggal=today,
-        waktu=datetime.now().time(),
-        status="hadir",
-        method=method,
         confidence=confidence,
-        keterangan=keterangan
+        image_path=None,
+        status="hadir",
+        device_info=device_info[:500]
     )
     
-    db.add(absensi)
-    db.commit()
-    db.refresh(absensi)
+    if is_duplicate:
+        raise HTTPException(status_code=400, detail="Attendance already marked for today")
     
     return {
         "success": True,
         "message": "Attendance marked successfully",
         "confidence": confidence,
-        "attendance_id": absensi.id
+        "attendance_id": attendance.id
     }
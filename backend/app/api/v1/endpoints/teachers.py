@@ -8,6 +8,7 @@ Handles all teacher-related operations:
 - Profile management
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Body
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
@@ -18,9 +19,21 @@ from app.api import deps
 from app.models.user import User
 from app.models.absensi import Absensi
 from app.models.kelas import Kelas
+from app.models.daily_summary import DailyAttendanceSummary
 from app.schemas.user import UserProfile, UpdateUserProfile
 from app.schemas.common import ChangePasswordRequest
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
+from app.services.attendance_service import AttendanceService
+from app.services.daily_summary_service import DailySummaryService
+from app.services.job_service import JobService, job_to_dict
+from app.services.session_attendance_service import SessionAttendanceService
+from app.services.report_export_service import (
+    REPORT_HEADER,
+    ReportExportService,
+    build_report_query,
+    format_report_row
+)
+from app.utils.csv_export import stream_rows, iter_csv
 
 router = APIRouter()
 
@@ -109,35 +122,42 @@ def get_teacher_classes(
     # TODO: Add teacher_id to kelas table and filter by teacher
     # For now, return all classes
     
-    classes = db.query(Kelas).all()
+    # Students per class
+    student_stats = db.query(
+        User.kelas_id.label("kelas_id"),
+        func.count(User.id).label("total_siswa")
+    ).filter(User.role == "user").group_by(User.kelas_id).subquery()
+    
+    # Attendance per class from the daily summary
+    attendance_stats = db.query(
+        DailyAttendanceSummary.kelas_id.label("kelas_id"),
+        func.sum(DailyAttendanceSummary.total).label("total_attendance"),
+        func.sum(DailyAttendanceSummary.hadir).label("total_hadir")
+    ).group_by(DailyAttendanceSummary.kelas_id).subquery()
+    
+    # One round-trip for all classes
+    classes = db.query(
+        Kelas,
+        student_stats.c.total_siswa,
+        attendance_stats.c.total_attendance,
+        attendance_stats.c.total_hadir
+    ).outerjoin(
+        student_stats, student_stats.c.kelas_id == Kelas.id
+    ).outerjoin(
+        attendance_stats, attendance_stats.c.kelas_id == Kelas.id
+    ).order_by(Kelas.code).all()
     
     result = []
-    for kelas in classes:
-        # Count students in this class
-        total_siswa = db.query(User).filter(
-            User.role == "user",
-            User.kelas == kelas.nama
-        ).count()
-        
-        # Calculate attendance rate for this class
-        total_attendance = db.query(Absensi).filter(
-            Absensi.kelas_id == kelas.id
-        ).count()
-        
-        total_hadir = db.query(Absensi).filter(
-            Absensi.kelas_id == kelas.id,
-            Absensi.status == "hadir"
-        ).count()
-        
+    for kelas, total_siswa, total_attendance, total_hadir in classes:
         attendance_rate = 0
-        if total_attendance > 0:
-            attendance_rate = round((total_hadir / total_attendance) * 100, 1)
+        if total_attendance:
+            attendance_rate = round(((total_hadir or 0) / total_attendance) * 100, 1)
         
         result.append({
             "id": kelas.id,
-            "kelas": kelas.nama,
+            "kelas": kelas.name,
             "mata_pelajaran": "Matematika",  # TODO: Add to kelas model
-            "total_siswa": total_siswa,
+            "total_siswa": total_siswa or 0,
             "jadwal": ["Senin 07:00-08:30", "Rabu 09:00-10:30"],  # TODO: From schedule table
             "ruangan": "Lab Komputer 1",  # TODO: From schedule table
             "attendance_rate": attendance_rate
@@ -162,12 +182,12 @@ def get_class_details(
     # Get students
     students = db.query(User).filter(
         User.role == "user",
-        User.kelas == kelas.nama
+        User.kelas_id == kelas.id
     ).all()
     
     return {
         "id": kelas.id,
-        "kelas": kelas.nama,
+        "kelas": kelas.name,
         "mata_pelajaran": "Matematika",
         "total_siswa": len(students),
         "students": [{"id": s.id, "name": s.name, "nim": s.nim} for s in students],
@@ -180,12 +200,14 @@ def get_class_details(
 def get_students_for_attendance(
     class_id: int,
     date_str: str = Query(..., alias="date", description="Date in YYYY-MM-DD format"),
+    slot: int = Query(1, ge=1, description="Schedule slot (jam pelajaran ke-)"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_teacher)
 ):
     """
     Get students for attendance marking
-    Returns: list of students with current status (if already marked)
+    Returns: list of students with their session status (if already marked)
+    and daily status (e.g. kiosk check-in)
     """
     # Parse date
     try:
@@ -198,29 +220,8 @@ def get_students_for_attendance(
     if not kelas:
         raise HTTPException(status_code=404, detail="Class not found")
     
-    # Get students in this class
-    students = db.query(User).filter(
-        User.role == "user",
-        User.kelas == kelas.nama
-    ).all()
-    
-    result = []
-    for student in students:
-        # Check if already marked for this date
-        attendance = db.query(Absensi).filter(
-            Absensi.user_id == student.id,
-            Absensi.kelas_id == class_id,
-            Absensi.tanggal == target_date
-        ).first()
-        
-        result.append({
-            "id": student.id,
-            "name": student.name,
-            "nis": student.nim,
-            "status": attendance.status if attendance else None
-        })
-    
-    return result
+    # Roster LEFT JOIN the session marks and daily records (one query)
+    return SessionAttendanceService(db).get_roll_call(kelas, target_date, slot)
 
 
 # ==================== ATTENDANCE MARKING ====================
@@ -230,12 +231,14 @@ def mark_attendance(
     kelas_id: int = Body(...),
     tanggal: str = Body(...),
     students: List[dict] = Body(...),
+    slot: int = Body(1, ge=1),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_teacher)
 ):
     """
     Mark attendance for multiple students
-    Body: { kelas_id, tanggal, students: [{ student_id, status, keterangan? }] }
+    Body: { kelas_id, tanggal, slot?, students: [{ student_id, status, keterangan? }] }
+    Students' daily attendance is derived from the session marks.
     """
     # Parse date
     try:
@@ -248,44 +251,22 @@ def mark_attendance(
     if not kelas:
         raise HTTPException(status_code=404, detail="Class not found")
     
-    marked_count = 0
-    
-    for student_data in students:
-        student_id = student_data.get("student_id")
-        status = student_data.get("status")
-        keterangan = student_data.get("keterangan")
-        
-        if not student_id or not status:
-            continue
-        
-        # Check if already marked
-        existing = db.query(Absensi).filter(
-            Absensi.user_id == student_id,
-            Absensi.kelas_id == kelas_id,
-            Absensi.tanggal == target_date
-        ).first()
-        
-        if existing:
-            # Update existing
-            existing.status = status
-            existing.keterangan = keterangan
-            existing.method = "manual"
-        else:
-            # Create new
-            absensi = Absensi(
-                user_id=student_id,
-                kelas_id=kelas_id,
-                tanggal=target_date,
-                waktu=datetime.now().time(),
-                status=status,
-                method="manual",
-                keterangan=keterangan
-            )
-            db.add(absensi)
-        
-        marked_count += 1
-    
-    db.commit()
+    marked = SessionAttendanceService(db).mark(
+        kelas,
+        target_date,
+        [
+            {
+                "user_id": student_data.get("student_id"),
+                "status": student_data.get("status"),
+                "keterangan": student_data.get("keterangan")
+            }
+            for student_data in students
+        ],
+        slot=slot,
+        method="manual",
+        marked_by=current_user.id
+    )
+    marked_count = len(marked)
     
     return {
         "success": True,
@@ -299,15 +280,19 @@ async def bulk_face_scan(
     kelas_id: int = Body(...),
     tanggal: str = Body(...),
     images: List[str] = Body(..., description="Array of base64 images"),
+    slot: int = Body(1, ge=1),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_teacher)
 ):
     """
     Bulk face scan for attendance
-    Recognizes multiple students from images
+    Recognizes multiple students from images (matched against the class
+    roster only); students already marked for the session are kept as is.
     """
-    from app.services.face_recognition_service import FaceRecognitionService
-    import base64
+    from app.services.embedding_backends import get_backend
+    from app.services.face_gallery import face_gallery
+    from app.services.recognition_batcher import recognition_batcher
+    from app.utils.image_processing import decode_base64_image
     
     # Parse date
     try:
@@ -315,56 +300,58 @@ async def bulk_face_scan(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
     
-    face_service = FaceRecognitionService(db)
-    recognized_students = []
+    kelas = db.query(Kelas).filter(Kelas.id == kelas_id).first()
+    if not kelas:
+        raise HTTPException(status_code=404, detail="Class not found")
     
+    # Registered faces of the class roster, taken from the cached gallery
+    names = dict(db.query(User.id, User.name).filter(
+        User.role == "user",
+        User.kelas_id == kelas.id
+    ).all())
+    backend = get_backend()
+    gallery = face_gallery.get(db, backend).subset(names)
+    
+    # Submit every readable image at once; the batcher embeds and matches them together
+    futures = []
     for image_base64 in images:
         try:
-            # Remove data URL prefix if exists
-            if "," in image_base64:
-                image_base64 = image_base64.split(",")[1]
-            
-            image_data = base64.b64decode(image_base64)
-            
-            # Recognize face
-            result = face_service.recognize_face(image_data)
-            
-            if result["matched"]:
-                student_id = result["user_id"]
-                confidence = result["confidence"]
-                
-                # Check if already marked
-                existing = db.query(Absensi).filter(
-                    Absensi.user_id == student_id,
-                    Absensi.kelas_id == kelas_id,
-                    Absensi.tanggal == target_date
-                ).first()
-                
-                if not existing:
-                    # Mark attendance
-                    absensi = Absensi(
-                        user_id=student_id,
-                        kelas_id=kelas_id,
-                        tanggal=target_date,
-                        waktu=datetime.now().time(),
-                        status="hadir",
-                        method="face_recognition",
-                        confidence=confidence
-                    )
-                    db.add(absensi)
-                    
-                    student = db.query(User).filter(User.id == student_id).first()
-                    recognized_students.append({
-                        "student_id": student_id,
-                        "name": student.name if student else "Unknown",
-                        "confidence": confidence
-                    })
-        
-        except Exception as e:
+            futures.append(recognition_batcher.submit(backend, decode_base64_image(image_base64), gallery))
+        except Exception:
+            # Skip undecodable images
+            continue
+    
+    matches = {}
+    for future in futures:
+        try:
+            _, result = await asyncio.wrap_future(future)
+        except Exception:
             # Skip failed images
             continue
+        if result and result["confidence"] > matches.get(result["user_id"], 0.0):
+            matches[result["user_id"]] = result["confidence"]
+    
+    marked = SessionAttendanceService(db).mark(
+        kelas,
+        target_date,
+        [
+            {"user_id": student_id, "status": "hadir", "confidence": confidence}
+            for student_id, confidence in matches.items()
+        ],
+        slot=slot,
+        method="face_recognition",
+        marked_by=current_user.id,
+        overwrite=False
+    )
     
-    db.commit()
+    recognized_students = [
+        {
+            "student_id": student_id,
+            "name": names.get(student_id, "Unknown"),
+            "confidence": matches[student_id]
+        }
+        for student_id in marked
+    ]
     
     return {
         "success": True,
@@ -387,48 +374,46 @@ def generate_report(
     """
     Generate attendance report
     Returns: summary stats with breakdown
+    
+    Counts come from the per-day attendance summary blocks, so the cost
+    depends on the number of days in the range, not the number of records.
     """
-    query = db.query(Absensi)
+    try:
+        start_date = datetime.strptime(date_start, "%Y-%m-%d").date() if date_start else None
+        end_date = datetime.strptime(date_end, "%Y-%m-%d").date() if date_end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    # Apply filters
+    # Get class
+    kelas_code = None
+    kelas_name = "All Classes"
     if kelas_id:
-        query = query.filter(Absensi.kelas_id == kelas_id)
-    
-    if date_start:
-        start_date = datetime.strptime(date_start, "%Y-%m-%d").date()
-        query = query.filter(Absensi.tanggal >= start_date)
-    
-    if date_end:
-        end_date = datetime.strptime(date_end, "%Y-%m-%d").date()
-        query = query.filter(Absensi.tanggal <= end_date)
+        kelas = db.query(Kelas).filter(Kelas.id == kelas_id).first()
+        if not kelas:
+            raise HTTPException(status_code=404, detail="Class not found")
+        kelas_code = kelas.code
+        kelas_name = kelas.name
     
-    # Get all records
-    records = query.all()
+    # Merge cached per-day blocks for the range
+    counts = DailySummaryService(db).get_range_counts(start_date, end_date, kelas_code)
     
-    # Calculate stats
-    total_hadir = sum(1 for r in records if r.status == "hadir")
-    total_sakit = sum(1 for r in records if r.status == "sakit")
-    total_izin = sum(1 for r in records if r.status == "izin")
-    total_alpa = sum(1 for r in records if r.status == "alpa")
+    total_hadir = counts["hadir"]
+    total_sakit = counts["sakit"]
+    total_izin = counts["izin"]
+    total_alpa = counts["alpa"]
     
-    # Get unique dates (pertemuan)
-    unique_dates = set(r.tanggal for r in records)
-    total_pertemuan = len(unique_dates)
+    # Number of meetings (dates with attendance)
+    total_pertemuan = counts["days"]
     
-    # Get unique students
-    unique_students = set(r.user_id for r in records)
-    total_siswa = len(unique_students)
+    # Students on the class roster
+    siswa_query = db.query(func.count(User.id)).filter(User.role == "user")
+    if kelas_id:
+        siswa_query = siswa_query.filter(User.kelas_id == kelas_id)
+    total_siswa = siswa_query.scalar()
     
     rata_kehadiran = 0
-    if len(records) > 0:
-        rata_kehadiran = round((total_hadir / len(records)) * 100, 1)
-    
-    # Get class name
-    kelas_name = "All Classes"
-    if kelas_id:
-        kelas = db.query(Kelas).filter(Kelas.id == kelas_id).first()
-        if kelas:
-            kelas_name = kelas.nama
+    if counts["total"] > 0:
+        rata_kehadiran = round((total_hadir / counts["total"]) * 100, 1)
     
     # Format periode
     periode = "All Time"
@@ -463,51 +448,16 @@ def get_top_students(
 ):
     """
     Get top students by attendance rate
+    Ranked and limited in SQL (class roster via User.kelas_id).
     """
-    query = db.query(
-        User.id,
-        User.name,
-        User.nim,
-        func.count(Absensi.id).label("total"),
-        func.sum(func.case((Absensi.status == "hadir", 1), else_=0)).label("hadir")
-    ).join(Absensi, User.id == Absensi.user_id)
-    
-    # Apply filters
-    if kelas_id:
-        query = query.filter(Absensi.kelas_id == kelas_id)
-    
-    if date_start:
-        start_date = datetime.strptime(date_start, "%Y-%m-%d").date()
-        query = query.filter(Absensi.tanggal >= start_date)
-    
-    if date_end:
-        end_date = datetime.strptime(date_end, "%Y-%m-%d").date()
-        query = query.filter(Absensi.tanggal <= end_date)
-    
-    # Group and order
-    results = query.group_by(User.id).all()
-    
-    # Calculate attendance percentage
-    students_with_rate = []
-    for result in results:
-        attendance_rate = 0
-        if result.total > 0:
-            attendance_rate = round((result.hadir / result.total) * 100, 1)
-        
-        students_with_rate.append({
-            "name": result.name,
-            "nis": result.nim,
-            "attendance": attendance_rate
-        })
-    
-    # Sort by attendance rate (descending)
-    students_with_rate.sort(key=lambda x: x["attendance"], reverse=True)
+    start_date, end_date, kelas_code, _ = _parse_report_filters(db, kelas_id, date_start, date_end)
     
-    # Add rank
-    for i, student in enumerate(students_with_rate[:limit], 1):
-        student["rank"] = i
-    
-    return students_with_rate[:limit]
+    return AttendanceService(db).get_ranked_students(
+        start_date=start_date,
+        end_date=end_date,
+        kelas=kelas_code,
+        limit=limit
+    )
 
 
 @router.get("/reports/low-attendance")
@@ -522,52 +472,18 @@ def get_low_attendance_students(
 ):
     """
     Get students with low attendance (below threshold)
+    Filtered, ranked and limited in SQL (class roster via User.kelas_id).
     """
-    query = db.query(
-        User.id,
-        User.name,
-        User.nim,
-        func.count(Absensi.id).label("total"),
-        func.sum(func.case((Absensi.status == "hadir", 1), else_=0)).label("hadir")
-    ).join(Absensi, User.id == Absensi.user_id)
-    
-    # Apply filters
-    if kelas_id:
-        query = query.filter(Absensi.kelas_id == kelas_id)
-    
-    if date_start:
-        start_date = datetime.strptime(date_start, "%Y-%m-%d").date()
-        query = query.filter(Absensi.tanggal >= start_date)
-    
-    if date_end:
-        end_date = datetime.strptime(date_end, "%Y-%m-%d").date()
-        query = query.filter(Absensi.tanggal <= end_date)
-    
-    # Group
-    results = query.group_by(User.id).all()
-    
-    # Filter by threshold
-    low_attendance = []
-    for result in results:
-        attendance_rate = 0
-        if result.total > 0:
-            attendance_rate = round((result.hadir / result.total) * 100, 1)
-        
-        if attendance_rate < threshold:
-            low_attendance.append({
-                "name": result.name,
-                "nis": result.nim,
-                "attendance": attendance_rate
-            })
-    
-    # Sort by attendance rate (ascending - lowest first)
-    low_attendance.sort(key=lambda x: x["attendance"])
+    start_date, end_date, kelas_code, _ = _parse_report_filters(db, kelas_id, date_start, date_end)
     
-    # Add rank
-    for i, student in enumerate(low_attendance[:limit], 1):
-        student["rank"] = i
-    
-    return low_attendance[:limit]
+    return AttendanceService(db).get_ranked_students(
+        start_date=start_date,
+        end_date=end_date,
+        kelas=kelas_code,
+        limit=limit,
+        lowest_first=True,
+        below_rate=threshold
+    )
 
 
 @router.get("/reports/export/csv")
@@ -580,50 +496,98 @@ def export_report_csv(
 ):
     """
     Export report to CSV
+    Rows are streamed from a server-side cursor in chunks.
     """
-    import csv
-    from io import StringIO
     from fastapi.responses import StreamingResponse
     
-    # Get report data (reuse generate_report logic)
-    query = db.query(Absensi).join(User, Absensi.user_id == User.id)
+    start_date, end_date, kelas_code, _ = _parse_report_filters(db, kelas_id, date_start, date_end)
+    
+    rows = stream_rows(
+        lambda export_db: build_report_query(export_db, start_date, end_date, kelas_code)
+    )
     
-    if kelas_id:
-        query = query.filter(Absensi.kelas_id == kelas_id)
-    if date_start:
-        query = query.filter(Absensi.tanggal >= datetime.strptime(date_start, "%Y-%m-%d").date())
-    if date_end:
-        query = query.filter(Absensi.tanggal <= datetime.strptime(date_end, "%Y-%m-%d").date())
-    
-    records = query.all()
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(["Tanggal", "Nama", "NIS", "Kelas", "Status", "Method", "Confidence"])
-    
-    # Rows
-    for record in records:
-        writer.writerow([
-            record.tanggal.strftime("%Y-%m-%d") if record.tanggal else "",
-            record.user.name if record.user else "",
-            record.user.nim if record.user else "",
-            record.kelas.nama if record.kelas else "",
-            record.status,
-            record.method or "manual",
-            f"{record.confidence:.1f}%" if record.confidence else ""
-        ])
-    
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter_csv(REPORT_HEADER, (format_report_row(row) for row in rows)),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
     )
 
 
+def _parse_report_filters(
+    db: Session,
+    kelas_id: Optional[int],
+    date_start: Optional[str],
+    date_end: Optional[str]
+):
+    """Parse report query filters into (start_date, end_date, kelas_code, kelas_name)."""
+    try:
+        start_date = datetime.strptime(date_start, "%Y-%m-%d").date() if date_start else None
+        end_date = datetime.strptime(date_end, "%Y-%m-%d").date() if date_end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    kelas_code = None
+    kelas_name = "All Classes"
+    if kelas_id:
+        kelas = db.query(Kelas).filter(Kelas.id == kelas_id).first()
+        if not kelas:
+            raise HTTPException(status_code=404, detail="Class not found")
+        kelas_code = kelas.code
+        kelas_name = kelas.name
+    
+    return start_date, end_date, kelas_code, kelas_name
+
+
+def _submit_export(
+    export_format: str,
+    db: Session,
+    current_user: User,
+    kelas_id: Optional[int],
+    date_start: Optional[str],
+    date_end: Optional[str]
+):
+    """
+    Queue a report export job and return its status.
+    A cached file for the same range, class and data version finishes the
+    job immediately; an identical export already queued is shared.
+    """
+    start_date, end_date, kelas_code, kelas_name = _parse_report_filters(db, kelas_id, date_start, date_end)
+    
+    service = ReportExportService(db)
+    plan = service.plan(export_format, start_date, end_date, kelas_code)
+    jobs = JobService(db)
+    
+    if plan["cached"]:
+        job = jobs.create_finished(
+            "report_export",
+            {
+                "format": export_format,
+                "file_path": plan["cache_path"],
+                "filename": plan["filename"],
+                "media_type": plan["media_type"]
+            },
+            created_by=current_user.id,
+            message=f"Export {export_format} diambil dari cache"
+        )
+        return job_to_dict(job)
+    
+    periode = f"{date_start or 'awal'} s/d {date_end or 'sekarang'}"
+    job = jobs.enqueue(
+        "report_export",
+        {
+            "format": export_format,
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+            "kelas": kelas_code,
+            "title": f"Laporan Absensi - {kelas_name} ({periode})"
+        },
+        created_by=current_user.id,
+        key=f"{current_user.id}:{plan['cache_path']}"
+    )
+    
+    return job_to_dict(job)
+
+
 @router.get("/reports/export/pdf")
 def export_report_pdf(
     kelas_id: Optional[int] = Query(None),
@@ -634,9 +598,10 @@ def export_report_pdf(
 ):
     """
     Export report to PDF
+    Starts a background job; poll /jobs/{job_id} and download from
+    /jobs/{job_id}/download when done.
     """
-    # TODO: Implement PDF generation with ReportLab
-    raise HTTPException(status_code=501, detail="PDF export not yet implemented")
+    return _submit_export("pdf", db, current_user, kelas_id, date_start, date_end)
 
 
 @router.get("/reports/export/excel")
@@ -649,9 +614,10 @@ def export_report_excel(
 ):
     """
     Export report to Excel
+    Starts a background job; poll /jobs/{job_id} and download from
+    /jobs/{job_id}/download when done.
     """
-    # TODO: Implement Excel generation with openpyxl
-    raise HTTPException(status_code=501, detail="Excel export not yet implemented")
+    return _submit_export("excel", db, current_user, kelas_id, date_start, date_end)
 
 
 # ==================== PROFILE ====================
@@ -698,7 +664,7 @@ def update_teacher_profile(
 
 
 @router.post("/password/change")
-def change_password(
+async def change_password(
     password_data: ChangePasswordRequest,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user_teacher)
@@ -707,7 +673,7 @@ def change_password(
     Change password
     """
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.password_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Validate new password
@@ -715,7 +681,7 @@ def change_password(
         raise HTTPException(status_code=400, detail="New password must be at least 8 characters")
     
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    current_user.password_hash = await get_password_hash_async(password_data.new_password)
     db.commit()
     
     return {"message": "Password changed successfully"}
@@ -6,9 +6,10 @@ Updated: 30 Dec 2025
 - Using face_recognition library (dlib-based) for fast and reliable recognition
 - Supports both HOG (fast) and CNN (accurate) models
 - Liveness detection handled by frontend (MediaPipe)
+- Embedding engine selected by FACE_EMBEDDING_BACKEND (services/embedding_backends.py)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 from PIL import Image
@@ -25,7 +26,11 @@ from app.schemas.face import (
     FaceStatusResponse
 )
 from app.schemas.common import ResponseBase
+from app.services.audit_service import audit_log
+from app.services.embedding_backends import get_backend
+from app.services.face_gallery import face_gallery
 from app.services.face_recognition_service import face_service
+from app.services.recognition_batcher import recognition_batcher
 from app.utils.image_processing import decode_base64_image
 from app.core.exceptions import BadRequestException, NotFoundException
 
@@ -38,15 +43,17 @@ async def scan_face(
     db: Session = Depends(get_db)
 ):
     """
-    Scan and recognize face from image using face_recognition library (dlib).
+    Scan and recognize face from image using the configured embedding backend.
     Public endpoint (no authentication required).
     
     Algorithm:
     1. Decode base64 image to PIL Image
-    2. Extract 128D face encoding using face_recognition
-    3. Load all registered face encodings from database
-    4. Compare with known faces using Euclidean distance
-    5. Return best match if distance < tolerance (0.6)
+    2. Take the cached gallery of registered faces for the backend
+    3. Extract the face embedding (dlib: 128D face_recognition encoding)
+    4. Compare with all known faces in one matrix product
+       (dlib: Euclidean distance, facenet: cosine similarity)
+    5. Return best match if it passes the backend threshold
+    Steps 3-4 run in the recognition batcher together with concurrent scans.
     """
     try:
         print("🔍 [face/scan] Starting face scan...")
@@ -56,26 +63,12 @@ async def scan_face(
         pil_image = decode_base64_image(request.image_base64)
         print(f"✓ [face/scan] PIL Image decoded: {pil_image.size}")
         
-        # Extract face encoding from query image
-        print("🧠 [face/scan] Extracting face encoding...")
-        query_encoding = face_service.encode_face(pil_image)
-        
-        if query_encoding is None:
-            print("❌ [face/scan] No face detected in image")
-            return FaceScanResponse(
-                recognized=False,
-                confidence=0.0,
-                message="Tidak ada wajah terdeteksi dalam gambar"
-            )
-        
-        print(f"✓ [face/scan] Encoding extracted: shape={query_encoding.shape}")
+        # Registered faces of this backend (cached, reloaded when registrations change)
+        backend = get_backend()
+        gallery = face_gallery.get(db, backend)
+        print(f"✓ [face/scan] Gallery: {len(gallery)} face encodings ({backend.name})")
         
-        # Get all face encodings from database
-        print("📊 [face/scan] Fetching face encodings from database...")
-        face_encodings_db = db.query(FaceEncoding).all()
-        print(f"✓ [face/scan] Found {len(face_encodings_db)} face encodings")
-        
-        if not face_encodings_db:
+        if len(gallery) == 0:
             print("⚠️ [face/scan] No registered faces in database")
             return FaceScanResponse(
                 recognized=False,
@@ -83,51 +76,29 @@ async def scan_face(
                 message="Belum ada wajah terdaftar dalam sistem"
             )
         
-        # Deserialize encodings and group by user_id
-        print("🔓 [face/scan] Deserializing encodings...")
-        user_encodings = {}  # {user_id: [encodings]}
-        
-        for fe in face_encodings_db:
-            try:
-                encoding = face_service.deserialize_encoding(fe.encoding_data)
-                if fe.user_id not in user_encodings:
-                    user_encodings[fe.user_id] = []
-                user_encodings[fe.user_id].append(encoding)
-            except Exception as e:
-                print(f"⚠️ [face/scan] Failed to deserialize encoding for user {fe.user_id}: {e}")
-                continue
-        
-        print(f"✓ [face/scan] Loaded encodings for {len(user_encodings)} users")
+        # Extract face encoding and find best match (batched with concurrent scans)
+        print("🧠 [face/scan] Extracting face encoding...")
+        face_detected, match = await recognition_batcher.recognize(backend, pil_image, gallery)
         
-        if not user_encodings:
+        if not face_detected:
+            print("❌ [face/scan] No face detected in image")
             return FaceScanResponse(
                 recognized=False,
                 confidence=0.0,
-                message="Tidak ada encoding valid dalam database"
+                message="Tidak ada wajah terdeteksi dalam gambar"
             )
         
-        # Find best match
-        print("🔍 [face/scan] Comparing with registered faces...")
-        best_match_id = None
-        best_confidence = 0.0
-        
-        for user_id, encodings in user_encodings.items():
-            # Compare with all encodings for this user
-            is_match, confidence = face_service.compare_faces(encodings, query_encoding)
-            print(f"   • User {user_id}: confidence={confidence:.2%}, match={is_match}")
-            
-            if is_match and confidence > best_confidence:
-                best_confidence = confidence
-                best_match_id = user_id
-        
-        if best_match_id is None:
+        if match is None:
             print("❌ [face/scan] Face not recognized")
             return FaceScanResponse(
                 recognized=False,
-                confidence=best_confidence,
+                confidence=0.0,
                 message="Wajah tidak dikenali. Pastikan wajah Anda sudah terdaftar."
             )
         
+        best_match_id = match["user_id"]
+        best_confidence = match["confidence"]
+        
         # Get user info
         print(f"👤 [face/scan] Fetching user info for ID: {best_match_id}")
         user = db.query(User).filter(User.id == best_match_id).first()
@@ -165,11 +136,12 @@ async def scan_face(
 @router.post("/register", response_model=FaceRegisterResponse)
 async def register_face(
     request: FaceRegisterRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Register face encodings for current user using FaceNet embeddings.
+    Register face encodings for current user with the configured embedding backend.
     Requires at least 3 images for better accuracy.
     
     Process:
@@ -177,7 +149,7 @@ async def register_face(
     2. Delete existing encodings for this user
     3. For each image:
        - Decode base64 to PIL Image
-       - Extract 128D face encoding using face_recognition library
+       - Extract the face embedding (FACE_EMBEDDING_BACKEND)
        - Save encoding to database
        - Save image to filesystem
     4. Update user's has_face status
@@ -205,6 +177,7 @@ async def register_face(
         face_service.delete_user_images(current_user.nim)
         
         # Process each image
+        backend = get_backend()
         encodings_created = 0
         
         for idx, image_base64 in enumerate(request.images_base64):
@@ -215,8 +188,8 @@ async def register_face(
                 pil_image = decode_base64_image(image_base64)
                 print(f"✓ [face/register] Image decoded: {pil_image.size}")
                 
-                # Extract face encoding using face_recognition library (fast!)
-                encoding = face_service.encode_face(pil_image)
+                # Extract face encoding with the configured backend
+                encoding = backend.embed(pil_image)
                 
                 if encoding is None:
                     print(f"⚠️ [face/register] No face detected in image {idx + 1}")
@@ -229,12 +202,13 @@ async def register_face(
                 print(f"✓ [face/register] Image saved: {image_path}")
                 
                 # Serialize encoding (convert to bytes)
-                encoding_data = face_service.serialize_encoding(encoding)
+                encoding_data = backend.serialize(encoding)
                 
                 # Save to database
                 face_encoding = FaceEncoding(
                     user_id=current_user.id,
                     encoding_data=encoding_data,
+                    model_version=backend.name,
                     image_path=image_path,
                     confidence=1.0  # Self-registration
                 )
@@ -257,6 +231,14 @@ async def register_face(
         db.commit()
         
         print(f"✅ [face/register] Successfully registered {encodings_created} face encodings for {current_user.name}")
+        audit_log.log(
+            "register_face",
+            user_id=current_user.id,
+            entity_type="user",
+            entity_id=current_user.id,
+            details={"encodings": encodings_created},
+            request=http_request
+        )
         
         return FaceRegisterResponse(
             success=True,
@@ -296,6 +278,7 @@ async def get_face_status(
 
 @router.delete("/unregister", response_model=ResponseBase)
 async def unregister_face(
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -317,6 +300,8 @@ async def unregister_face(
         
         db.commit()
         
+        audit_log.log("unregister_face", user_id=current_user.id, entity_type="user", entity_id=current_user.id, request=http_request)
+        
         return ResponseBase(
             success=True,
             message="Face data removed successfully"
@@ -335,11 +320,12 @@ async def unregister_face(
 async def admin_register_face(
     user_id: int,
     request: FaceRegisterRequest,
+    http_request: Request,
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """
-    Admin: Register face encodings for any user using FaceNet embeddings.
+    Admin: Register face encodings for any user with the configured embedding backend.
     Requires admin role.
     """
     # Get target user
@@ -366,7 +352,8 @@ async def admin_register_face(
         deleted_count = db.query(FaceEncoding).filter(FaceEncoding.user_id == user.id).delete()
         print(f"🗑️ [admin/register] Deleted {deleted_count} existing encodings")
         
-        # Process each image using fast face_recognition library (dlib-based)
+        # Process each image with the configured embedding backend
+        backend = get_backend()
         encodings_created = 0
         
         for idx, image_base64 in enumerate(request.images_base64):
@@ -376,8 +363,8 @@ async def admin_register_face(
                 # Decode base64 to PIL Image
                 pil_image = decode_base64_image(image_base64)
                 
-                # Extract face encoding using face_recognition (fast, dlib-based)
-                encoding = face_service.encode_face(pil_image)
+                # Extract face encoding with the configured backend
+                encoding = backend.embed(pil_image)
                 
                 if encoding is None:
                     print(f"⚠️ [admin/register] No face detected in image {idx + 1}")
@@ -390,12 +377,13 @@ async def admin_register_face(
                 print(f"✓ [admin/register] Image saved: {image_path}")
                 
                 # Serialize encoding
-                encoding_data = face_service.serialize_encoding(encoding)
+                encoding_data = backend.serialize(encoding)
                 
                 # Save to database
                 face_encoding = FaceEncoding(
                     user_id=user.id,
                     encoding_data=encoding_data,
+                    model_version=backend.name,
                     image_path=image_path,
                     confidence=1.0
                 )
@@ -414,6 +402,14 @@ async def admin_register_face(
         db.commit()
         
         print(f"✅ [admin/register] Successfully registered {encodings_created} face encodings for {user.name}")
+        audit_log.log(
+            "admin_register_face",
+            user_id=current_admin.id,
+            entity_type="user",
+            entity_id=user.id,
+            details={"encodings": encodings_created},
+            request=http_request
+        )
         
         return FaceRegisterResponse(
             success=True,
@@ -438,6 +434,7 @@ async def admin_register_face(
 @router.delete("/admin/unregister/{user_id}", response_model=ResponseBase)
 async def admin_unregister_face(
     user_id: int,
+    http_request: Request,
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -460,6 +457,8 @@ async def admin_unregister_face(
         
         db.commit()
         
+        audit_log.log("admin_unregister_face", user_id=current_admin.id, entity_type="user", entity_id=user.id, request=http_request)
+        
         return ResponseBase(
             success=True,
             message=f"Face data removed for {user.name}"
@@ -0,0 +1,70 @@
+"""
+Jobs API Routes
+Status and results of background jobs (CSV imports, report exports, ...).
+"""
+
+import json
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.models.job import Job
+from app.models.user import User
+from app.services.job_service import JobService, job_to_dict
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _get_own_job(job_id: str, current_user: User, db: Session) -> Job:
+    """Get a job visible to the current user (its creator or an admin)."""
+    job = JobService(db).get(job_id)
+    if not job or (current_user.role != "admin" and job.created_by != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get job status.
+    Returns status (pending/running/done/failed), progress in %, and the
+    result once the job is done.
+    """
+    return job_to_dict(_get_own_job(job_id, current_user, db))
+
+
+@router.get("/{job_id}/download")
+async def download_job_file(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download the file produced by a finished job (report exports).
+    """
+    job = _get_own_job(job_id, current_user, db)
+    result = json.loads(job.result) if job.result else {}
+    file_path = result.get("file_path")
+
+    if job.status != "done" or not file_path:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job has no file to download (status: {job.status})"
+        )
+    if not os.path.exists(file_path):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="File is no longer available, please export again"
+        )
+
+    return FileResponse(file_path, media_type=result.get("media_type"), filename=result.get("filename"))
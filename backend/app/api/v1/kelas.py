@@ -5,7 +5,7 @@ Endpoints for class management (create, read, update, delete).
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case
 from typing import Optional, List
 
 from app.api.deps import get_current_admin, get_db
@@ -13,6 +13,8 @@ from app.models.kelas import Kelas
 from app.models.user import User
 from app.schemas.kelas import KelasCreate, KelasUpdate, KelasResponse, KelasWithStats
 from app.schemas.common import ResponseBase, PaginatedResponse
+from app.services.daily_summary_service import DailySummaryService
+from app.services.kelas_service import link_students, rename_kelas
 
 router = APIRouter(prefix="/admin/classrooms", tags=["Kelas Management"])
 
@@ -50,29 +52,34 @@ async def get_all_kelas(
     # Get total count
     total = query.count()
     
+    # Student and face counts per class as one grouped subquery
+    student_stats = db.query(
+        User.kelas_id.label("kelas_id"),
+        func.count(User.id).label("total_students"),
+        func.sum(case((User.has_face == True, 1), else_=0)).label("students_with_face")
+    ).filter(User.role == "user").group_by(User.kelas_id).subquery()
+    
     # Get paginated results
-    kelas_list = query.offset(skip).limit(limit).all()
+    rows = query.outerjoin(
+        student_stats, student_stats.c.kelas_id == Kelas.id
+    ).add_columns(
+        student_stats.c.total_students,
+        student_stats.c.students_with_face
+    ).offset(skip).limit(limit).all()
     
     # Build response with statistics
     items = []
+    kelas_list = [kelas for kelas, _, _ in rows]
+    student_counts = {kelas.code: total_students or 0 for kelas, total_students, _ in rows}
+    face_counts = {kelas.code: students_with_face or 0 for kelas, _, students_with_face in rows}
+    
+    # Attendance rates from the pre-aggregated daily summary
+    attendance_rates = DailySummaryService(db).get_kelas_attendance_rates(student_counts)
+    
     for kelas in kelas_list:
-        # Count students in this class
-        total_students = db.query(User).filter(
-            User.kelas == kelas.code,
-            User.role == "user"
-        ).count()
-        
-        # Count students with face
-        students_with_face = db.query(User).filter(
-            User.kelas == kelas.code,
-            User.role == "user",
-            User.has_face == True
-        ).count()
-        
-        # Calculate attendance rate (simplified - could be more complex)
-        attendance_rate = 0.0
-        if total_students > 0:
-            attendance_rate = round((students_with_face / total_students) * 100, 1)
+        total_students = student_counts[kelas.code]
+        students_with_face = face_counts[kelas.code]
+        attendance_rate = attendance_rates.get(kelas.code, 0.0)
         
         items.append(KelasWithStats(
             id=kelas.id,
@@ -115,19 +122,20 @@ async def get_kelas_detail(
     
     # Get statistics
     total_students = db.query(User).filter(
-        User.kelas == kelas.code,
+        User.kelas_id == kelas.id,
         User.role == "user"
     ).count()
     
     students_with_face = db.query(User).filter(
-        User.kelas == kelas.code,
+        User.kelas_id == kelas.id,
         User.role == "user",
         User.has_face == True
     ).count()
     
-    attendance_rate = 0.0
-    if total_students > 0:
-        attendance_rate = round((students_with_face / total_students) * 100, 1)
+    # Attendance rate from the pre-aggregated daily summary
+    attendance_rate = DailySummaryService(db).get_kelas_attendance_rates(
+        {kelas.code: total_students}
+    ).get(kelas.code, 0.0)
     
     return KelasWithStats(
         id=kelas.id,
@@ -173,6 +181,12 @@ async def create_kelas(
     )
     
     db.add(kelas)
+    db.flush()
+    
+    # Students imported with this code before the class existed
+    linked = link_students(db, kelas)
+    DailySummaryService(db).move_students(linked, None, kelas.id)
+    
     db.commit()
     db.refresh(kelas)
     
@@ -206,6 +220,9 @@ async def update_kelas(
                 detail=f"Kelas code '{kelas_data.code}' already used"
             )
         kelas.code = kelas_data.code
+        
+        # Students follow through kelas_id; rewrite their displayed code
+        rename_kelas(db, kelas)
     
     # Update fields
     if kelas_data.name:
@@ -243,7 +260,7 @@ async def delete_kelas(
     
     # Check if there are students in this class
     student_count = db.query(User).filter(
-        User.kelas == kelas.code,
+        User.kelas_id == kelas.id,
         User.role == "user"
     ).count()
     
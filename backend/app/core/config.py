@@ -26,6 +26,16 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600  # Job worker deletes revoked/expired tokens
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
+    
+    # Authenticated user cache (snapshot per user id, see services/user_cache.py)
+    USER_CACHE_TTL_SECONDS: float = 30.0  # 0 disables the cache
+    USER_CACHE_MAX_SIZE: int = 2048
+    
+    # Password Hashing (bcrypt)
+    BCRYPT_ROUNDS: int = 12  # Work factor; existing hashes are upgraded on next login
+    PASSWORD_HASH_THREADS: int = 4  # Concurrent hash/verify operations in API requests
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -45,6 +55,51 @@ class Settings(BaseSettings):
     FACE_RECOGNITION_TOLERANCE: float = 0.55  # More lenient (0.4=strict, 0.6=standard)
     FACE_MIN_CONFIDENCE: float = 0.60  # 60% confidence minimum
     MIN_FACE_IMAGES: int = 3
+    FACE_EMBEDDING_BACKEND: str = "dlib"  # dlib or facenet (see services/embedding_backends.py)
+    FACENET_SIMILARITY_THRESHOLD: float = 0.5  # Minimum cosine similarity for a FaceNet match
+    
+    # Recognition Micro-Batching (concurrent kiosk scans share one forward pass)
+    RECOGNITION_BATCH_ENABLED: bool = True
+    RECOGNITION_BATCH_MAX_WAIT_MS: int = 5  # Latency a request may wait for others to join its batch
+    RECOGNITION_BATCH_SIZE: int = 16  # ...or run as soon as this many images are waiting
+    MODEL_WARMUP_ENABLED: bool = True  # Load models and the gallery in the background at startup (/health/ready)
+    
+    # Attendance Write Queue (group commit at peak hours)
+    ATTENDANCE_QUEUE_ENABLED: bool = False
+    ATTENDANCE_QUEUE_JOURNAL_PATH: str = "./database/attendance_journal.log"
+    ATTENDANCE_QUEUE_FLUSH_INTERVAL_MS: int = 200  # Flush at least this often
+    ATTENDANCE_QUEUE_BATCH_SIZE: int = 50  # ...or as soon as this many marks are pending
+    
+    # Attendance Archive (closed academic years move to absensi_archive)
+    ACADEMIC_YEAR_START_MONTH: int = 7  # Tahun ajaran starts in July (2024/2025 = Jul 2024 - Jun 2025)
+    ATTENDANCE_ARCHIVE_ENABLED: bool = True
+    ATTENDANCE_ARCHIVE_GRACE_DAYS: int = 30  # Keep a closed year live this long for late corrections
+    ATTENDANCE_ARCHIVE_BATCH_SIZE: int = 2000
+    
+    # Audit Log (batched background writer, see services/audit_service.py)
+    AUDIT_LOG_ENABLED: bool = True
+    AUDIT_LOG_QUEUE_SIZE: int = 10000  # Entries beyond this go straight to the fallback file
+    AUDIT_LOG_BATCH_SIZE: int = 200
+    AUDIT_LOG_FLUSH_INTERVAL_MS: int = 500
+    AUDIT_LOG_FALLBACK_PATH: str = "./database/audit_fallback.jsonl"  # Used while the DB is busy
+    AUDIT_LOG_RETENTION_DAYS: int = 180
+    AUDIT_LOG_ARCHIVE_DIR: str = ""  # Archive purged rows here (gzipped JSON lines); empty = delete only
+    AUDIT_LOG_PURGE_BATCH_SIZE: int = 1000
+    
+    # Background Jobs (imports/exports run by the worker process started with run.py)
+    JOB_WORKER_ENABLED: bool = True  # run.py starts worker.py alongside the API
+    JOB_WORKER_EMBEDDED: bool = False  # Run the worker as a thread inside the API process instead
+    JOB_WORKER_POLL_INTERVAL: float = 1.0  # Seconds between polls when the queue is empty
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # Doubles after every failed attempt
+    JOB_RETENTION_DAYS: int = 7  # Finished jobs are deleted after this
+    
+    # Bulk Student Provisioning (CSV import / bulk create jobs)
+    PROVISION_CHUNK_SIZE: int = 500  # Students checked, hashed and inserted per batch
+    PASSWORD_HASH_PROCESSES: int = 0  # Processes hashing passwords in parallel (0 = CPU count)
+    
+    # Report Exports (Excel/PDF rendered by the job worker, cached on disk)
+    REPORT_EXPORT_DIR: str = "./database/exports"
     
     # Liveness Detection
     LIVENESS_ENABLED: bool = True
@@ -2,6 +2,12 @@
 Security utilities for password hashing and JWT token management.
 """
 
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
@@ -15,12 +21,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
+    """Hash a password using bcrypt with the configured work factor."""
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a bcrypt hash was made with a different work factor than configured."""
+    try:
+        # Format: $2b$<cost>$<salt+hash>
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHashMetrics:
+    """Counters for password hashing in the API (queue wait and bcrypt time)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_duration = 0.0
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, wait: float, duration: float) -> None:
+        with self._lock:
+            self.operations += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.total_duration += duration
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self.operations or 1
+            return {
+                "workers": settings.PASSWORD_HASH_THREADS,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "operations": self.operations,
+                "in_flight": self.in_flight,
+                "avg_wait_ms": round(self.total_wait / count * 1000, 1),
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+                "avg_hash_ms": round(self.total_duration / count * 1000, 1)
+            }
+
+
+password_hash_metrics = PasswordHashMetrics()
+
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel
+# without blocking the event loop; the bound keeps a login burst from
+# starving other request threads.
+_password_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.PASSWORD_HASH_THREADS),
+    thread_name_prefix="password-hash"
+)
+
+
+async def _run_password_op(func, *args):
+    """Run a bcrypt operation in the password pool, recording queue wait time."""
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            password_hash_metrics.record(started - submitted, time.perf_counter() - started)
+
+    password_hash_metrics.begin()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, timed)
+    finally:
+        password_hash_metrics.end()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """`verify_password` without blocking the event loop."""
+    return await _run_password_op(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """`get_password_hash` without blocking the event loop."""
+    return await _run_password_op(get_password_hash, password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -62,7 +156,8 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     
     to_encode.update({
         "exp": expire,
-        "type": "refresh"
+        "type": "refresh",
+        "jti": uuid.uuid4().hex  # Unique even for two logins in the same second
     })
     
     encoded_jwt = jwt.encode(
@@ -73,6 +168,11 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     return encoded_jwt
 
 
+def hash_token(token: str) -> str:
+    """SHA-256 hex digest of a token, as stored in the database."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """Decode and verify a JWT token with logging for debugging."""
     try:
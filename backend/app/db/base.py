@@ -9,5 +9,10 @@ from app.db.session import Base
 from app.models.user import User  # noqa
 from app.models.face_encoding import FaceEncoding  # noqa
 from app.models.absensi import Absensi  # noqa
+from app.models.absensi_archive import AbsensiArchive  # noqa
+from app.models.absensi_sesi import AbsensiSesi  # noqa
+from app.models.kelas import Kelas  # noqa
 from app.models.refresh_token import RefreshToken  # noqa
 from app.models.audit_log import AuditLog  # noqa
+from app.models.daily_summary import DailyAttendanceSummary  # noqa
+from app.models.job import Job  # noqa
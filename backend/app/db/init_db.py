@@ -6,16 +6,16 @@ Creates all tables and optionally seeds initial data.
 import os
 from sqlalchemy.orm import Session
 from app.db.session import engine, SessionLocal
-from app.db.base import Base
+from app.db.migrations import run_migrations
 from app.models.user import User
 from app.core.security import get_password_hash
 from app.core.config import settings
 
 
 def create_tables():
-    """Create all database tables."""
+    """Create all database tables (and apply pending migrations)."""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     print("✅ Tables created successfully!")
 
 
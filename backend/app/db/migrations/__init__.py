@@ -0,0 +1,208 @@
+"""
+Versioned schema migrations.
+
+`Base.metadata.create_all` creates missing tables (with their indexes) but
+never touches a table that already exists, so new columns and indexes on
+existing tables need a migration to reach deployed databases.
+
+Migrations are frozen: they declare the tables they touch inline
+(`table()`/`column()`, or SQL) instead of importing models or services,
+so later model changes cannot change what an old migration does.
+
+Each migration is a module `vNNN_<name>.py` in this package with an
+`upgrade(conn)` function, listed in MIGRATIONS in order. Applied versions
+are recorded in `schema_migrations`. Migrations check the current schema
+before changing it, so they are also safe on databases that were upgraded
+by hand with the older one-off tools.
+
+Run automatically on API/worker startup (`run_migrations`) and by
+`python tools/migrate.py`. run.py starts the API and the job worker
+together, so a run holds a lock row in `schema_migrations_lock`; the
+other process waits for it and then finds nothing left to apply.
+"""
+
+import os
+import socket
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.db.migrations import (
+    v001_attendance_streaks,
+    v002_refresh_token_hashes,
+    v003_daily_summary_backfill,
+    v004_user_kelas_fk,
+    v005_performance_indexes,
+    v006_daily_summary_kelas_id,
+    v007_absensi_autoincrement,
+)
+
+
+# In order; never renumber or remove an entry once released
+MIGRATIONS = [
+    v001_attendance_streaks,
+    v002_refresh_token_hashes,
+    v003_daily_summary_backfill,
+    v004_user_kelas_fk,
+    v005_performance_indexes,
+    v006_daily_summary_kelas_id,
+    v007_absensi_autoincrement,
+]
+
+# Kept out of Base.metadata: these tables belong to the migration runner
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# At most one row (id = 1) while a process is migrating
+schema_migrations_lock = Table(
+    "schema_migrations_lock",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("owner", String(100), nullable=False),
+    Column("locked_at", DateTime, nullable=False),
+)
+
+# A lock older than this was left by a process that died while migrating
+LOCK_STALE_AFTER = timedelta(minutes=10)
+LOCK_POLL_SECONDS = 0.5
+
+
+def version_of(migration) -> Tuple[int, str]:
+    """(version, name) from a module name such as `v004_user_kelas_fk`."""
+    version, name = migration.__name__.rsplit(".", 1)[-1].split("_", 1)
+    return int(version[1:]), name
+
+
+def applied_versions(bind: Engine) -> set:
+    """Versions recorded in `schema_migrations` (empty if the table does not exist)."""
+    if not inspect(bind).has_table("schema_migrations"):
+        return set()
+    with bind.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def analyze(bind: Engine) -> None:
+    """Refresh the query planner statistics (index selectivity) with ANALYZE."""
+    with bind.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+@contextmanager
+def migration_lock(bind: Engine):
+    """
+    Hold the migration lock; waits while another process holds it.
+
+    Locks older than LOCK_STALE_AFTER are taken over.
+    """
+    try:
+        schema_migrations_lock.create(bind=bind, checkfirst=True)
+    except (OperationalError, IntegrityError):
+        # Created by another process between the check and the CREATE
+        if not inspect(bind).has_table("schema_migrations_lock"):
+            raise
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"[:100]
+    waiting = False
+
+    while True:
+        try:
+            with bind.begin() as conn:
+                conn.execute(schema_migrations_lock.insert().values(
+                    id=1,
+                    owner=owner,
+                    locked_at=datetime.utcnow()
+                ))
+            break
+        except (IntegrityError, OperationalError):
+            pass
+
+        if not waiting:
+            print("⏳ Waiting for another process to finish database migrations...")
+            waiting = True
+
+        try:
+            with bind.begin() as conn:
+                conn.execute(schema_migrations_lock.delete().where(
+                    schema_migrations_lock.c.locked_at < datetime.utcnow() - LOCK_STALE_AFTER
+                ))
+        except OperationalError:
+            pass  # Database busy with the other process's migration
+        time.sleep(LOCK_POLL_SECONDS)
+
+    try:
+        yield
+    finally:
+        with bind.begin() as conn:
+            conn.execute(schema_migrations_lock.delete().where(
+                schema_migrations_lock.c.owner == owner
+            ))
+
+
+def run_migrations(bind: Engine) -> List[str]:
+    """
+    Bring the database schema up to date.
+
+    A new (empty) database gets every table from the models and all
+    migrations are recorded as applied. An existing database gets every
+    pending migration applied in order, each in its own transaction, then
+    the tables it is still missing created from the models, followed by
+    ANALYZE. (Migrations run first so they see the schema of their time,
+    not tables created from newer models.)
+
+    Args:
+        bind: Engine to migrate
+
+    Returns:
+        Names of the migrations applied ("vNNN_name")
+    """
+    # Register every model on Base.metadata
+    from app.db.base import Base
+
+    with migration_lock(bind):
+        is_new_database = not inspect(bind).has_table("users")
+
+        if is_new_database:
+            Base.metadata.create_all(bind=bind)
+        schema_migrations.create(bind=bind, checkfirst=True)
+
+        applied = applied_versions(bind)
+        names = []
+
+        for migration in MIGRATIONS:
+            version, name = version_of(migration)
+            if version in applied:
+                continue
+
+            with bind.begin() as conn:
+                if not is_new_database:
+                    migration.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version,
+                    name=name,
+                    applied_at=datetime.utcnow()
+                ))
+
+            if not is_new_database:
+                names.append(f"v{version:03d}_{name}")
+                print(f"✅ Migration applied: v{version:03d} {name}")
+
+        if not is_new_database:
+            Base.metadata.create_all(bind=bind)
+
+    if names:
+        analyze(bind)
+        print("✅ Query planner statistics updated (ANALYZE)")
+
+    return names
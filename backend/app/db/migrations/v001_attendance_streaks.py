@@ -0,0 +1,65 @@
+"""
+Add the maintained attendance streak columns to users
+(users.current_streak / users.last_present_date) and backfill them from
+existing attendance records in a single ordered scan.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import Date, Integer, column, inspect, select, table, text, update
+
+
+# Tables as of this migration (frozen; not the live models)
+users = table(
+    "users",
+    column("id", Integer),
+    column("current_streak", Integer),
+    column("last_present_date", Date)
+)
+
+absensi = table(
+    "absensi",
+    column("user_id", Integer),
+    column("date", Date)
+)
+
+
+def upgrade(conn) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("users")}
+
+    if "current_streak" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN current_streak INTEGER NOT NULL DEFAULT 0"))
+    if "last_present_date" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN last_present_date DATE"))
+
+    # Recompute every user's streak from one scan ordered by (user, date desc)
+    streaks = {}
+    current_user = None
+    expected = None
+    done = False
+
+    rows = conn.execute(
+        select(absensi.c.user_id, absensi.c.date).order_by(absensi.c.user_id, absensi.c.date.desc())
+    )
+    for user_id, day in rows:
+        if user_id != current_user:
+            current_user = user_id
+            streaks[user_id] = [0, day]
+            expected = day
+            done = False
+        if done:
+            continue
+        if day != expected:
+            done = True
+            continue
+        streaks[user_id][0] += 1
+        expected = day - timedelta(days=1)
+
+    conn.execute(update(users).values(current_streak=0, last_present_date=None))
+    for user_id, (streak, last_present_date) in streaks.items():
+        conn.execute(
+            update(users).where(users.c.id == user_id).values(
+                current_streak=streak,
+                last_present_date=last_present_date
+            )
+        )
@@ -0,0 +1,74 @@
+"""
+Store refresh tokens as SHA-256 hashes: recreate refresh_tokens with the
+token_hash column and its indexes, carrying over active tokens (hashed) so
+nobody is logged out; revoked and expired rows are dropped.
+"""
+
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table,
+    column, func, inspect, select, table, text
+)
+
+
+# refresh_tokens as created by this migration (frozen; not the live model)
+_metadata = MetaData()
+
+Table("users", _metadata, Column("id", Integer, primary_key=True))
+
+refresh_tokens = Table(
+    "refresh_tokens",
+    _metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("token_hash", String(64), unique=True, nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("revoked", Boolean, default=False),
+    Index("ix_refresh_tokens_id", "id"),
+    Index("ix_refresh_tokens_expires_at", "expires_at"),
+    Index("ix_refresh_tokens_user_revoked", "user_id", "revoked"),
+)
+
+# Typed view of the old table (raw SQL would return dates as strings)
+old_tokens = table(
+    "refresh_tokens",
+    column("user_id", Integer),
+    column("token", String),
+    column("expires_at", DateTime),
+    column("created_at", DateTime),
+    column("revoked", Boolean)
+)
+
+
+def upgrade(conn) -> None:
+    if not inspect(conn).has_table("refresh_tokens"):
+        refresh_tokens.create(bind=conn)
+        return
+
+    columns = {c["name"] for c in inspect(conn).get_columns("refresh_tokens")}
+    if "token_hash" in columns:
+        return
+
+    active = [
+        {
+            "user_id": row.user_id,
+            "token_hash": hashlib.sha256(row.token.encode("utf-8")).hexdigest(),
+            "expires_at": row.expires_at,
+            "created_at": row.created_at,
+            "revoked": False
+        }
+        for row in conn.execute(
+            select(old_tokens).where(
+                old_tokens.c.revoked == False,
+                old_tokens.c.expires_at > datetime.utcnow()
+            )
+        )
+    ]
+
+    conn.execute(text("DROP TABLE refresh_tokens"))
+    refresh_tokens.create(bind=conn)
+    if active:
+        conn.execute(refresh_tokens.insert(), active)
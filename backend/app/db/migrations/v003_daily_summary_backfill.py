@@ -0,0 +1,57 @@
+"""
+Create daily_attendance_summary, counters per (date, class code), and
+populate it from the attendance records (live and archived) of databases
+that predate it.
+"""
+
+from sqlalchemy import (
+    Column, Date, DateTime, Index, Integer, MetaData, String, Table, UniqueConstraint,
+    func, inspect, text
+)
+
+
+# daily_attendance_summary as created by this migration (frozen; not the live model)
+daily_attendance_summary = Table(
+    "daily_attendance_summary",
+    MetaData(),
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("date", Date, nullable=False),
+    Column("kelas", String(50), nullable=False, default=""),
+    Column("total", Integer, nullable=False, default=0),
+    Column("hadir", Integer, nullable=False, default=0),
+    Column("terlambat", Integer, nullable=False, default=0),
+    Column("izin", Integer, nullable=False, default=0),
+    Column("sakit", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint("date", "kelas", name="uix_summary_date_kelas"),
+    Index("ix_daily_attendance_summary_id", "id"),
+    Index("ix_daily_attendance_summary_date", "date"),
+)
+
+BACKFILL_SQL = """
+INSERT INTO daily_attendance_summary (date, kelas, total, hadir, terlambat, izin, sakit, updated_at)
+SELECT a.date,
+       COALESCE(u.kelas, ''),
+       COUNT(*),
+       SUM(CASE WHEN a.status = 'hadir' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a.status = 'terlambat' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a.status = 'izin' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a.status = 'sakit' THEN 1 ELSE 0 END),
+       CURRENT_TIMESTAMP
+FROM ({source}) AS a
+JOIN users AS u ON u.id = a.user_id
+GROUP BY a.date, COALESCE(u.kelas, '')
+"""
+
+
+def upgrade(conn) -> None:
+    daily_attendance_summary.create(bind=conn, checkfirst=True)
+
+    if conn.execute(text("SELECT 1 FROM daily_attendance_summary LIMIT 1")).first() is not None:
+        return
+
+    source = "SELECT user_id, date, status FROM absensi"
+    if inspect(conn).has_table("absensi_archive"):
+        source += " UNION ALL SELECT user_id, date, status FROM absensi_archive"
+
+    conn.execute(text(BACKFILL_SQL.format(source=source)))
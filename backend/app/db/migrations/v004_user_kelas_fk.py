@@ -0,0 +1,28 @@
+"""
+Link students to classes by foreign key: add users.kelas_id and backfill
+it from the existing users.kelas codes with one UPDATE.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("users")}
+    if "kelas_id" not in columns:
+        conn.execute(text(
+            "ALTER TABLE users ADD COLUMN kelas_id INTEGER REFERENCES kelas(id) ON DELETE SET NULL"
+        ))
+
+    if not inspect(conn).has_table("kelas"):
+        return  # No classes to link yet
+
+    conn.execute(text(
+        "UPDATE users SET kelas_id = (SELECT kelas.id FROM kelas WHERE kelas.code = users.kelas) "
+        "WHERE users.kelas IS NOT NULL"
+    ))
+
+    unmatched = conn.execute(text(
+        "SELECT DISTINCT kelas FROM users WHERE kelas IS NOT NULL AND kelas_id IS NULL"
+    )).scalars().all()
+    if unmatched:
+        print(f"⚠️ Class codes without a kelas row (left unlinked): {', '.join(unmatched)}")
@@ -0,0 +1,55 @@
+"""
+Curated index set for the real query shapes.
+
+- absensi(date, status): daily dashboards and per-day status counts
+- absensi(user_id, date): per-student history, newest first; served by the
+  uix_user_date unique index scanned backwards (a separate DESC index
+  would duplicate it), (user_id, date, status) covers rate aggregates
+- absensi(date, id): keyset order of school-wide listings
+- users(kelas_id, role): class rosters (class filters use kelas_id, the
+  former users(role, kelas) string key)
+- face_encodings(user_id, model_version): a user's encodings of one
+  embedding backend; adds face_encodings.model_version (existing rows
+  were produced by dlib)
+
+Single-column indexes that are a prefix of one of the above are dropped:
+they only cost writes.
+"""
+
+from sqlalchemy import inspect, text
+
+
+OBSOLETE_INDEXES = (
+    "ix_absensi_user_id",
+    "ix_absensi_date",
+    "ix_absensi_status",
+    "ix_face_encodings_user_id",
+)
+
+# (name, table, columns); frozen, not read from the live models
+INDEXES = (
+    ("ix_absensi_date_id", "absensi", ("date", "id")),
+    ("ix_absensi_date_status", "absensi", ("date", "status")),
+    ("ix_absensi_user_date_status", "absensi", ("user_id", "date", "status")),
+    ("ix_users_kelas_id_role", "users", ("kelas_id", "role")),
+    ("ix_face_encodings_user_model", "face_encodings", ("user_id", "model_version")),
+)
+
+
+def upgrade(conn) -> None:
+    inspector = inspect(conn)
+
+    if inspector.has_table("face_encodings"):
+        columns = {c["name"] for c in inspector.get_columns("face_encodings")}
+        if "model_version" not in columns:
+            conn.execute(text(
+                "ALTER TABLE face_encodings ADD COLUMN model_version VARCHAR(50) NOT NULL DEFAULT 'dlib'"
+            ))
+
+    for name in OBSOLETE_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    # Tables created later get these indexes from create_all
+    for name, table_name, columns in INDEXES:
+        if inspector.has_table(table_name):
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} ({', '.join(columns)})"))
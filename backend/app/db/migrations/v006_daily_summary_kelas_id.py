@@ -0,0 +1,65 @@
+"""
+Key daily_attendance_summary by class id instead of class code: records
+count towards the student's current class (users.kelas_id, 0 without a
+class), so a class rename no longer rewrites summary rows.
+
+The counters are derived data, so the table is recreated and rebuilt from
+the attendance records (live and archived).
+"""
+
+from sqlalchemy import (
+    Column, Date, DateTime, Index, Integer, MetaData, Table, UniqueConstraint,
+    func, inspect, text
+)
+
+
+# daily_attendance_summary as created by this migration (frozen; not the live model)
+daily_attendance_summary = Table(
+    "daily_attendance_summary",
+    MetaData(),
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("date", Date, nullable=False),
+    Column("kelas_id", Integer, nullable=False, default=0),
+    Column("total", Integer, nullable=False, default=0),
+    Column("hadir", Integer, nullable=False, default=0),
+    Column("terlambat", Integer, nullable=False, default=0),
+    Column("izin", Integer, nullable=False, default=0),
+    Column("sakit", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint("date", "kelas_id", name="uix_summary_date_kelas_id"),
+    Index("ix_daily_attendance_summary_id", "id"),
+    Index("ix_daily_attendance_summary_date", "date"),
+)
+
+BACKFILL_SQL = """
+INSERT INTO daily_attendance_summary (date, kelas_id, total, hadir, terlambat, izin, sakit, updated_at)
+SELECT a.date,
+       COALESCE(u.kelas_id, 0),
+       COUNT(*),
+       SUM(CASE WHEN a.status = 'hadir' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a.status = 'terlambat' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a.status = 'izin' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a.status = 'sakit' THEN 1 ELSE 0 END),
+       CURRENT_TIMESTAMP
+FROM ({source}) AS a
+JOIN users AS u ON u.id = a.user_id
+GROUP BY a.date, COALESCE(u.kelas_id, 0)
+"""
+
+
+def upgrade(conn) -> None:
+    inspector = inspect(conn)
+
+    if inspector.has_table("daily_attendance_summary"):
+        columns = {c["name"] for c in inspector.get_columns("daily_attendance_summary")}
+        if "kelas_id" in columns:
+            return
+        conn.execute(text("DROP TABLE daily_attendance_summary"))
+
+    daily_attendance_summary.create(bind=conn)
+
+    source = "SELECT user_id, date, status FROM absensi"
+    if inspector.has_table("absensi_archive"):
+        source += " UNION ALL SELECT user_id, date, status FROM absensi_archive"
+
+    conn.execute(text(BACKFILL_SQL.format(source=source)))
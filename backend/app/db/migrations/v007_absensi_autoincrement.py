@@ -0,0 +1,100 @@
+"""
+Make absensi ids monotonic (SQLite AUTOINCREMENT).
+
+Archived rows keep their absensi.id. Without AUTOINCREMENT SQLite hands
+out max(id) + 1, so once archiving empties the live table new marks reuse
+ids that are already in absensi_archive: the live + archive UNION loads
+two records as one, and archiving that year later fails on the archive's
+primary key.
+
+SQLite cannot change a primary key in place, so the table is rebuilt.
+Live ids that already collide with archived ones are moved above every
+existing id, and the id sequence starts after the highest archived id.
+Other databases (SERIAL / IDENTITY) never reuse ids and are left alone.
+"""
+
+from sqlalchemy import (
+    Column, Date, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table,
+    UniqueConstraint, func, inspect, text
+)
+
+
+_metadata = MetaData()
+
+# Referenced by the foreign key below; only the key column is needed
+Table("users", _metadata, Column("id", Integer, primary_key=True))
+
+# absensi as created by this migration (frozen; not the live model)
+absensi = Table(
+    "absensi",
+    _metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("date", Date, nullable=False),
+    Column("timestamp", DateTime(timezone=True), server_default=func.now()),
+    Column("status", String(20)),
+    Column("confidence", Float, nullable=True),
+    Column("image_path", String(255), nullable=True),
+    Column("device_info", String(500), nullable=True),
+    Column("ip_address", String(45), nullable=True),
+    UniqueConstraint("user_id", "date", name="uix_user_date"),
+    Index("ix_absensi_id", "id"),
+    Index("ix_absensi_date_id", "date", "id"),
+    Index("ix_absensi_date_status", "date", "status"),
+    Index("ix_absensi_user_date_status", "user_id", "date", "status"),
+    sqlite_autoincrement=True,
+)
+
+COLUMNS = (
+    "id", "user_id", "date", "timestamp", "status", "confidence",
+    "image_path", "device_info", "ip_address"
+)
+
+
+def upgrade(conn) -> None:
+    if conn.dialect.name != "sqlite" or not inspect(conn).has_table("absensi"):
+        return
+
+    create_sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'absensi'"
+    )).scalar()
+    if "AUTOINCREMENT" in create_sql.upper():
+        return
+
+    has_archive = inspect(conn).has_table("absensi_archive")
+
+    # Index names are schema-wide: drop them with the old table's name
+    conn.execute(text("ALTER TABLE absensi RENAME TO absensi_old"))
+    for name in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'absensi_old' AND sql IS NOT NULL"
+    )).scalars().all():
+        conn.execute(text(f"DROP INDEX {name}"))
+
+    absensi.create(bind=conn)
+    columns = ", ".join(COLUMNS)
+    conn.execute(text(f"INSERT INTO absensi ({columns}) SELECT {columns} FROM absensi_old"))
+    conn.execute(text("DROP TABLE absensi_old"))
+
+    if not has_archive:
+        return
+
+    archived_max = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM absensi_archive")).scalar()
+    live_max = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM absensi")).scalar()
+
+    collided = conn.execute(text(
+        "SELECT COUNT(*) FROM absensi WHERE id IN (SELECT id FROM absensi_archive)"
+    )).scalar()
+    if collided:
+        conn.execute(text(
+            "UPDATE absensi SET id = id + :offset WHERE id IN (SELECT id FROM absensi_archive)"
+        ), {"offset": max(archived_max, live_max)})
+        print(f"⚠️ Renumbered {collided} attendance records whose id was already archived")
+
+    # Next id comes after every live and archived one
+    next_after = conn.execute(text(
+        "SELECT MAX(COALESCE((SELECT MAX(id) FROM absensi), 0), :archived_max)"
+    ), {"archived_max": archived_max}).scalar()
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'absensi'"))
+    conn.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) VALUES ('absensi', :seq)"
+    ), {"seq": next_after})
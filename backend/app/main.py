@@ -10,10 +10,10 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.db.session import engine
-from app.db.base import Base
+from app.db.migrations import run_migrations
 
 # Import routes
-from app.api.v1 import auth, face, absensi, admin, public, kelas
+from app.api.v1 import auth, face, absensi, admin, public, kelas, jobs
 from app.api.v1.endpoints import students, teachers, public_attendance, settings as settings_router
 
 
@@ -27,9 +27,10 @@ async def lifespan(app: FastAPI):
     print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print("="*60)
     
-    # Create database tables if they don't exist
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables ready")
+    # === DATABASE MIGRATIONS ===
+    # Create missing tables and apply pending schema migrations (indexes, columns)
+    run_migrations(engine)
+    print("✅ Database schema up to date")
     
     # Import dependencies
     from app.db.session import SessionLocal
@@ -91,9 +92,42 @@ async def lifespan(app: FastAPI):
     finally:
         db.close()
     
+    # === ATTENDANCE WRITE QUEUE ===
+    from app.services.attendance_queue import attendance_queue
+    if settings.ATTENDANCE_QUEUE_ENABLED:
+        attendance_queue.start()
+    
+    # === MODEL WARM-UP ===
+    # Load models and the face gallery in the background; see /health/ready
+    from app.services.model_warmup import model_warmup
+    if settings.MODEL_WARMUP_ENABLED:
+        model_warmup.start()
+    
+    # === RECOGNITION BATCHER ===
+    from app.services.recognition_batcher import recognition_batcher
+    if settings.RECOGNITION_BATCH_ENABLED:
+        recognition_batcher.start()
+    
+    # === AUDIT LOG WRITER ===
+    from app.services.audit_service import audit_log
+    if settings.AUDIT_LOG_ENABLED:
+        audit_log.start()
+    
+    # === BACKGROUND JOB WORKER ===
+    # Normally a separate process started by run.py; optionally in-process
+    from app.services.job_service import job_worker
+    if settings.JOB_WORKER_EMBEDDED:
+        job_worker.start_thread()
+    
     yield
     
     # Shutdown
+    attendance_queue.stop()
+    recognition_batcher.stop()
+    audit_log.stop()
+    if settings.JOB_WORKER_EMBEDDED:
+        job_worker.stop()
+    
     print("="*60)
     print(f"👋 Shutting down {settings.APP_NAME}")
     print("="*60)
@@ -143,10 +177,11 @@ async def root():
     }
 
 
-# Health check endpoint
+# Health check endpoints
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness probe - the process is up and serving requests."""
     return {
         "status": "healthy",
         "app": settings.APP_NAME,
@@ -154,6 +189,42 @@ async def health_check():
     }
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe - face recognition can answer without loading models.
+    
+    Returns 503 while the models or the face gallery are still loading
+    (a failed warm-up is retried in the background; a request that loads
+    them lazily also makes the API ready). With MODEL_WARMUP_ENABLED off,
+    models load on the first request and the API reports ready right away.
+    """
+    from app.services.model_warmup import model_warmup
+    from app.services.face_gallery import face_gallery
+    
+    warmup = model_warmup.stats()
+    gallery = face_gallery.stats().get(warmup["backend"])
+    
+    if settings.MODEL_WARMUP_ENABLED:
+        ready = model_warmup.ready and gallery is not None
+    else:
+        ready = True
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "backend": warmup["backend"],
+            "models_loaded": model_warmup.ready,
+            "warmup": warmup,
+            "gallery_loaded": gallery is not None,
+            "gallery_size": gallery["size"] if gallery else 0,
+            "gallery_users": gallery["users"] if gallery else 0,
+            "gallery_version": gallery["version"] if gallery else 0
+        }
+    )
+
+
 # Include routers
 app.include_router(
     auth.router,
@@ -186,6 +257,11 @@ app.include_router(
     prefix=settings.API_V1_PREFIX
 )
 
+app.include_router(
+    jobs.router,
+    prefix=settings.API_V1_PREFIX
+)
+
 app.include_router(
     students.router,
     prefix=f"{settings.API_V1_PREFIX}/students",
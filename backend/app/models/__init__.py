@@ -3,17 +3,25 @@
 from app.models.user import User
 from app.models.face_encoding import FaceEncoding
 from app.models.absensi import Absensi
+from app.models.absensi_archive import AbsensiArchive
+from app.models.absensi_sesi import AbsensiSesi
 from app.models.refresh_token import RefreshToken
 from app.models.audit_log import AuditLog
 from app.models.kelas import Kelas
 from app.models.settings import Settings
+from app.models.daily_summary import DailyAttendanceSummary
+from app.models.job import Job
 
 __all__ = [
     "User",
     "FaceEncoding",
     "Absensi",
+    "AbsensiArchive",
+    "AbsensiSesi",
     "RefreshToken",
     "AuditLog",
     "Kelas",
-    "Settings"
+    "Settings",
+    "DailyAttendanceSummary",
+    "Job"
 ]
@@ -2,7 +2,7 @@
 Absensi model for attendance records.
 """
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -12,10 +12,10 @@ class Absensi(Base):
     __tablename__ = "absensi"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
-    status = Column(String(20), default="hadir", index=True)  # hadir, terlambat, izin, sakit
+    status = Column(String(20), default="hadir")  # hadir, terlambat, izin, sakit
     confidence = Column(Float, nullable=True)  # Face recognition confidence
     image_path = Column(String(255), nullable=True)  # Snapshot at attendance
     device_info = Column(String(500), nullable=True)  # Browser/device info
@@ -24,9 +24,20 @@ class Absensi(Base):
     # Relationships
     user = relationship("User", back_populates="absensi_records")
     
-    # Unique constraint: one attendance per user per day
+    # Unique constraint: one attendance per user per day.
+    # It also backs per-user history pages (newest first, scanned
+    # backwards); (date, id) backs the keyset order of school-wide
+    # listings; (date, status) per-day status counts; (user_id, date,
+    # status) covers per-student rate aggregates without touching the table.
+    # Curated in db/migrations/v005_performance_indexes.py.
+    # AUTOINCREMENT: ids are never reused once archiving empties the table,
+    # archived rows keep their id (db/migrations/v007_absensi_autoincrement.py).
     __table_args__ = (
         UniqueConstraint('user_id', 'date', name='uix_user_date'),
+        Index('ix_absensi_date_id', 'date', 'id'),
+        Index('ix_absensi_date_status', 'date', 'status'),
+        Index('ix_absensi_user_date_status', 'user_id', 'date', 'status'),
+        {"sqlite_autoincrement": True},
     )
     
     def __repr__(self):
@@ -0,0 +1,39 @@
+"""
+AbsensiArchive model for attendance of closed academic years.
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class AbsensiArchive(Base):
+    """
+    Attendance records moved out of `absensi` once their academic year is
+    closed (see services/archive_service.py). Same columns and ids as
+    `absensi`, so both tables can be read as one through a UNION ALL.
+    Read-only: records are never edited after archiving.
+    """
+    __tablename__ = "absensi_archive"
+
+    id = Column(Integer, primary_key=True)  # Original absensi.id
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    timestamp = Column(DateTime(timezone=True))
+    status = Column(String(20))
+    confidence = Column(Float, nullable=True)
+    image_path = Column(String(255), nullable=True)
+    device_info = Column(String(500), nullable=True)
+    ip_address = Column(String(45), nullable=True)
+
+    academic_year = Column(String(20), nullable=False, index=True)  # Tahun ajaran: 2024/2025
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Same access paths as the live table: per-user history and date ranges
+    __table_args__ = (
+        Index('ix_absensi_archive_user_date', 'user_id', 'date'),
+        Index('ix_absensi_archive_date_id', 'date', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<AbsensiArchive(id={self.id}, user_id={self.user_id}, date={self.date}, academic_year={self.academic_year})>"
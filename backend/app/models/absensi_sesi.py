@@ -0,0 +1,47 @@
+"""
+AbsensiSesi model for attendance per class session (teacher roll calls).
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.session import Base
+
+
+class AbsensiSesi(Base):
+    """
+    One student's attendance in one class session (kelas, date, slot).
+
+    Teacher roll calls and bulk face scans write here; the student's daily
+    `absensi` record is derived from these marks (see
+    services/session_attendance_service.py), so kiosk check-ins and
+    dashboards keep reading one row per student per day.
+    """
+    __tablename__ = "absensi_sesi"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kelas_id = Column(Integer, ForeignKey("kelas.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    slot = Column(Integer, nullable=False, default=1)  # Jam pelajaran ke- (schedule slot of the day)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    status = Column(String(20), nullable=False, default="hadir")  # hadir, terlambat, izin, sakit, alpa
+    method = Column(String(20), nullable=False, default="manual")  # manual, face_recognition
+    confidence = Column(Float, nullable=True)
+    keterangan = Column(String(255), nullable=True)
+    marked_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    kelas = relationship("Kelas")
+    user = relationship("User", foreign_keys=[user_id])
+
+    # One mark per student per session. The unique index leads with
+    # (kelas_id, date), so a session roll call is one index range;
+    # (user_id, date) serves a student's marks of a day.
+    __table_args__ = (
+        UniqueConstraint('kelas_id', 'date', 'slot', 'user_id', name='uix_sesi_kelas_date_slot_user'),
+        Index('ix_absensi_sesi_user_date', 'user_id', 'date'),
+    )
+
+    def __repr__(self):
+        return f"<AbsensiSesi(id={self.id}, kelas_id={self.kelas_id}, user_id={self.user_id}, date={self.date}, slot={self.slot}, status={self.status})>"
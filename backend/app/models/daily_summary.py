@@ -0,0 +1,36 @@
+"""
+DailyAttendanceSummary model for pre-aggregated attendance counters.
+"""
+
+from sqlalchemy import Column, Integer, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class DailyAttendanceSummary(Base):
+    """
+    Attendance counters per (date, kelas_id).
+    Maintained in the same transaction as every attendance insert or status
+    change, so dashboards and kiosks never have to scan `absensi`.
+    Records count towards the student's current class (moved along when the
+    student changes class); students without a class are counted under
+    kelas_id 0.
+    """
+    __tablename__ = "daily_attendance_summary"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    date = Column(Date, nullable=False, index=True)
+    kelas_id = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    hadir = Column(Integer, nullable=False, default=0)
+    terlambat = Column(Integer, nullable=False, default=0)
+    izin = Column(Integer, nullable=False, default=0)
+    sakit = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('date', 'kelas_id', name='uix_summary_date_kelas_id'),
+    )
+    
+    def __repr__(self):
+        return f"<DailyAttendanceSummary(date={self.date}, kelas_id={self.kelas_id}, total={self.total})>"
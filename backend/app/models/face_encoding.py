@@ -2,7 +2,7 @@
 FaceEncoding model for storing face recognition data.
 """
 
-from sqlalchemy import Column, Integer, String, Float, LargeBinary, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, LargeBinary, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -12,8 +12,9 @@ class FaceEncoding(Base):
     __tablename__ = "face_encodings"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     encoding_data = Column(LargeBinary, nullable=False)  # Pickled numpy array
+    model_version = Column(String(50), nullable=False, default="dlib", server_default="dlib")  # Embedding backend that produced encoding_data
     image_path = Column(String(255), nullable=True)  # Path to original image
     confidence = Column(Float, nullable=True)  # Quality score of the encoding
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -21,5 +22,10 @@ class FaceEncoding(Base):
     # Relationships
     user = relationship("User", back_populates="face_encodings")
     
+    # A user's encodings of one embedding backend
+    __table_args__ = (
+        Index('ix_face_encodings_user_model', 'user_id', 'model_version'),
+    )
+    
     def __repr__(self):
         return f"<FaceEncoding(id={self.id}, user_id={self.user_id})>"
@@ -0,0 +1,43 @@
+"""
+Job model for background jobs run by the job worker.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Index
+from app.db.session import Base
+
+
+class Job(Base):
+    """
+    A unit of background work (CSV import, report export, ...).
+    Enqueued by request handlers and executed by the worker process
+    (`worker.py`), with retry and exponential backoff on failure.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    type = Column(String(50), nullable=False, index=True)  # student_import, report_export, ...
+    key = Column(String(255), nullable=True, index=True)  # Dedupe key for identical pending work
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    payload = Column(Text, nullable=True)  # JSON input
+    result = Column(Text, nullable=True)  # JSON output
+    progress = Column(Float, nullable=False, default=0.0)  # 0-100
+    message = Column(String(255), nullable=True)  # Human readable progress/result message
+    error = Column(Text, nullable=True)  # Last error
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.now)  # Not picked up before this
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # The worker polls pending jobs that are due
+    __table_args__ = (
+        Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, type={self.type}, status={self.status})>"
@@ -4,7 +4,7 @@ Kelas model untuk manajemen kelas sekolah.
 
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
-from app.db.base import Base
+from app.db.session import Base
 
 
 class Kelas(Base):
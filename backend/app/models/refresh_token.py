@@ -1,8 +1,9 @@
 """
 RefreshToken model for JWT refresh token management.
+Only a SHA-256 digest of the token is stored.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -12,12 +13,17 @@ class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    token = Column(String(500), unique=True, nullable=False, index=True)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_hash = Column(String(64), unique=True, nullable=False)  # sha256 hex of the token
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Purge scans by expiry
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     revoked = Column(Boolean, default=False)
     
+    # Revoke-all on logout / password change: (user_id, revoked)
+    __table_args__ = (
+        Index('ix_refresh_tokens_user_revoked', 'user_id', 'revoked'),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="refresh_tokens")
     
@@ -2,7 +2,7 @@
 User model representing system users (students and admins).
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -17,19 +17,29 @@ class User(Base):
     email = Column(String(100), unique=True, nullable=True)
     password_hash = Column(String(255), nullable=False)
     role = Column(String(20), default="user", index=True)  # 'user' or 'admin'
-    kelas = Column(String(50), nullable=True)
+    kelas = Column(String(50), nullable=True)  # Class code, kept for display (see services/kelas_service.py)
+    kelas_id = Column(Integer, ForeignKey("kelas.id", ondelete="SET NULL"), nullable=True)
     is_active = Column(Boolean, default=True, index=True)
     has_face = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
     
+    # Attendance streak, maintained on every attendance insert
+    current_streak = Column(Integer, nullable=False, default=0, server_default="0")  # Consecutive days ending at last_present_date
+    last_present_date = Column(Date, nullable=True)
+    
     # Relationships
     face_encodings = relationship("FaceEncoding", back_populates="user", cascade="all, delete-orphan")
     absensi_records = relationship("Absensi", back_populates="user", cascade="all, delete-orphan")
     refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="user")
     
+    # Class rosters (students of one class): every class filter and join
+    __table_args__ = (
+        Index('ix_users_kelas_id_role', 'kelas_id', 'role'),
+    )
+    
     @property
     def username(self) -> str:
         """Alias for nim/nip for API compatibility."""
@@ -21,7 +21,7 @@ class AbsensiSubmitRequest(BaseModel):
 
 class AbsensiResponse(BaseModel):
     """Schema for attendance response."""
-    id: int
+    id: Optional[int] = None  # None while the mark is still in the write queue
     user_id: int
     nim: str
     name: str
@@ -82,10 +82,11 @@ class AttendanceRecord(BaseModel):
 class AttendanceHistoryResponse(BaseModel):
     """Paginated attendance history response."""
     data: list[AttendanceRecord]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when the caller skipped the total
+    page: Optional[int] = None  # None for cursor-based pages
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page
     
     model_config = {
         "from_attributes": True
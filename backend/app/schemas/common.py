@@ -33,10 +33,11 @@ class PaginationParams(BaseModel):
 class PaginatedResponse(BaseModel, Generic[T]):
     """Paginated response wrapper."""
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when the caller skipped the total
+    page: Optional[int] = None  # None for cursor-based pages
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page
 
 
 class ChangePasswordRequest(BaseModel):
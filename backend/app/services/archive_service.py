@@ -0,0 +1,154 @@
+"""
+Attendance Archive Service
+Moves attendance of closed academic years out of the live `absensi` table.
+
+Academic years follow `Kelas.academic_year` labels ("2024/2025") and start
+on ACADEMIC_YEAR_START_MONTH. Once a year has been over for
+ATTENDANCE_ARCHIVE_GRACE_DAYS its rows are moved, batch by batch, into
+`absensi_archive` (same columns and ids), so the live table and its
+indexes only hold the running year.
+
+History and report queries read through `source(start_date)`: the live
+table when the requested range starts after the archived period, a UNION
+ALL of both tables otherwise. Daily summary counters are not touched by
+archiving, so dashboards and totals stay complete.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.absensi import Absensi
+from app.models.absensi_archive import AbsensiArchive
+
+
+# Columns shared by `absensi` and `absensi_archive`
+ARCHIVE_COLUMNS = (
+    "id", "user_id", "date", "timestamp", "status", "confidence",
+    "image_path", "device_info", "ip_address"
+)
+
+
+def academic_year_of(day: date) -> str:
+    """Academic year label ("2024/2025") a date belongs to."""
+    start_year = day.year if day.month >= settings.ACADEMIC_YEAR_START_MONTH else day.year - 1
+    return f"{start_year}/{start_year + 1}"
+
+
+def academic_year_range(label: str) -> Tuple[date, date]:
+    """
+    First and last day of an academic year.
+
+    Args:
+        label: Academic year label, e.g. "2024/2025"
+
+    Returns:
+        Tuple of (start_date, end_date), both inclusive
+    """
+    start_year = int(label.split("/")[0])
+    start = date(start_year, settings.ACADEMIC_YEAR_START_MONTH, 1)
+    end = date(start_year + 1, settings.ACADEMIC_YEAR_START_MONTH, 1) - timedelta(days=1)
+    return start, end
+
+
+class AttendanceArchiveService:
+    """Service for archiving attendance and reading across live and archive."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    def archived_until(self) -> Optional[date]:
+        """Latest archived attendance date (index lookup), None if nothing is archived."""
+        return self.db.query(func.max(AbsensiArchive.date)).scalar()
+
+    def source(self, start_date: Optional[date] = None):
+        """
+        Attendance entity to query for a range starting at `start_date`.
+
+        Returns `Absensi` when the range does not reach the archived period,
+        otherwise an alias of `Absensi` over live UNION ALL archive. Either
+        way rows load as `Absensi` instances and the columns are addressed
+        the same way (`source.date`, `source.user_id`, ...). Ids are unique
+        across both tables: `absensi` never reuses an id (AUTOINCREMENT).
+
+        Args:
+            start_date: Start of the requested range (None = all time)
+        """
+        archived_until = self.archived_until()
+        if archived_until is None or (start_date is not None and start_date > archived_until):
+            return Absensi
+
+        live = select(*[Absensi.__table__.c[column] for column in ARCHIVE_COLUMNS])
+        archived = select(*[AbsensiArchive.__table__.c[column] for column in ARCHIVE_COLUMNS])
+        return aliased(Absensi, union_all(live, archived).subquery("absensi_all"))
+
+    def closed_years(self) -> List[str]:
+        """Academic years that still have rows in the live table and are due for archiving."""
+        oldest = self.db.query(func.min(Absensi.date)).scalar()
+        if oldest is None:
+            return []
+
+        cutoff = date.today() - timedelta(days=settings.ATTENDANCE_ARCHIVE_GRACE_DAYS)
+        years = []
+        label = academic_year_of(oldest)
+        while academic_year_range(label)[1] < cutoff:
+            years.append(label)
+            next_start = academic_year_range(label)[1] + timedelta(days=1)
+            label = academic_year_of(next_start)
+        return years
+
+    def archive_year(self, label: str, batch_size: int = 2000) -> int:
+        """
+        Move one academic year from `absensi` to `absensi_archive`.
+
+        Every batch is copied and deleted in one transaction (by id, in
+        date order), so an interrupted run resumes where it stopped.
+
+        Args:
+            label: Academic year label, e.g. "2024/2025"
+            batch_size: Rows moved per transaction
+
+        Returns:
+            Number of rows moved
+        """
+        start, end = academic_year_range(label)
+        moved = 0
+
+        while True:
+            ids = [
+                row.id for row in self.db.query(Absensi.id).filter(
+                    Absensi.date >= start,
+                    Absensi.date <= end
+                ).order_by(Absensi.date, Absensi.id).limit(batch_size).all()
+            ]
+            if not ids:
+                break
+
+            columns = [Absensi.__table__.c[column] for column in ARCHIVE_COLUMNS]
+            self.db.execute(
+                insert(AbsensiArchive).from_select(
+                    list(ARCHIVE_COLUMNS) + ["academic_year"],
+                    select(*columns, literal(label)).where(Absensi.id.in_(ids))
+                )
+            )
+            self.db.query(Absensi).filter(Absensi.id.in_(ids)).delete(synchronize_session=False)
+            self.db.commit()
+            moved += len(ids)
+
+            if len(ids) < batch_size:
+                break
+
+        return moved
+
+    def archive_closed_years(self, batch_size: int = 2000) -> Dict[str, int]:
+        """
+        Archive every closed academic year still in the live table.
+
+        Returns:
+            Dict of {academic_year: rows moved}
+        """
+        return {label: self.archive_year(label, batch_size) for label in self.closed_years()}
@@ -0,0 +1,476 @@
+"""
+Attendance Write Queue
+Group-commit write-behind queue for attendance inserts at peak hours.
+
+Each mark is acknowledged as soon as it is appended (and fsynced) to a
+local journal file. A background thread then flushes pending marks to the
+database in batches, one transaction per batch, every N milliseconds or
+every M records. Duplicate detection is answered from an in-memory
+"today-set", so kiosk responses never wait on a DB commit.
+
+The journal is replayed on startup; replay is idempotent because rows that
+already exist in `absensi` are skipped during flush.
+
+If a batch fails with a non-transient error its marks are written one by
+one, so one bad mark cannot block the queue; a mark that still fails after
+MAX_ATTEMPTS flushes is moved to the dead-letter list (and the `.dead`
+file next to the journal) for an admin to look at.
+
+Note: the today-set lives in process memory, so the queue assumes a single
+API process (the default `run.py` setup).
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.absensi import Absensi
+
+
+# Flushes a mark may fail (non-transiently) before it is dead-lettered
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class QueuedAttendance:
+    """
+    Attendance mark held by the write queue.
+
+    Exposes the same attributes as `Absensi` that the API layer reads, so it
+    can be returned from `AttendanceService.submit_attendance` unchanged.
+    `id` stays None until the mark has been flushed to the database.
+    """
+    user_id: int
+    date: date
+    timestamp: datetime
+    status: str
+    confidence: Optional[float] = None
+    image_path: Optional[str] = None
+    device_info: Optional[str] = None
+    id: Optional[int] = None
+    attempts: int = 0  # Failed flushes (not journaled)
+
+    def to_journal(self) -> str:
+        """Serialize to a single journal line."""
+        data = asdict(self)
+        data["date"] = self.date.isoformat()
+        data["timestamp"] = self.timestamp.isoformat()
+        data.pop("id")
+        data.pop("attempts")
+        return json.dumps(data)
+
+    @classmethod
+    def from_journal(cls, line: str) -> "QueuedAttendance":
+        """Parse a journal line written by `to_journal`."""
+        data = json.loads(line)
+        data["date"] = date.fromisoformat(data["date"])
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        return cls(**data)
+
+    @classmethod
+    def from_model(cls, absensi: Absensi) -> "QueuedAttendance":
+        """Build a today-set entry from an existing database row."""
+        return cls(
+            user_id=absensi.user_id,
+            date=absensi.date,
+            timestamp=absensi.timestamp,
+            status=absensi.status,
+            confidence=absensi.confidence,
+            image_path=absensi.image_path,
+            device_info=absensi.device_info,
+            id=absensi.id
+        )
+
+
+class AttendanceWriteQueue:
+    """Journal-backed write-behind queue for attendance inserts."""
+
+    def __init__(self, journal_path: str, flush_interval_ms: int, batch_size: int):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = max(1, batch_size)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending: List[QueuedAttendance] = []
+        self.dead_letter: List[QueuedAttendance] = []
+        self._today: Dict[int, QueuedAttendance] = {}
+        self._today_date: Optional[date] = None
+        self._journal = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def enabled(self) -> bool:
+        """True while the queue is started and accepting marks."""
+        return self._running
+
+    @property
+    def pending_count(self) -> int:
+        """Number of acknowledged marks not yet flushed to the database."""
+        return len(self._pending)
+
+    def stats(self) -> Dict:
+        """Queue counters."""
+        return {
+            "enabled": self._running,
+            "pending": len(self._pending),
+            "today": len(self._today),
+            "dead_letter": len(self.dead_letter)
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Load today's marks, replay the journal and start the flusher thread."""
+        if self._running:
+            return
+
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._load_today()
+        replayed = self._replay_journal()
+
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="attendance-write-queue", daemon=True
+        )
+        self._thread.start()
+
+        print(f"✅ Attendance write queue started ({len(self._today)} marks today, {replayed} replayed from journal)")
+        if replayed:
+            self._wakeup.set()
+
+    def stop(self) -> None:
+        """Stop the flusher thread and drain every pending mark."""
+        if not self._running:
+            return
+
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+        # Drain whatever is left; give up after a few failed attempts so
+        # shutdown never hangs (the journal still holds the marks).
+        for _ in range(5):
+            if not self._pending:
+                break
+            self.flush()
+
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+        print(f"👋 Attendance write queue stopped ({len(self._pending)} marks left in journal)")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_today(self, user_id: int) -> Optional[QueuedAttendance]:
+        """Return today's mark for a user from the in-memory today-set."""
+        with self._lock:
+            self._roll_day()
+            return self._today.get(user_id)
+
+    def enqueue(
+        self,
+        user_id: int,
+        status: str,
+        confidence: Optional[float] = None,
+        image_path: Optional[str] = None,
+        device_info: Optional[str] = None
+    ) -> Tuple[QueuedAttendance, bool]:
+        """
+        Durably append a mark to the journal and schedule it for flushing.
+
+        Returns:
+            Tuple of (attendance, is_duplicate)
+        """
+        with self._lock:
+            self._roll_day()
+
+            existing = self._today.get(user_id)
+            if existing:
+                return existing, True
+
+            entry = QueuedAttendance(
+                user_id=user_id,
+                date=self._today_date,
+                timestamp=datetime.now(),
+                status=status,
+                confidence=confidence,
+                image_path=image_path,
+                device_info=device_info
+            )
+
+            self._journal.write(entry.to_journal() + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+            self._pending.append(entry)
+            self._today[user_id] = entry
+
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+        return entry, False
+
+    def record_existing(self, records: Iterable[Absensi]) -> None:
+        """
+        Add committed attendance rows written outside the queue (e.g. daily
+        records derived from class sessions) to the today-set, so a later
+        check-in is answered as a duplicate instead of being dropped by flush.
+
+        Args:
+            records: Committed `absensi` rows
+        """
+        with self._lock:
+            self._roll_day()
+            for record in records:
+                if record.date != self._today_date:
+                    continue
+                existing = self._today.get(record.user_id)
+                if existing is None or existing.id == record.id:
+                    self._today[record.user_id] = QueuedAttendance.from_model(record)
+
+    def discard_user(self, user_id: int) -> int:
+        """
+        Drop a user's pending marks and today-set entry (e.g. the student was
+        deleted), so they are not flushed afterwards as orphan rows. Waits
+        for a flush in progress.
+
+        Returns:
+            Number of pending marks dropped
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._today.pop(user_id, None)
+                kept = [e for e in self._pending if e.user_id != user_id]
+                dropped = len(self._pending) - len(kept)
+                if dropped:
+                    self._pending = kept
+                    self._rewrite_journal()
+        return dropped
+
+    def flush(self) -> int:
+        """
+        Write one batch of pending marks to the database in a single transaction.
+
+        Transient errors (database locked) leave the batch queued for the
+        next flush. Any other error falls back to one transaction per mark;
+        marks that keep failing are dead-lettered.
+
+        Returns:
+            Number of marks taken off the queue
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[:self.batch_size]
+            if not batch:
+                return 0
+
+            dead = []
+            try:
+                self._write(batch)
+                written = batch
+            except OperationalError as e:
+                print(f"⚠️ [AttendanceQueue] Flush of {len(batch)} marks failed, will retry: {e}")
+                return 0
+            except Exception as e:
+                print(f"⚠️ [AttendanceQueue] Flush of {len(batch)} marks failed, writing them one by one: {e}")
+                written, dead = self._write_each(batch)
+
+            taken = {id(entry) for entry in written + dead}
+            with self._lock:
+                self._pending = [e for e in self._pending if id(e) not in taken]
+                if dead:
+                    self._dead_letter(dead)
+                elif not self._pending and self._journal:
+                    self._journal.seek(0)
+                    self._journal.truncate()
+                    self._journal.flush()
+                    os.fsync(self._journal.fileno())
+
+            return len(taken)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        """Flusher loop: wake up every interval or when a batch is full."""
+        while self._running:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while self._pending and self.flush():
+                if len(self._pending) < self.batch_size:
+                    break
+
+    def _write(self, batch: List[QueuedAttendance]) -> None:
+        """Insert marks in one transaction, skipping those already in `absensi`."""
+        from app.services.attendance_service import AttendanceService
+
+        db = SessionLocal()
+        try:
+            existing = dict(
+                ((user_id, day), absensi_id)
+                for absensi_id, user_id, day in db.query(
+                    Absensi.id, Absensi.user_id, Absensi.date
+                ).filter(
+                    tuple_(Absensi.user_id, Absensi.date).in_(
+                        [(e.user_id, e.date) for e in batch]
+                    )
+                ).all()
+            )
+
+            rows = []
+            for entry in batch:
+                key = (entry.user_id, entry.date)
+                if key in existing:
+                    entry.id = existing[key]
+                    continue
+                row = Absensi(
+                    user_id=entry.user_id,
+                    date=entry.date,
+                    timestamp=entry.timestamp,
+                    status=entry.status,
+                    confidence=entry.confidence,
+                    image_path=entry.image_path,
+                    device_info=entry.device_info
+                )
+                rows.append((entry, row))
+                existing[key] = None
+
+            db.add_all([row for _, row in rows])
+            AttendanceService.apply_inserts(db, [row for _, row in rows])
+            db.flush()
+            ids = [(entry, row.id) for entry, row in rows]
+            db.commit()
+            for entry, row_id in ids:
+                entry.id = row_id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write_each(self, batch: List[QueuedAttendance]) -> Tuple[List[QueuedAttendance], List[QueuedAttendance]]:
+        """
+        Insert marks one transaction each.
+
+        Returns:
+            Tuple of (written, dead): marks that failed MAX_ATTEMPTS times are
+            dead; the others that failed stay queued
+        """
+        written, dead = [], []
+        for entry in batch:
+            try:
+                self._write([entry])
+                written.append(entry)
+            except OperationalError:
+                continue  # Transient; retried with the next flush
+            except Exception as e:
+                entry.attempts += 1
+                print(f"⚠️ [AttendanceQueue] Mark of user {entry.user_id} failed ({entry.attempts}/{MAX_ATTEMPTS}): {e}")
+                if entry.attempts >= MAX_ATTEMPTS:
+                    dead.append(entry)
+        return written, dead
+
+    def _dead_letter(self, entries: List[QueuedAttendance]) -> None:
+        """
+        Move marks that cannot be written to the dead-letter list and file,
+        and take them out of the journal. Caller holds the lock.
+        """
+        with open(f"{self.journal_path}.dead", "a", encoding="utf-8") as dead_file:
+            for entry in entries:
+                dead_file.write(entry.to_journal() + "\n")
+                # The student was told the mark succeeded; let them check in again
+                if self._today.get(entry.user_id) is entry:
+                    del self._today[entry.user_id]
+        self.dead_letter.extend(entries)
+        self._rewrite_journal()
+        print(f"❌ [AttendanceQueue] {len(entries)} marks moved to {self.journal_path}.dead")
+
+    def _rewrite_journal(self) -> None:
+        """Rewrite the journal with the pending marks only. Caller holds the lock."""
+        if not self._journal:
+            return
+        self._journal.seek(0)
+        self._journal.truncate()
+        for entry in self._pending:
+            self._journal.write(entry.to_journal() + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _roll_day(self) -> None:
+        """Reset the today-set when the date changes. Caller holds the lock."""
+        today = date.today()
+        if self._today_date != today:
+            self._today_date = today
+            self._today = {
+                e.user_id: e for e in self._pending if e.date == today
+            }
+
+    def _load_today(self) -> None:
+        """Seed the today-set from attendance rows already in the database."""
+        db = SessionLocal()
+        try:
+            today = date.today()
+            rows = db.query(Absensi).filter(Absensi.date == today).all()
+            with self._lock:
+                self._today_date = today
+                self._today = {row.user_id: QueuedAttendance.from_model(row) for row in rows}
+        finally:
+            db.close()
+
+    def _replay_journal(self) -> int:
+        """Re-queue marks left in the journal by a previous run."""
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        replayed = 0
+        with open(self.journal_path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = QueuedAttendance.from_journal(line)
+                except (ValueError, TypeError, KeyError) as e:
+                    # A torn final line from a crash mid-write; skip it
+                    print(f"⚠️ [AttendanceQueue] Skipping unreadable journal line: {e}")
+                    continue
+
+                with self._lock:
+                    if entry.date == self._today_date:
+                        if entry.user_id in self._today:
+                            continue
+                        self._today[entry.user_id] = entry
+                    self._pending.append(entry)
+                replayed += 1
+
+        return replayed
+
+
+# Global queue instance (started from the application lifespan when enabled)
+attendance_queue = AttendanceWriteQueue(
+    journal_path=settings.ATTENDANCE_QUEUE_JOURNAL_PATH,
+    flush_interval_ms=settings.ATTENDANCE_QUEUE_FLUSH_INTERVAL_MS,
+    batch_size=settings.ATTENDANCE_QUEUE_BATCH_SIZE
+)
@@ -4,15 +4,25 @@ Handles attendance submission, history, and statistics.
 """
 
 from datetime import datetime, date, time, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, Iterable, Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from sqlalchemy import func, and_, desc, case
 
 from app.models.absensi import Absensi
 from app.models.user import User
 from app.core.config import settings
 from app.core.exceptions import BadRequestException, DuplicateException
+from app.services.archive_service import AttendanceArchiveService
+from app.services.attendance_queue import attendance_queue
+from app.services.audit_service import audit_log
+from app.services.daily_summary_service import DailySummaryService
+from app.services.kelas_service import kelas_id_for_code
 from app.utils.helpers import get_current_time_status
+from app.utils.pagination import paginate_attendance
+
+
+# Column order of attendance report rows (JSON keys and CSV header)
+REPORT_COLUMNS = ("date", "nim", "name", "kelas", "timestamp", "status", "confidence")
 
 
 class AttendanceService:
@@ -26,19 +36,43 @@ class AttendanceService:
         self,
         user_id: int,
         confidence: float,
-        image_path: str
+        image_path: Optional[str],
+        status: Optional[str] = None,
+        device_info: Optional[str] = None
     ) -> Absensi:
         """
         Submit attendance record.
         
+        When the attendance write queue is enabled, the mark is acknowledged
+        once it is in the queue journal and duplicates are answered from the
+        in-memory today-set; the returned record is then a `QueuedAttendance`.
+        
         Args:
             user_id: User ID
             confidence: Face recognition confidence
             image_path: Path to attendance image
+            status: Fixed status (optional, determined by time when omitted)
+            device_info: Device/kiosk description (optional)
             
         Returns:
             Created attendance record
         """
+        if attendance_queue.enabled:
+            queued = attendance_queue.get_today(user_id)
+            if queued:
+                return queued, True
+            
+            attendance, is_duplicate = attendance_queue.enqueue(
+                user_id=user_id,
+                status=status or get_current_time_status(self.db),
+                confidence=confidence,
+                image_path=image_path,
+                device_info=device_info
+            )
+            if not is_duplicate:
+                self._audit_submit(attendance)
+            return attendance, is_duplicate
+        
         today = date.today()
         
         # Check if already submitted today
@@ -55,7 +89,8 @@ class AttendanceService:
             return existing, True  # (attendance, is_duplicate)
         
         # Determine status based on time and database settings
-        status = get_current_time_status(self.db)
+        if status is None:
+            status = get_current_time_status(self.db)
         
         # Create attendance record
         attendance = Absensi(
@@ -64,45 +99,91 @@ class AttendanceService:
             timestamp=datetime.now(),
             status=status,
             confidence=confidence,
-            image_path=image_path
+            image_path=image_path,
+            device_info=device_info
         )
         
         self.db.add(attendance)
+        self.apply_inserts(self.db, [attendance])
         self.db.commit()
         self.db.refresh(attendance)
         
+        self._audit_submit(attendance)
+        
         return attendance, False  # (attendance, is_duplicate)
     
+    @staticmethod
+    def _audit_submit(attendance) -> None:
+        """Queue the audit entry of a new attendance mark (no DB write here)."""
+        audit_log.log(
+            "submit_attendance",
+            user_id=attendance.user_id,
+            entity_type="absensi",
+            entity_id=attendance.id,
+            details={"status": attendance.status, "confidence": attendance.confidence}
+        )
+    
     def get_user_attendance_history(
         self,
         user_id: int,
         skip: int = 0,
         limit: int = 50,
         start_date: Optional[date] = None,
-        end_date: Optional[date] = None
-    ) -> List[Absensi]:
+        end_date: Optional[date] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Absensi], Optional[str]]:
         """
-        Get user's attendance history.
+        Get one page of user's attendance history, newest first
+        (including archived years when the range reaches them).
         
         Args:
             user_id: User ID
-            skip: Number of records to skip
+            skip: Number of records to skip (ignored when a cursor is given)
             limit: Maximum number of records to return
             start_date: Start date filter (optional)
             end_date: End date filter (optional)
+            cursor: Keyset cursor from the previous page (optional)
             
         Returns:
-            List of attendance records
+            Tuple of (attendance records, next_cursor)
         """
-        query = self.db.query(Absensi).filter(Absensi.user_id == user_id)
+        source = AttendanceArchiveService(self.db).source(start_date)
+        query = self.db.query(source).filter(source.user_id == user_id)
         
         if start_date:
-            query = query.filter(Absensi.date >= start_date)
+            query = query.filter(source.date >= start_date)
+        
+        if end_date:
+            query = query.filter(source.date <= end_date)
+        
+        return paginate_attendance(query, limit, cursor=cursor, skip=skip, entity=source)
+    
+    def count_user_attendance(
+        self,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        Count user's attendance records (an index-only count on (user_id, date)).
+        
+        Args:
+            user_id: User ID
+            start_date: Start date filter (optional)
+            end_date: End date filter (optional)
+            
+        Returns:
+            Number of records
+        """
+        source = AttendanceArchiveService(self.db).source(start_date)
+        query = self.db.query(func.count(source.id)).filter(source.user_id == user_id)
         
+        if start_date:
+            query = query.filter(source.date >= start_date)
         if end_date:
-            query = query.filter(Absensi.date <= end_date)
+            query = query.filter(source.date <= end_date)
         
-        return query.order_by(desc(Absensi.date)).offset(skip).limit(limit).all()
+        return query.scalar()
     
     def get_today_attendance(self, user_id: int) -> Optional[Absensi]:
         """
@@ -114,6 +195,11 @@ class AttendanceService:
         Returns:
             Today's attendance record or None
         """
+        if attendance_queue.enabled:
+            queued = attendance_queue.get_today(user_id)
+            if queued:
+                return queued
+        
         today = date.today()
         
         return self.db.query(Absensi).filter(
@@ -140,27 +226,17 @@ class AttendanceService:
         Returns:
             Dictionary with statistics
         """
-        query = self.db.query(Absensi).filter(Absensi.user_id == user_id)
+        counts, current_streak = self._aggregate_user(user_id, start_date, end_date)
         
-        if start_date:
-            query = query.filter(Absensi.date >= start_date)
-        
-        if end_date:
-            query = query.filter(Absensi.date <= end_date)
-        
-        # Count by status
-        total = query.count()
-        hadir = query.filter(Absensi.status == "hadir").count()
-        terlambat = query.filter(Absensi.status == "terlambat").count()
-        tidak_hadir = query.filter(Absensi.status == "tidak_hadir").count()
+        total = sum(counts.values())
+        hadir = counts.get("hadir", 0)
+        terlambat = counts.get("terlambat", 0)
+        tidak_hadir = counts.get("tidak_hadir", 0)
         
         # Calculate attendance rate based on (hadir + terlambat) / total
         total_days = self._get_total_days(start_date, end_date)
         attendance_rate = ((hadir + terlambat) / total_days * 100) if total_days > 0 else 0.0
         
-        # Get streak
-        current_streak = self._calculate_streak(user_id)
-        
         return {
             "total_attendance": total,
             "total_hadir": hadir,
@@ -170,6 +246,99 @@ class AttendanceService:
             "current_streak": current_streak
         }
     
+    def get_statistics_subquery(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        user_ids=None
+    ):
+        """
+        Per-user attendance counts as a grouped subquery, for joining into
+        user listings instead of calling get_user_statistics per row.
+        Archived years are included when the range reaches them, like
+        get_user_statistics.
+        
+        Args:
+            start_date: Start date filter (optional)
+            end_date: End date filter (optional)
+            user_ids: Restrict to these users, a list or a SELECT of ids
+                (optional; a listing page passes its own users)
+            
+        Returns:
+            Subquery with columns user_id, total_attendance, total_present
+        """
+        source = AttendanceArchiveService(self.db).source(start_date)
+        query = self.db.query(
+            source.user_id.label("user_id"),
+            func.count(source.id).label("total_attendance"),
+            func.sum(
+                case((source.status.in_(("hadir", "terlambat")), 1), else_=0)
+            ).label("total_present")
+        )
+        
+        if start_date:
+            query = query.filter(source.date >= start_date)
+        if end_date:
+            query = query.filter(source.date <= end_date)
+        if user_ids is not None:
+            query = query.filter(source.user_id.in_(user_ids))
+        
+        return query.group_by(source.user_id).subquery()
+    
+    def build_statistics(
+        self,
+        user: User,
+        total_attendance: Optional[int],
+        total_present: Optional[int],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict:
+        """
+        Build the listing statistics from joined subquery columns.
+        
+        Args:
+            user: User row (provides the maintained streak)
+            total_attendance: Joined total_attendance (None without records)
+            total_present: Joined total_present (None without records)
+            start_date: Start date used for the subquery (optional)
+            end_date: End date used for the subquery (optional)
+            
+        Returns:
+            Dictionary with total_attendance, attendance_rate and current_streak
+        """
+        total_days = self._get_total_days(start_date, end_date)
+        attendance_rate = ((total_present or 0) / total_days * 100) if total_days > 0 else 0.0
+        
+        current_streak = 0
+        if user.last_present_date == date.today():
+            current_streak = user.current_streak or 0
+        
+        return {
+            "total_attendance": total_attendance or 0,
+            "attendance_rate": round(attendance_rate, 2),
+            "current_streak": current_streak
+        }
+    
+    def get_status_counts(
+        self,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        Get user's attendance counts per status in one grouped query.
+        
+        Args:
+            user_id: User ID
+            start_date: Start date filter (optional)
+            end_date: End date filter (optional)
+            
+        Returns:
+            Dictionary of {status: count}
+        """
+        counts, _ = self._aggregate_user(user_id, start_date, end_date)
+        return counts
+    
     def get_all_today_attendance(
         self,
         kelas: Optional[str] = None
@@ -188,7 +357,7 @@ class AttendanceService:
         query = self.db.query(Absensi, User).join(User).filter(Absensi.date == today)
         
         if kelas:
-            query = query.filter(User.kelas == kelas)
+            query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
         
         results = query.order_by(Absensi.timestamp).all()
         
@@ -222,19 +391,17 @@ class AttendanceService:
             Statistics dictionary
         """
         # Get total students
-        user_query = self.db.query(User).filter(User.role == "user")
+        user_query = self.db.query(func.count(User.id)).filter(User.role == "user")
         if kelas:
-            user_query = user_query.filter(User.kelas == kelas)
-        total_students = user_query.count()
+            user_query = user_query.filter(User.kelas_id == kelas_id_for_code(kelas))
+        total_students = user_query.scalar()
         
-        # Get attendance count
-        attendance_query = self.db.query(Absensi).join(User).filter(Absensi.date == target_date)
-        if kelas:
-            attendance_query = attendance_query.filter(User.kelas == kelas)
+        # Get attendance counts from the pre-aggregated daily summary
+        counts = DailySummaryService(self.db).get_date_counts(target_date, kelas)
         
-        total_present = attendance_query.count()
-        total_hadir = attendance_query.filter(Absensi.status == "hadir").count()
-        total_terlambat = attendance_query.filter(Absensi.status == "terlambat").count()
+        total_present = counts["total"]
+        total_hadir = counts["hadir"]
+        total_terlambat = counts["terlambat"]
         total_absent = total_students - total_present
         
         attendance_percentage = (total_present / total_students * 100) if total_students > 0 else 0.0
@@ -266,29 +433,173 @@ class AttendanceService:
         Returns:
             List of attendance records
         """
-        query = self.db.query(Absensi, User).join(User).filter(
+        results = self.report_query(self.db, start_date, end_date, kelas).all()
+        
+        return [dict(zip(REPORT_COLUMNS, row)) for row in self.format_report_rows(results)]
+    
+    @staticmethod
+    def report_query(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        kelas: Optional[str] = None
+    ):
+        """
+        Column query behind the attendance report, ordered by (date, nim).
+        Selects plain columns so it can be streamed with yield_per; archived
+        years are included when the range reaches them.
+        
+        Args:
+            db: Database session
+            start_date: Start date
+            end_date: End date
+            kelas: Filter by class (optional)
+            
+        Returns:
+            Query of (date, nim, name, kelas, timestamp, status, confidence)
+        """
+        source = AttendanceArchiveService(db).source(start_date)
+        query = db.query(
+            source.date,
+            User.nim,
+            User.name,
+            User.kelas,
+            source.timestamp,
+            source.status,
+            source.confidence
+        ).join(User, source.user_id == User.id).filter(
             and_(
-                Absensi.date >= start_date,
-                Absensi.date <= end_date
+                source.date >= start_date,
+                source.date <= end_date
             )
         )
         
         if kelas:
-            query = query.filter(User.kelas == kelas)
+            query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
+        
+        return query.order_by(source.date, User.nim)
+    
+    @staticmethod
+    def format_report_rows(rows: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Format `report_query` rows in REPORT_COLUMNS order (lazily)."""
+        for day, nim, name, kelas, timestamp, status, confidence in rows:
+            yield (
+                day.isoformat(),
+                nim,
+                name,
+                kelas,
+                timestamp.strftime("%H:%M:%S") if timestamp else "",
+                status,
+                confidence
+            )
+    
+    def get_student_breakdown(
+        self,
+        start_date: date,
+        end_date: date,
+        kelas: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Count attendance per student for date range (one grouped query).
         
-        results = query.order_by(Absensi.date, User.nim).all()
+        Args:
+            start_date: Start date
+            end_date: End date
+            kelas: Filter by class (optional)
+            
+        Returns:
+            List of {name, nim, total_attendance} ordered by total_attendance desc
+        """
+        source = AttendanceArchiveService(self.db).source(start_date)
+        total_attendance = func.count(source.id)
+        query = self.db.query(User.nim, User.name, total_attendance).join(
+            source, source.user_id == User.id
+        ).filter(
+            and_(
+                source.date >= start_date,
+                source.date <= end_date
+            )
+        )
+        
+        if kelas:
+            query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
+        
+        rows = query.group_by(User.id, User.nim, User.name).order_by(
+            total_attendance.desc(), User.nim
+        ).all()
         
         return [
             {
-                "date": absensi.date.isoformat(),
-                "nim": user.nim,
-                "name": user.name,
-                "kelas": user.kelas,
-                "timestamp": absensi.timestamp.strftime("%H:%M:%S"),
-                "status": absensi.status,
-                "confidence": absensi.confidence
+                "name": name or "Unknown",
+                "nim": nim,
+                "total_attendance": count
             }
-            for absensi, user in results
+            for nim, name, count in rows
+        ]
+    
+    def get_ranked_students(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kelas: Optional[str] = None,
+        limit: int = 10,
+        lowest_first: bool = False,
+        below_rate: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Top-k students by attendance rate (share of "hadir" records), computed
+        in SQL with ORDER BY rate LIMIT k.
+        
+        The class filter picks the roster from (kelas_id, role) and each
+        student's records are aggregated from (user_id, date, status), so
+        the cost follows the class size and k, not the whole school.
+        
+        Args:
+            start_date: Start date filter (optional)
+            end_date: End date filter (optional)
+            kelas: Filter by class code (optional)
+            limit: Number of students to return
+            lowest_first: Rank from the lowest rate up
+            below_rate: Only students with a rate below this % (optional)
+            
+        Returns:
+            List of {rank, name, nis, attendance} (attendance in %)
+        """
+        source = AttendanceArchiveService(self.db).source(start_date)
+        
+        join_condition = [source.user_id == User.id]
+        if start_date:
+            join_condition.append(source.date >= start_date)
+        if end_date:
+            join_condition.append(source.date <= end_date)
+        
+        total = func.count(source.id)
+        hadir = func.sum(case((source.status == "hadir", 1), else_=0))
+        rate = (hadir * 100.0 / total).label("rate")
+        
+        query = self.db.query(User.name, User.nim, rate).join(
+            source, and_(*join_condition)
+        ).filter(User.role == "user")
+        
+        if kelas:
+            query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
+        
+        query = query.group_by(User.id, User.name, User.nim)
+        if below_rate is not None:
+            query = query.having(rate < below_rate)
+        
+        rows = query.order_by(
+            rate.asc() if lowest_first else rate.desc(), User.nim
+        ).limit(limit).all()
+        
+        return [
+            {
+                "rank": rank,
+                "name": name,
+                "nis": nim,
+                "attendance": round(rate or 0, 1)
+            }
+            for rank, (name, nim, rate) in enumerate(rows, 1)
         ]
     
     def _get_total_days(self, start_date: Optional[date], end_date: Optional[date]) -> int:
@@ -300,28 +611,136 @@ class AttendanceService:
         
         return (end_date - start_date).days + 1
     
-    def _calculate_streak(self, user_id: int) -> int:
-        """Calculate current attendance streak."""
-        today = date.today()
-        streak = 0
-        current_date = today
-        
-        # Check backwards from today
-        for _ in range(30):  # Max 30 days check
-            attendance = self.db.query(Absensi).filter(
-                and_(
-                    Absensi.user_id == user_id,
-                    Absensi.date == current_date
-                )
-            ).first()
+    def _aggregate_user(
+        self,
+        user_id: int,
+        start_date: Optional[date],
+        end_date: Optional[date]
+    ) -> Tuple[Dict[str, int], int]:
+        """
+        Count attendance by status and read the maintained streak in one round-trip.
+        
+        Returns:
+            Tuple of ({status: count}, current_streak)
+        """
+        source = AttendanceArchiveService(self.db).source(start_date)
+        join_condition = [source.user_id == User.id]
+        if start_date:
+            join_condition.append(source.date >= start_date)
+        if end_date:
+            join_condition.append(source.date <= end_date)
+        
+        rows = self.db.query(
+            User.current_streak,
+            User.last_present_date,
+            source.status,
+            func.count(source.id)
+        ).outerjoin(
+            source, and_(*join_condition)
+        ).filter(
+            User.id == user_id
+        ).group_by(
+            User.current_streak, User.last_present_date, source.status
+        ).all()
+        
+        counts = {status: count for _, _, status, count in rows if status is not None}
+        
+        current_streak = 0
+        if rows:
+            streak, last_present_date = rows[0][0], rows[0][1]
+            # Streak only counts while it runs through today
+            if last_present_date == date.today():
+                current_streak = streak or 0
+        
+        return counts, current_streak
+    
+    @staticmethod
+    def apply_inserts(db: Session, records: List[Absensi]) -> None:
+        """
+        Update state derived from attendance for newly added records.
+        
+        Must be called in the same transaction as the inserts. Keeps each
+        user's `current_streak`/`last_present_date` pair up to date (a
+        backdated record falls back to a single ordered date scan) and
+        bumps the daily attendance summary counters.
+        
+        Args:
+            db: Database session holding the new records
+            records: Newly added attendance records
+        """
+        if not records:
+            return
+        
+        users = {
+            user.id: user
+            for user in db.query(User).filter(
+                User.id.in_({record.user_id for record in records})
+            ).all()
+        }
+        
+        needs_rebuild = set()
+        for record in sorted(records, key=lambda r: r.date):
+            user = users.get(record.user_id)
+            if user is None:
+                continue
             
-            if attendance:
-                streak += 1
-                current_date -= timedelta(days=1)
-            else:
+            last = user.last_present_date
+            if last is None or record.date > last + timedelta(days=1):
+                user.current_streak = 1
+                user.last_present_date = record.date
+            elif record.date == last + timedelta(days=1):
+                user.current_streak = (user.current_streak or 0) + 1
+                user.last_present_date = record.date
+            elif record.date < last:
+                needs_rebuild.add(user.id)
+        
+        if needs_rebuild:
+            db.flush()
+            for user_id in needs_rebuild:
+                AttendanceService.rebuild_streak(db, users[user_id])
+        
+        DailySummaryService(db).record_inserts(
+            records,
+            {user_id: user.kelas_id for user_id, user in users.items()}
+        )
+    
+    @staticmethod
+    def apply_status_change(db: Session, record: Absensi, old_status: Optional[str]) -> None:
+        """
+        Update state derived from attendance after a record's status changed.
+        Must be called in the same transaction as the update.
+        
+        Args:
+            db: Database session
+            record: Updated attendance record (with its new status)
+            old_status: Status before the update
+        """
+        kelas_id = db.query(User.kelas_id).filter(User.id == record.user_id).scalar()
+        DailySummaryService(db).record_status_change(record.date, kelas_id, old_status, record.status)
+    
+    @staticmethod
+    def rebuild_streak(db: Session, user: User) -> None:
+        """
+        Recompute a user's streak from a single ordered scan of attendance dates.
+        
+        Args:
+            db: Database session
+            user: User to update
+        """
+        dates = db.query(Absensi.date).filter(
+            Absensi.user_id == user.id
+        ).order_by(desc(Absensi.date)).all()
+        
+        streak = 0
+        expected = None
+        for (day,) in dates:
+            if expected is not None and day != expected:
                 break
+            streak += 1
+            expected = day - timedelta(days=1)
         
-        return streak
+        user.current_streak = streak
+        user.last_present_date = dates[0][0] if dates else None
 
 
 class _AttendanceServiceProxy:
@@ -333,13 +752,17 @@ class _AttendanceServiceProxy:
     and forwards calls.
     """
 
-    def submit_attendance(self, db: Session, user_id: int, confidence: float, image_path: str):
+    def submit_attendance(self, db: Session, user_id: int, confidence: float, image_path: str, status: str = None, device_info: str = None):
+        svc = AttendanceService(db)
+        return svc.submit_attendance(user_id, confidence, image_path, status=status, device_info=device_info)
+
+    def get_user_attendance_history(self, db: Session, user_id: int, skip: int = 0, limit: int = 50, start_date=None, end_date=None, cursor: str = None):
         svc = AttendanceService(db)
-        return svc.submit_attendance(user_id, confidence, image_path)
+        return svc.get_user_attendance_history(user_id, skip=skip, limit=limit, start_date=start_date, end_date=end_date, cursor=cursor)
 
-    def get_user_attendance_history(self, db: Session, user_id: int, skip: int = 0, limit: int = 50, start_date=None, end_date=None):
+    def count_user_attendance(self, db: Session, user_id: int, start_date=None, end_date=None):
         svc = AttendanceService(db)
-        return svc.get_user_attendance_history(user_id, skip=skip, limit=limit, start_date=start_date, end_date=end_date)
+        return svc.count_user_attendance(user_id, start_date=start_date, end_date=end_date)
 
     def get_today_attendance(self, db: Session, user_id: int):
         svc = AttendanceService(db)
@@ -361,6 +784,10 @@ class _AttendanceServiceProxy:
         svc = AttendanceService(db)
         return svc.get_attendance_report(start_date, end_date, kelas=kelas)
 
+    def get_student_breakdown(self, db: Session, start_date, end_date, kelas: str = None):
+        svc = AttendanceService(db)
+        return svc.get_student_breakdown(start_date, end_date, kelas=kelas)
+
 
 # Export a module-level proxy instance for backwards compatibility
 attendance_service = _AttendanceServiceProxy()
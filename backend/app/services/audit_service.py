@@ -0,0 +1,292 @@
+"""
+Audit Log Writer
+Asynchronous, batched writer for the `audit_logs` table.
+
+Request handlers call `audit_log.log(...)`, which only puts an entry on a
+bounded in-memory queue. A background thread drains the queue and inserts
+entries in batches (one executemany per batch), so auditing logins, face
+registrations and attendance marks adds no synchronous write to the hot
+path.
+
+When the database is busy (or the queue is full) entries are appended to a
+local JSON-lines fallback file instead of being lost; the writer replays
+that file into the database once writes succeed again.
+
+Old rows are removed by the `purge_audit_logs` periodic task of the job
+worker (see `purge_old_logs`), optionally archived to gzipped JSON lines.
+"""
+
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+
+
+class AuditLogWriter:
+    """Bounded queue + background batch inserter for audit entries."""
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval_ms: int, fallback_path: str):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.fallback_path = fallback_path
+
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max(1, queue_size))
+        self._file_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_replay = 0.0
+
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True while the writer thread is running."""
+        return self._running
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the writer thread (entries logged before start are queued)."""
+        if self._running:
+            return
+
+        directory = os.path.dirname(self.fallback_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        print("✅ Audit log writer started")
+
+    def stop(self) -> None:
+        """Stop the writer thread and flush what is queued (to the file if the DB fails)."""
+        if not self._running:
+            return
+
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=10)
+
+        while not self._queue.empty():
+            self._write(self._take_batch(block=False))
+
+        print(f"👋 Audit log writer stopped ({self.written} written, {self.spilled} spilled to file)")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def log(
+        self,
+        action: str,
+        user_id: Optional[int] = None,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        details: Optional[Dict[str, Any]] = None,
+        request: Any = None
+    ) -> None:
+        """
+        Record an audit entry without touching the database.
+
+        Args:
+            action: What happened (login, login_failed, register_face, submit_attendance, ...)
+            user_id: Acting/affected user (optional)
+            entity_type: Affected entity type, e.g. user, absensi, face (optional)
+            entity_id: Affected entity id (optional)
+            details: Extra JSON-serializable info (optional)
+            request: FastAPI request, for client IP and user agent (optional)
+        """
+        if not settings.AUDIT_LOG_ENABLED:
+            return
+
+        entry = {
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "details": json.dumps(details, default=str) if details else None,
+            "ip_address": request.client.host if request is not None and request.client else None,
+            "user_agent": request.headers.get("user-agent") if request is not None else None,
+            "created_at": datetime.utcnow()
+        }
+
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Never block the request; keep the entry on disk instead
+            self._spill([entry])
+
+    def stats(self) -> Dict:
+        """Writer counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "spilled_to_file": self.spilled,
+            "replayed_from_file": self.replayed
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        """Writer loop: insert a batch whenever entries are waiting."""
+        while self._running:
+            batch = self._take_batch(block=True)
+            if batch:
+                self._write(batch)
+            elif time.monotonic() - self._last_replay > 60:
+                self._replay_fallback()
+
+    def _take_batch(self, block: bool) -> List[Dict]:
+        """Take up to batch_size entries, waiting at most flush_interval for the first."""
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _insert(self, batch: List[Dict]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+        finally:
+            db.close()
+
+    def _write(self, batch: List[Dict]) -> None:
+        """Insert a batch, falling back to the local file if the database fails."""
+        if not batch:
+            return
+        try:
+            self._insert(batch)
+            self.written += len(batch)
+        except Exception as e:
+            print(f"⚠️ [AuditLog] Database busy, {len(batch)} entries written to {self.fallback_path}: {e}")
+            self._spill(batch)
+
+    def _spill(self, entries: List[Dict]) -> None:
+        """Append entries to the fallback file (one JSON object per line)."""
+        with self._file_lock:
+            with open(self.fallback_path, "a", encoding="utf-8") as fallback:
+                for entry in entries:
+                    fallback.write(json.dumps(entry, default=str) + "\n")
+            self.spilled += len(entries)
+
+    def _replay_fallback(self) -> None:
+        """Move entries from the fallback file into the database."""
+        self._last_replay = time.monotonic()
+        if not os.path.exists(self.fallback_path):
+            return
+
+        # Take the file over atomically; new spills start a fresh one
+        replay_path = f"{self.fallback_path}.replay"
+        with self._file_lock:
+            if not os.path.exists(replay_path):
+                os.replace(self.fallback_path, replay_path)
+
+        entries = []
+        with open(replay_path, "r", encoding="utf-8") as replay:
+            for line in replay:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                    entries.append(entry)
+                except (ValueError, KeyError, TypeError):
+                    continue  # Torn line from a crash mid-write
+
+        try:
+            for start in range(0, len(entries), self.batch_size):
+                self._insert(entries[start:start + self.batch_size])
+        except Exception as e:
+            # Keep the replay file; the inserted prefix is re-sent next time
+            print(f"⚠️ [AuditLog] Replay of fallback file failed, will retry: {e}")
+            return
+
+        os.remove(replay_path)
+        self.replayed += len(entries)
+        if entries:
+            print(f"✅ [AuditLog] Replayed {len(entries)} entries from fallback file")
+
+
+def purge_old_logs(db: Session, retention_days: int, batch_size: int, archive_dir: Optional[str] = None) -> int:
+    """
+    Delete audit rows older than `retention_days`, one bounded batch per
+    transaction, optionally appending them to monthly gzipped JSON-lines
+    archives first.
+
+    Args:
+        db: Database session
+        retention_days: Rows older than this many days are removed
+        batch_size: Rows per batch
+        archive_dir: Directory for archives (optional, no archive when empty)
+
+    Returns:
+        Number of rows removed
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    columns = [c.name for c in AuditLog.__table__.columns]
+    removed = 0
+
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    while True:
+        rows = db.query(AuditLog).filter(
+            AuditLog.created_at < cutoff
+        ).order_by(AuditLog.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        if archive_dir:
+            by_month: Dict[str, List[str]] = {}
+            for row in rows:
+                month = row.created_at.strftime("%Y-%m") if row.created_at else "unknown"
+                record = {column: getattr(row, column) for column in columns}
+                by_month.setdefault(month, []).append(json.dumps(record, default=str))
+            for month, lines in by_month.items():
+                path = os.path.join(archive_dir, f"audit_logs_{month}.jsonl.gz")
+                with gzip.open(path, "at", encoding="utf-8") as archive:
+                    archive.write("\n".join(lines) + "\n")
+
+        removed += db.query(AuditLog).filter(
+            AuditLog.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        if len(rows) < batch_size:
+            break
+
+    return removed
+
+
+# Global writer instance (started from the application lifespan)
+audit_log = AuditLogWriter(
+    queue_size=settings.AUDIT_LOG_QUEUE_SIZE,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval_ms=settings.AUDIT_LOG_FLUSH_INTERVAL_MS,
+    fallback_path=settings.AUDIT_LOG_FALLBACK_PATH
+)
@@ -0,0 +1,506 @@
+"""
+Daily Summary Service
+Maintains and reads the pre-aggregated daily_attendance_summary table.
+
+Counters are keyed by (date, kelas_id) and updated in the same transaction
+as each attendance insert or status change, so today-stats, dashboards and
+class statistics read a handful of rows instead of scanning `absensi`.
+
+A record counts towards its student's current class: inserts and rebuilds
+both key by `User.kelas_id` (0 for students without a class), a class
+change moves the student's counters along (`move_students`) and deleting
+a student subtracts them (`remove_students`). Readers take class codes
+and resolve them to ids, so renaming a class touches no summary rows.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from app.models.absensi import Absensi
+from app.models.daily_summary import DailyAttendanceSummary
+from app.models.kelas import Kelas
+from app.models.user import User
+from app.services.archive_service import AttendanceArchiveService
+from app.services.kelas_service import kelas_id_for_code
+
+
+# Statuses with their own counter column
+STATUS_COLUMNS = ("hadir", "terlambat", "izin", "sakit")
+COUNTER_COLUMNS = ("total",) + STATUS_COLUMNS
+
+
+def _empty_counters() -> Dict[str, int]:
+    return {column: 0 for column in COUNTER_COLUMNS}
+
+
+def _add_counts(
+    deltas: Dict[Tuple[date, int], Dict[str, int]],
+    rows: Iterable[Tuple[date, str, int]],
+    kelas_id: int,
+    sign: int
+) -> None:
+    """Add (date, status, count) rows to the deltas of one class, with sign +1 or -1."""
+    for day, status, count in rows:
+        counters = deltas.setdefault((day, kelas_id), _empty_counters())
+        counters["total"] += sign * count
+        if status in STATUS_COLUMNS:
+            counters[status] += sign * count
+
+
+def _with_alpa(counters: Dict[str, int]) -> Dict[str, int]:
+    """Add `alpa`: records whose status has no counter column of its own."""
+    counters["alpa"] = counters["total"] - sum(counters[status] for status in STATUS_COLUMNS)
+    return counters
+
+
+class DailySummaryService:
+    """Service for the daily attendance summary counters."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Maintenance (called from AttendanceService in the write transaction)
+    # ------------------------------------------------------------------
+
+    def record_inserts(self, records: Iterable[Absensi], kelas_by_user: Dict[int, Optional[int]]) -> None:
+        """
+        Count newly inserted attendance records.
+
+        Args:
+            records: New attendance records
+            kelas_by_user: Class id of each record's user
+        """
+        deltas: Dict[Tuple[date, int], Dict[str, int]] = {}
+        for record in records:
+            key = (record.date, kelas_by_user.get(record.user_id) or 0)
+            counters = deltas.setdefault(key, _empty_counters())
+            counters["total"] += 1
+            if record.status in STATUS_COLUMNS:
+                counters[record.status] += 1
+
+        self.apply_deltas(deltas)
+
+    def record_status_change(
+        self,
+        day: date,
+        kelas_id: Optional[int],
+        old_status: Optional[str],
+        new_status: Optional[str]
+    ) -> None:
+        """
+        Move one record's count from its old status to its new status.
+
+        Args:
+            day: Attendance date
+            kelas_id: Class id of the student
+            old_status: Previous status
+            new_status: Updated status
+        """
+        if old_status == new_status:
+            return
+
+        counters = _empty_counters()
+        if old_status in STATUS_COLUMNS:
+            counters[old_status] -= 1
+        if new_status in STATUS_COLUMNS:
+            counters[new_status] += 1
+
+        self.apply_deltas({(day, kelas_id or 0): counters})
+
+    def move_students(
+        self,
+        user_ids: Iterable[int],
+        old_kelas_id: Optional[int],
+        new_kelas_id: Optional[int]
+    ) -> None:
+        """
+        Move the counters of students who changed class to their new class.
+
+        Reads the students' records (live and archived) with one grouped
+        query and applies them as deltas: subtracted from the old class,
+        added to the new one.
+
+        Args:
+            user_ids: Students that moved
+            old_kelas_id: Class id before the change (None = no class)
+            new_kelas_id: Class id after the change (None = no class)
+        """
+        user_ids = list(user_ids)
+        old_kelas_id, new_kelas_id = old_kelas_id or 0, new_kelas_id or 0
+        if not user_ids or old_kelas_id == new_kelas_id:
+            return
+
+        rows = self._student_counts(user_ids)
+
+        deltas: Dict[Tuple[date, int], Dict[str, int]] = {}
+        _add_counts(deltas, rows, old_kelas_id, -1)
+        _add_counts(deltas, rows, new_kelas_id, 1)
+        self.apply_deltas(deltas)
+
+    def remove_students(self, user_ids: Iterable[int], kelas_id: Optional[int]) -> None:
+        """
+        Uncount the records of students that are being deleted.
+        Call before their records are deleted.
+
+        Reads the students' own records (live and archived) with one
+        grouped query and subtracts them from their class, instead of
+        recounting every class over the students' whole history.
+
+        Args:
+            user_ids: Students being deleted
+            kelas_id: Their class id (None = no class)
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+
+        deltas: Dict[Tuple[date, int], Dict[str, int]] = {}
+        _add_counts(deltas, self._student_counts(user_ids), kelas_id or 0, -1)
+        self.apply_deltas(deltas)
+
+    def _student_counts(self, user_ids: List[int]) -> List[Tuple[date, str, int]]:
+        """(date, status, count) of the students' records, live and archived."""
+        source = AttendanceArchiveService(self.db).source()
+        return self.db.query(
+            source.date,
+            source.status,
+            func.count(source.id)
+        ).filter(
+            source.user_id.in_(user_ids)
+        ).group_by(source.date, source.status).all()
+
+    def apply_deltas(self, deltas: Dict[Tuple[date, int], Dict[str, int]]) -> None:
+        """
+        Add counter deltas, one upsert per (date, kelas_id).
+
+        Args:
+            deltas: {(date, kelas_id): {column: delta}}
+        """
+        insert = self._insert_for_dialect()
+
+        for (day, kelas_id), counters in deltas.items():
+            values = {column: counters.get(column, 0) for column in COUNTER_COLUMNS}
+            if not any(values.values()):
+                continue
+
+            stmt = insert(DailyAttendanceSummary).values(date=day, kelas_id=kelas_id, **values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["date", "kelas_id"],
+                set_={
+                    **{
+                        column: getattr(DailyAttendanceSummary, column) + delta
+                        for column, delta in values.items()
+                    },
+                    "updated_at": func.now()
+                }
+            )
+            self.db.execute(stmt)
+
+    def rebuild(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+        """
+        Recompute summary rows from `absensi` (and its archive) for a date range (all dates by default).
+        Does not commit; the caller owns the transaction.
+
+        Args:
+            start_date: First date to rebuild (optional)
+            end_date: Last date to rebuild (optional)
+
+        Returns:
+            Number of summary rows written
+        """
+        delete_query = self.db.query(DailyAttendanceSummary)
+        if start_date:
+            delete_query = delete_query.filter(DailyAttendanceSummary.date >= start_date)
+        if end_date:
+            delete_query = delete_query.filter(DailyAttendanceSummary.date <= end_date)
+        delete_query.delete(synchronize_session=False)
+
+        # Archived years are counted too, so a full rebuild keeps their history
+        source = AttendanceArchiveService(self.db).source(start_date)
+        kelas_key = func.coalesce(User.kelas_id, 0)
+        query = self.db.query(
+            source.date,
+            kelas_key,
+            func.count(source.id),
+            *[
+                func.sum(case((source.status == status, 1), else_=0))
+                for status in STATUS_COLUMNS
+            ]
+        ).join(User, source.user_id == User.id)
+
+        if start_date:
+            query = query.filter(source.date >= start_date)
+        if end_date:
+            query = query.filter(source.date <= end_date)
+
+        rows = [
+            {
+                "date": day,
+                "kelas_id": kelas_id,
+                **dict(zip(COUNTER_COLUMNS, counts))
+            }
+            for day, kelas_id, *counts in query.group_by(source.date, kelas_key).all()
+        ]
+
+        if rows:
+            self.db.bulk_insert_mappings(DailyAttendanceSummary, rows)
+
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def get_date_counts(self, target_date: date, kelas: Optional[str] = None) -> Dict[str, int]:
+        """
+        Get attendance counters for one date.
+
+        Args:
+            target_date: Target date
+            kelas: Filter by class code (optional)
+
+        Returns:
+            Dictionary with total/hadir/terlambat/izin/sakit
+        """
+        query = self.db.query(
+            *[func.coalesce(func.sum(getattr(DailyAttendanceSummary, c)), 0) for c in COUNTER_COLUMNS]
+        ).filter(DailyAttendanceSummary.date == target_date)
+
+        if kelas:
+            query = query.filter(DailyAttendanceSummary.kelas_id == kelas_id_for_code(kelas))
+
+        return dict(zip(COUNTER_COLUMNS, query.one()))
+
+    def get_range_counts(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kelas: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Merge the per-day blocks of a date range into one set of counters.
+
+        Closed days only change through backdated edits, which update their
+        block in the same transaction, so a range report is a single sum over
+        at most one row per (day, kelas) instead of a scan of `absensi`.
+
+        Args:
+            start_date: Start date (optional)
+            end_date: End date (optional)
+            kelas: Filter by class code (optional)
+
+        Returns:
+            Dictionary with total/hadir/terlambat/izin/sakit, `alpa` (records
+            with any other status) and `days` (dates with attendance)
+        """
+        query = self.db.query(
+            func.count(func.distinct(DailyAttendanceSummary.date)),
+            *[func.coalesce(func.sum(getattr(DailyAttendanceSummary, c)), 0) for c in COUNTER_COLUMNS]
+        ).filter(DailyAttendanceSummary.total > 0)
+
+        if start_date:
+            query = query.filter(DailyAttendanceSummary.date >= start_date)
+        if end_date:
+            query = query.filter(DailyAttendanceSummary.date <= end_date)
+        if kelas:
+            query = query.filter(DailyAttendanceSummary.kelas_id == kelas_id_for_code(kelas))
+
+        days, *counts = query.one()
+        result = _with_alpa(dict(zip(COUNTER_COLUMNS, counts)))
+        result["days"] = days
+
+        return result
+
+    def get_daily_counts(
+        self,
+        start_date: date,
+        end_date: date,
+        kelas: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get attendance counters per date (one row per date with attendance).
+
+        Args:
+            start_date: Start date
+            end_date: End date
+            kelas: Filter by class code (optional)
+
+        Returns:
+            List of {date, total, hadir, terlambat, izin, sakit, alpa} ordered by date
+        """
+        query = self.db.query(
+            DailyAttendanceSummary.date,
+            *[func.sum(getattr(DailyAttendanceSummary, c)) for c in COUNTER_COLUMNS]
+        ).filter(
+            DailyAttendanceSummary.date >= start_date,
+            DailyAttendanceSummary.date <= end_date,
+            DailyAttendanceSummary.total > 0
+        )
+
+        if kelas:
+            query = query.filter(DailyAttendanceSummary.kelas_id == kelas_id_for_code(kelas))
+
+        rows = query.group_by(DailyAttendanceSummary.date).order_by(DailyAttendanceSummary.date).all()
+
+        return [
+            {"date": day.isoformat(), **_with_alpa(dict(zip(COUNTER_COLUMNS, counts)))}
+            for day, *counts in rows
+        ]
+
+    def get_weekly_counts(
+        self,
+        start_date: date,
+        end_date: date,
+        kelas: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get attendance counters per ISO week.
+
+        Rolls up the per-date rows, so the work is bounded by the number of
+        days in the range (ISO weeks are not portable across SQL dialects).
+
+        Args:
+            start_date: Start date
+            end_date: End date
+            kelas: Filter by class code (optional)
+
+        Returns:
+            List of {week, start, end, days, total, ...} ordered by week
+        """
+        weeks: Dict[Tuple[int, int], Dict] = {}
+        for row in self.get_daily_counts(start_date, end_date, kelas):
+            day = date.fromisoformat(row["date"])
+            year, week, weekday = day.isocalendar()
+            week_start = day - timedelta(days=weekday - 1)
+
+            bucket = weeks.setdefault((year, week), {
+                "week": f"{year}-W{week:02d}",
+                "start": max(week_start, start_date).isoformat(),
+                "end": min(week_start + timedelta(days=6), end_date).isoformat(),
+                "days": 0,
+                **_empty_counters()
+            })
+            bucket["days"] += 1
+            for column in COUNTER_COLUMNS:
+                bucket[column] += row[column]
+
+        return [_with_alpa(weeks[key]) for key in sorted(weeks)]
+
+    def get_kelas_counts(
+        self,
+        start_date: date,
+        end_date: date,
+        kelas: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get attendance counters per class.
+
+        Args:
+            start_date: Start date
+            end_date: End date
+            kelas: Filter by class code (optional)
+
+        Returns:
+            List of {kelas, total, hadir, terlambat, izin, sakit, alpa} ordered by class
+            (students without a class are reported under an empty code)
+        """
+        kelas_code = func.coalesce(Kelas.code, "")
+        query = self.db.query(
+            kelas_code,
+            *[func.sum(getattr(DailyAttendanceSummary, c)) for c in COUNTER_COLUMNS]
+        ).outerjoin(
+            Kelas, Kelas.id == DailyAttendanceSummary.kelas_id
+        ).filter(
+            DailyAttendanceSummary.date >= start_date,
+            DailyAttendanceSummary.date <= end_date,
+            DailyAttendanceSummary.total > 0
+        )
+
+        if kelas:
+            query = query.filter(DailyAttendanceSummary.kelas_id == kelas_id_for_code(kelas))
+
+        rows = query.group_by(kelas_code).order_by(kelas_code).all()
+
+        return [
+            {"kelas": code, **_with_alpa(dict(zip(COUNTER_COLUMNS, counts)))}
+            for code, *counts in rows
+        ]
+
+    def get_total(self, start_date: date, end_date: Optional[date] = None) -> int:
+        """
+        Get the number of attendance records in a date range.
+
+        Args:
+            start_date: Start date
+            end_date: End date (optional, open-ended by default)
+
+        Returns:
+            Total attendance records
+        """
+        query = self.db.query(
+            func.coalesce(func.sum(DailyAttendanceSummary.total), 0)
+        ).filter(DailyAttendanceSummary.date >= start_date)
+
+        if end_date:
+            query = query.filter(DailyAttendanceSummary.date <= end_date)
+
+        return query.scalar()
+
+    def get_kelas_attendance_rates(
+        self,
+        student_counts: Dict[str, int],
+        days: int = 30
+    ) -> Dict[str, float]:
+        """
+        Average daily attendance rate per class over the last `days` days.
+
+        A day counts when any attendance was recorded school-wide, so
+        holidays and weekends do not drag the rate down.
+
+        Args:
+            student_counts: {kelas code: number of students}
+            days: Window size in days
+
+        Returns:
+            {kelas code: attendance rate in %}
+        """
+        if not student_counts:
+            return {}
+
+        start_date = date.today() - timedelta(days=days - 1)
+
+        school_days = self.db.query(
+            func.count(func.distinct(DailyAttendanceSummary.date))
+        ).filter(DailyAttendanceSummary.date >= start_date).scalar() or 0
+
+        present = dict(
+            self.db.query(
+                Kelas.code,
+                func.sum(DailyAttendanceSummary.total)
+            ).join(
+                Kelas, Kelas.id == DailyAttendanceSummary.kelas_id
+            ).filter(
+                DailyAttendanceSummary.date >= start_date,
+                Kelas.code.in_(list(student_counts))
+            ).group_by(Kelas.code).all()
+        )
+
+        rates = {}
+        for code, total_students in student_counts.items():
+            possible = school_days * total_students
+            rates[code] = round(min(100.0, (present.get(code) or 0) / possible * 100), 1) if possible > 0 else 0.0
+
+        return rates
+
+    def _insert_for_dialect(self):
+        """Pick the dialect-specific INSERT that supports ON CONFLICT."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert
@@ -0,0 +1,291 @@
+"""
+Embedding Backends
+Pluggable face embedding engines behind one recognition interface.
+
+A backend turns a face image into a fixed-size embedding and declares how
+embeddings compare: its dimension, its metric ("euclidean" distance or
+"cosine" similarity), the threshold calibrated for it and how a score
+maps to the confidence shown to users. Registered faces are stored per
+backend (`FaceEncoding.model_version` = backend name), so engines can be
+enrolled side by side (tools/enroll_face_backend.py), benchmarked
+(tools/benchmark_face_backends.py) and switched with
+FACE_EMBEDDING_BACKEND without code changes.
+
+Backends register themselves with @register_backend(name), like job
+handlers do with @job_handler.
+"""
+
+import pickle
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
+from app.services.face_matching import EmbeddingGallery
+from app.utils.image_processing import image_to_numpy, resize_image, validate_image_quality
+
+
+# Prefix of stored embeddings (format marker; pickle data starts with pickle.PROTO)
+EMBEDDING_HEADER = b"EMB1"
+
+# Registered backend classes by name
+EMBEDDING_BACKENDS: Dict[str, Type["EmbeddingBackend"]] = {}
+
+_instances: Dict[str, "EmbeddingBackend"] = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name: str):
+    """Decorator registering an embedding backend class under `name`."""
+    def decorator(cls):
+        cls.name = name
+        EMBEDDING_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name: Optional[str] = None) -> "EmbeddingBackend":
+    """
+    Shared instance of an embedding backend (models load once per process).
+
+    Args:
+        name: Backend name (default: FACE_EMBEDDING_BACKEND)
+
+    Raises:
+        ValueError: If no backend is registered under the name
+    """
+    name = name or settings.FACE_EMBEDDING_BACKEND
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown face embedding backend: {name} "
+            f"(available: {', '.join(sorted(EMBEDDING_BACKENDS))})"
+        )
+
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = EMBEDDING_BACKENDS[name]()
+        return _instances[name]
+
+
+def is_backend_loaded(name: str) -> bool:
+    """Whether the shared instance of a backend has been created (models loaded)."""
+    return name in _instances
+
+
+class EmbeddingBackend(ABC):
+    """
+    Base class of embedding backends.
+
+    Subclasses implement `embed` (and `embed_batch` when the engine can
+    run a batch in one pass) and `confidence`; matching, verification and
+    serialization are shared.
+    """
+
+    name: str = ""
+    dimension: int = 128
+    metric: str = "cosine"  # cosine (similarity) or euclidean (distance)
+    threshold: float = 0.5  # Minimum similarity / maximum distance for a match
+
+    @abstractmethod
+    def embed(self, image: Image.Image) -> Optional[np.ndarray]:
+        """
+        Embedding of the face in an image.
+
+        Args:
+            image: PIL Image object
+
+        Returns:
+            Embedding (dimension,) or None if no face is detected
+
+        Raises:
+            BadRequestException: If the image fails the quality check
+        """
+
+    def embed_batch(self, images: List[Image.Image]) -> List[Optional[np.ndarray]]:
+        """Embeddings of several images (None where no face is detected)."""
+        return [self.embed(image) for image in images]
+
+    @abstractmethod
+    def confidence(self, score: float) -> float:
+        """Map a match score (similarity or distance) to a 0.0-1.0 confidence."""
+
+    def is_match(self, score: float) -> bool:
+        """Whether a score passes the calibrated threshold."""
+        return score >= self.threshold if self.metric == "cosine" else score <= self.threshold
+
+    def warm_up(self) -> None:
+        """Run one dummy inference so graph compilation happens before the first request."""
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def build_gallery(self, pairs: Iterable[Tuple[int, np.ndarray]]) -> EmbeddingGallery:
+        """Gallery of (user_id, embedding) pairs using this backend's metric."""
+        return EmbeddingGallery.from_pairs(pairs, metric=self.metric)
+
+    def match_batch(
+        self,
+        embeddings: List[np.ndarray],
+        gallery: EmbeddingGallery
+    ) -> List[Optional[Dict]]:
+        """
+        Best matching user for each embedding (one matrix product).
+
+        Returns:
+            One {user_id, confidence, score} per embedding, None where the
+            closest face does not pass the threshold
+        """
+        if not embeddings or len(gallery) == 0:
+            return [None] * len(embeddings)
+
+        user_ids, scores = gallery.nearest(np.vstack(embeddings))
+        return [
+            {
+                "user_id": int(user_id),
+                "confidence": self.confidence(float(score)),
+                "score": float(score)
+            } if self.is_match(score) else None
+            for user_id, score in zip(user_ids, scores)
+        ]
+
+    def match(self, embedding: np.ndarray, gallery: EmbeddingGallery) -> Optional[Dict]:
+        """Best matching user for one embedding (see match_batch)."""
+        return self.match_batch([embedding], gallery)[0]
+
+    def verify(self, embedding: np.ndarray, known_embeddings: List[np.ndarray]) -> Tuple[bool, float]:
+        """
+        Compare an embedding against one user's registered embeddings.
+
+        Returns:
+            Tuple of (is_match, confidence) for the closest one
+        """
+        if not known_embeddings:
+            return False, 0.0
+
+        gallery = self.build_gallery((0, known) for known in known_embeddings)
+        _, scores = gallery.nearest(embedding)
+        score = float(scores[0])
+        return self.is_match(score), self.confidence(score)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def serialize(self, embedding: np.ndarray) -> bytes:
+        """Embedding for `FaceEncoding.encoding_data`: format header + float32 bytes."""
+        return EMBEDDING_HEADER + np.asarray(embedding, dtype=np.float32).tobytes()
+
+    def deserialize(self, data: bytes) -> np.ndarray:
+        """
+        Embedding from `FaceEncoding.encoding_data`.
+
+        Reads the current format (EMBEDDING_HEADER + float32 bytes), a
+        pickled numpy array as stored before backends existed, and
+        header-less float32 bytes as first written by the backends.
+
+        Raises:
+            ValueError: If the embedding does not have this backend's dimension
+        """
+        embedding = None
+        if data.startswith(EMBEDDING_HEADER):
+            embedding = np.frombuffer(data[len(EMBEDDING_HEADER):], dtype=np.float32)
+        elif data.startswith(pickle.PROTO):
+            try:
+                embedding = np.asarray(pickle.loads(data), dtype=np.float32).ravel()
+            except Exception:
+                pass  # Header-less float32 bytes that happen to start like a pickle
+        if embedding is None:
+            embedding = np.frombuffer(data, dtype=np.float32)
+
+        if embedding.size != self.dimension:
+            raise ValueError(
+                f"{self.name} embedding has {embedding.size} dimensions, expected {self.dimension}"
+            )
+        return embedding
+
+
+@register_backend("dlib")
+class DlibBackend(EmbeddingBackend):
+    """face_recognition (dlib ResNet) 128D encodings compared by Euclidean distance."""
+
+    dimension = 128
+    metric = "euclidean"
+
+    def __init__(self):
+        from app.services.face_recognition_service import face_service
+
+        self.service = face_service
+        self.threshold = settings.FACE_RECOGNITION_TOLERANCE
+
+    def embed(self, image: Image.Image) -> Optional[np.ndarray]:
+        return self.service.encode_face(image)
+
+    def warm_up(self) -> None:
+        self.service.warm_up()
+
+    def confidence(self, score: float) -> float:
+        return self.service.distance_to_confidence(score)
+
+
+@register_backend("facenet")
+class FaceNetBackend(EmbeddingBackend):
+    """
+    Keras FaceNet embeddings (512D for the default model) compared by cosine similarity.
+    Faces are located with the dlib detector (FACE_DETECTION_MODEL) and the
+    crops are embedded in one batched forward pass.
+    """
+
+    metric = "cosine"
+
+    def __init__(self):
+        from app.services.facenet_service import get_facenet_service
+
+        self.threshold = settings.FACENET_SIMILARITY_THRESHOLD
+        self.service = get_facenet_service(self.threshold)
+        self.dimension = self.service.dimension
+
+    def _face_crop(self, image: Image.Image) -> Optional[np.ndarray]:
+        """Largest face in the image as a BGR crop, None if no face is detected."""
+        from app.services.face_recognition_service import face_service
+
+        is_valid, error_msg = validate_image_quality(image)
+        if not is_valid:
+            raise BadRequestException(error_msg)
+
+        if image.width > 1280 or image.height > 720:
+            image = resize_image(image, (1280, 720))
+
+        locations = face_service.detect_faces(image)
+        if not locations:
+            return None
+
+        top, right, bottom, left = max(locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))
+        rgb = image_to_numpy(image)
+        return np.ascontiguousarray(rgb[top:bottom, left:right, ::-1])
+
+    def embed(self, image: Image.Image) -> Optional[np.ndarray]:
+        return self.embed_batch([image])[0]
+
+    def warm_up(self) -> None:
+        from app.services.face_recognition_service import face_service
+
+        face_service.warm_up()
+        self.service.extract_embeddings([np.zeros((160, 160, 3), dtype=np.uint8)])
+
+    def embed_batch(self, images: List[Image.Image]) -> List[Optional[np.ndarray]]:
+        crops = [self._face_crop(image) for image in images]
+        found = [index for index, crop in enumerate(crops) if crop is not None]
+
+        embeddings: List[Optional[np.ndarray]] = [None] * len(images)
+        if found:
+            for index, embedding in zip(found, self.service.extract_embeddings([crops[i] for i in found])):
+                embeddings[index] = embedding
+        return embeddings
+
+    def confidence(self, score: float) -> float:
+        return score
@@ -0,0 +1,127 @@
+"""
+Face Gallery
+Registered face embeddings of the active backend, kept in memory.
+
+Scans used to load and deserialize every `face_encodings` row per
+request. The gallery is now built once per backend and reused; each
+lookup checks a cheap fingerprint of the backend's rows (count, max id,
+latest created_at) and rebuilds only when faces were registered or
+removed, also when that happened in another process.
+"""
+
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.face_encoding import FaceEncoding
+from app.services.embedding_backends import EmbeddingBackend
+from app.services.face_matching import EmbeddingGallery
+
+
+def _deserialize_rows(backend: EmbeddingBackend, rows) -> List[Tuple[int, np.ndarray]]:
+    """(user_id, embedding) pairs of (user_id, encoding_data) rows, skipping unreadable ones."""
+    pairs = []
+    for user_id, data in rows:
+        try:
+            pairs.append((user_id, backend.deserialize(data)))
+        except Exception as e:
+            print(f"⚠️ Failed to deserialize face encoding of user {user_id}: {e}")
+    return pairs
+
+
+def load_gallery(db: Session, backend: EmbeddingBackend) -> EmbeddingGallery:
+    """
+    Build a gallery from the stored embeddings of one backend.
+    Rows that fail to deserialize are skipped.
+
+    Args:
+        db: Database session
+        backend: Embedding backend (rows with model_version = backend.name)
+
+    Returns:
+        EmbeddingGallery
+    """
+    rows = db.query(FaceEncoding.user_id, FaceEncoding.encoding_data).filter(
+        FaceEncoding.model_version == backend.name
+    ).all()
+
+    return backend.build_gallery(_deserialize_rows(backend, rows))
+
+
+def load_user_embeddings(db: Session, backend: EmbeddingBackend, user_id: int) -> List[np.ndarray]:
+    """
+    Stored embeddings of one user for one backend (for `backend.verify`).
+    Rows that fail to deserialize are skipped.
+    """
+    rows = db.query(FaceEncoding.user_id, FaceEncoding.encoding_data).filter(
+        FaceEncoding.user_id == user_id,
+        FaceEncoding.model_version == backend.name
+    ).all()
+
+    return [embedding for _, embedding in _deserialize_rows(backend, rows)]
+
+
+class FaceGalleryCache:
+    """
+    In-memory galleries per backend, rebuilt when the stored encodings change.
+    No explicit invalidation: the fingerprint also sees registrations and
+    deletions made by other processes (CLI tools, other workers).
+    """
+
+    def __init__(self):
+        self._galleries: Dict[str, Tuple[Tuple, EmbeddingGallery]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, db: Session, backend: EmbeddingBackend) -> Tuple:
+        count, max_id, latest = db.query(
+            func.count(FaceEncoding.id),
+            func.max(FaceEncoding.id),
+            func.max(FaceEncoding.created_at)
+        ).filter(FaceEncoding.model_version == backend.name).one()
+        return count, max_id, str(latest)
+
+    def get(self, db: Session, backend: EmbeddingBackend) -> EmbeddingGallery:
+        """
+        Gallery of a backend, rebuilt if the stored encodings changed.
+
+        Args:
+            db: Database session
+            backend: Embedding backend
+
+        Returns:
+            EmbeddingGallery (shared; do not modify)
+        """
+        fingerprint = self._fingerprint(db, backend)
+        cached = self._galleries.get(backend.name)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        with self._lock:
+            cached = self._galleries.get(backend.name)
+            if cached and cached[0] == fingerprint:
+                return cached[1]
+
+            gallery = load_gallery(db, backend)
+            self._galleries[backend.name] = (fingerprint, gallery)
+            self._versions[backend.name] = self._versions.get(backend.name, 0) + 1
+            return gallery
+
+    def stats(self) -> Dict:
+        """Loaded galleries with their size and version (reload counter)."""
+        return {
+            name: {
+                "size": len(gallery),
+                "users": len(set(gallery.user_ids.tolist())),
+                "version": self._versions.get(name, 0)
+            }
+            for name, (_, gallery) in self._galleries.items()
+        }
+
+
+# Global gallery cache
+face_gallery = FaceGalleryCache()
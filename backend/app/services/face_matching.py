@@ -0,0 +1,182 @@
+"""
+Face Matching Core
+Vectorized matching of face embeddings against the registered gallery.
+
+Registered embeddings are stacked into one (N, D) matrix, so comparing a
+query against every registered face is a single matrix-vector product (or
+matrix-matrix for a batch of queries) instead of a Python loop over users:
+
+- cosine: rows are L2-normalized once, similarity is a dot product
+- euclidean: squared row norms are precomputed,
+  |g - q|^2 = |g|^2 - 2 g.q + |q|^2
+"""
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize embeddings row by row (zero vectors are left as they are).
+
+    Args:
+        vectors: (D,) or (N, D) array
+
+    Returns:
+        float32 array of the same shape with unit-length rows
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+METRICS = ("cosine", "euclidean")
+
+
+class EmbeddingGallery:
+    """
+    Registered face embeddings as one matrix.
+
+    Rows are embeddings, `user_ids[i]` is the owner of row i; a user may
+    own several rows (one per registered photo). Matching a query returns
+    the user of the closest row: highest cosine similarity, or lowest
+    Euclidean distance.
+    """
+
+    def __init__(
+        self,
+        user_ids: Sequence[int],
+        embeddings: Sequence[np.ndarray],
+        metric: str = "cosine"
+    ):
+        """
+        Build the gallery.
+
+        Args:
+            user_ids: Owner of each embedding
+            embeddings: Embeddings, all of the same dimension
+            metric: "cosine" (similarity, higher is closer) or
+                "euclidean" (distance, lower is closer)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        self.metric = metric
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(embeddings):
+            matrix = np.vstack(embeddings).astype(np.float32)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+
+        if metric == "cosine":
+            self.matrix = l2_normalize(matrix) if len(matrix) else matrix
+        else:
+            self.matrix = matrix
+            self.squared_norms = np.einsum("ij,ij->i", matrix, matrix)
+
+    @classmethod
+    def from_pairs(
+        cls,
+        pairs: Iterable[Tuple[int, np.ndarray]],
+        metric: str = "cosine"
+    ) -> "EmbeddingGallery":
+        """Build a gallery from (user_id, embedding) pairs."""
+        pairs = list(pairs)
+        return cls([user_id for user_id, _ in pairs], [embedding for _, embedding in pairs], metric)
+
+    def subset(self, user_ids: Iterable[int]) -> "EmbeddingGallery":
+        """Gallery restricted to the rows of the given users (e.g. a class roster)."""
+        mask = np.isin(self.user_ids, np.fromiter(user_ids, dtype=np.int64))
+        subset = EmbeddingGallery.__new__(EmbeddingGallery)
+        subset.metric = self.metric
+        subset.user_ids = self.user_ids[mask]
+        subset.matrix = self.matrix[mask] if len(self.matrix) else self.matrix
+        if self.metric == "euclidean":
+            subset.squared_norms = self.squared_norms[mask]
+        return subset
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension (0 for an empty gallery)."""
+        return self.matrix.shape[1]
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Score of each query against every gallery row.
+
+        Args:
+            queries: (Q, D) query embeddings
+
+        Returns:
+            (Q, N) matrix of cosine similarities or Euclidean distances
+        """
+        if self.metric == "cosine":
+            return l2_normalize(queries) @ self.matrix.T
+
+        queries = np.asarray(queries, dtype=np.float32)
+        squared = (
+            self.squared_norms[None, :]
+            - 2.0 * (queries @ self.matrix.T)
+            + np.einsum("ij,ij->i", queries, queries)[:, None]
+        )
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    def nearest(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Closest gallery row for each query, in one matrix product.
+
+        Args:
+            queries: (D,) or (Q, D) query embeddings (gallery must not be empty)
+
+        Returns:
+            Tuple of (user_ids, scores), one entry per query; cosine
+            similarities are clamped to [0, 1]
+        """
+        queries = np.atleast_2d(queries)
+        scores = self.scores(queries)
+        if self.metric == "cosine":
+            best_rows = scores.argmax(axis=1)
+            best_scores = np.clip(scores[np.arange(len(queries)), best_rows], 0.0, 1.0)
+        else:
+            best_rows = scores.argmin(axis=1)
+            best_scores = scores[np.arange(len(queries)), best_rows]
+        return self.user_ids[best_rows], best_scores
+
+    def best_matches(
+        self,
+        queries: np.ndarray,
+        threshold: float
+    ) -> List[Optional[Tuple[int, float]]]:
+        """
+        Best matching user for each query embedding.
+
+        Args:
+            queries: (D,) or (Q, D) query embeddings
+            threshold: Minimum cosine similarity / maximum Euclidean
+                distance for a match
+
+        Returns:
+            One (user_id, score) per query, None where the best score
+            does not pass the threshold
+        """
+        queries = np.atleast_2d(queries)
+        if len(self) == 0:
+            return [None] * len(queries)
+
+        user_ids, scores = self.nearest(queries)
+        return [
+            (int(user_id), float(score)) if self.passes(score, threshold) else None
+            for user_id, score in zip(user_ids, scores)
+        ]
+
+    def passes(self, score: float, threshold: float) -> bool:
+        """Whether a score is a match under this gallery's metric."""
+        return score >= threshold if self.metric == "cosine" else score <= threshold
+
+    def best_match(self, query: np.ndarray, threshold: float) -> Optional[Tuple[int, float]]:
+        """Best matching user for one query embedding (see best_matches)."""
+        return self.best_matches(query, threshold)[0]
@@ -75,6 +75,15 @@ class FaceRecognitionService:
         # Return first face encoding
         return encodings[0]
     
+    def warm_up(self) -> None:
+        """
+        Run the detector and the encoder once on a blank image, so the
+        first real scan does not pay for lazy initialisation (BLAS, buffers).
+        """
+        blank = np.zeros((160, 160, 3), dtype=np.uint8)
+        face_recognition.face_locations(blank, model=self.model)
+        face_recognition.face_encodings(blank, known_face_locations=[(0, 160, 160, 0)], model="large")
+
     def encode_multiple_faces(self, images: List[Image.Image]) -> List[np.ndarray]:
         """
         Generate face encodings from multiple images.
@@ -119,25 +128,7 @@ class FaceRecognitionService:
         best_match_index = np.argmin(face_distances)
         best_distance = float(face_distances[best_match_index])
         
-        # In face_recognition library:
-        # - Distance 0.0 = exact match (100%)
-        # - Distance 0.4 = good match (~85%)
-        # - Distance 0.5 = acceptable (~75%)
-        # - Distance 0.6 = threshold (~65%)
-        # - Distance > 0.6 = not a match
-        
-        # Convert distance to confidence percentage for user-friendly display
-        # Using linear interpolation: distance 0 -> 100%, distance 0.6 -> 60%
-        # This provides a more intuitive confidence score for users
-        if best_distance <= 0.0:
-            confidence = 1.0
-        elif best_distance >= 0.8:
-            confidence = 0.4  # Minimum 40% for very poor matches
-        else:
-            # Linear scale: 100% at distance 0, 60% at distance 0.6
-            # Formula: confidence = 1.0 - (distance * 0.667)
-            # This maps: 0.0 -> 100%, 0.3 -> 80%, 0.45 -> 70%, 0.6 -> 60%
-            confidence = max(0.4, 1.0 - (best_distance * 0.67))
+        confidence = self.distance_to_confidence(best_distance)
         
         # Match if distance is within tolerance
         is_match = best_distance <= self.tolerance
@@ -146,6 +137,29 @@ class FaceRecognitionService:
         
         return is_match, confidence
     
+    @staticmethod
+    def distance_to_confidence(distance: float) -> float:
+        """
+        Convert a face distance to a user-friendly confidence (0.4 - 1.0).
+        
+        In face_recognition library:
+        - Distance 0.0 = exact match (100%)
+        - Distance 0.4 = good match (~85%)
+        - Distance 0.5 = acceptable (~75%)
+        - Distance 0.6 = threshold (~65%)
+        - Distance > 0.6 = not a match
+        
+        Using linear interpolation: distance 0 -> 100%, distance 0.6 -> 60%
+        This provides a more intuitive confidence score for users
+        """
+        if distance <= 0.0:
+            return 1.0
+        if distance >= 0.8:
+            return 0.4  # Minimum 40% for very poor matches
+        # Formula: confidence = 1.0 - (distance * 0.667)
+        # This maps: 0.0 -> 100%, 0.3 -> 80%, 0.45 -> 70%, 0.6 -> 60%
+        return max(0.4, 1.0 - (distance * 0.67))
+    
     def recognize_face(
         self,
         image: Image.Image,
@@ -268,7 +282,8 @@ class FaceRecognitionService:
     def register_face(self, user_id: int, image_data: bytes, filename: str) -> Dict:
         """
         Register a face photo for a user.
-        Process image, validate quality, extract encoding, and save.
+        Process image, validate quality, extract encoding with the configured
+        embedding backend, and save.
         
         Args:
             user_id: User database ID
@@ -284,6 +299,9 @@ class FaceRecognitionService:
         from app.db.session import SessionLocal
         from app.models.user import User
         from app.models.face_encoding import FaceEncoding
+        from app.services.embedding_backends import get_backend
+        
+        backend = get_backend()
         
         # Decode image from bytes
         try:
@@ -299,7 +317,7 @@ class FaceRecognitionService:
             raise ValueError(error_msg)
         
         # Encode face
-        encoding = self.encode_face(image)
+        encoding = backend.embed(image)
         if encoding is None:
             raise ValueError("No face detected in image. Please ensure your face is clearly visible.")
         
@@ -323,7 +341,8 @@ class FaceRecognitionService:
             # Save encoding to database
             face_encoding = FaceEncoding(
                 user_id=user_id,
-                encoding_data=self.serialize_encoding(encoding),
+                encoding_data=backend.serialize(encoding),
+                model_version=backend.name,
                 image_path=image_path,
                 confidence=quality_score / 100.0,  # Use confidence field for quality (0.0-1.0)
                 created_at=datetime.now()
@@ -1,22 +1,21 @@
 """
 FaceNet Service for Face Recognition
 
-Uses FaceNet (Inception ResNet v1) to generate 128D face embeddings
+Uses FaceNet (Inception ResNet v1) to generate 512D face embeddings
 and Cosine Similarity for matching faces.
 
 Features:
-- 128D embedding extraction
-- Cosine similarity matching
+- 512D embedding extraction (batched: one forward pass per list of images)
+- Cosine similarity matching as one matrix product (services/face_matching.py)
 - L2 normalization
 - Configurable threshold
 
 Author: Luna (AbsensiAgent)
 """
 
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 import numpy as np
 import cv2
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
 import os
 import warnings
@@ -26,8 +25,13 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress INFO and WARNING
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'  # Disable oneDNN
 warnings.filterwarnings('ignore', category=FutureWarning)
 
+from app.services.face_matching import EmbeddingGallery, l2_normalize
+
 logger = logging.getLogger(__name__)
 
+# Embedding size of keras-facenet's default model, used if the model does not report it
+DEFAULT_EMBEDDING_DIMENSION = 512
+
 
 class FaceNetService:
     """
@@ -36,7 +40,7 @@ class FaceNetService:
     
     This service provides:
     1. Image preprocessing for FaceNet input
-    2. Face embedding extraction (128D vectors)
+    2. Face embedding extraction (512D vectors)
     3. Similarity-based face matching
     """
     
@@ -80,6 +84,10 @@ class FaceNetService:
         
         self.model = FaceNetService._model
         self.threshold = similarity_threshold
+        
+        # 512 for the default keras-facenet model (20180402-114759)
+        metadata = getattr(self.model, "metadata", None) or {}
+        self.dimension = int(metadata.get("dimensions", DEFAULT_EMBEDDING_DIMENSION))
         logger.info(f"✓ FaceNet service initialized, threshold={self.threshold}")
     
     def preprocess_image(self, image: np.ndarray) -> np.ndarray:
@@ -106,35 +114,40 @@ class FaceNetService:
         
         return normalized
     
-    def extract_embedding(self, image: np.ndarray) -> np.ndarray:
+    def extract_embeddings(self, images: List[np.ndarray]) -> np.ndarray:
         """
-        Extract 128D face embedding from image.
+        Extract face embeddings for a list of images in one forward pass.
         
         Args:
-            image: BGR image containing a face (any size)
+            images: BGR images, each containing a face (any size)
             
         Returns:
-            128D embedding vector (L2 normalized)
+            (N, dimension) array of L2 normalized embeddings, one row per image
         """
-        # Preprocess image
-        preprocessed = self.preprocess_image(image)
+        if not images:
+            return np.empty((0, self.dimension), dtype=np.float32)
         
-        # Add batch dimension [1, 160, 160, 3]
-        image_batch = np.expand_dims(preprocessed, axis=0)
+        # Preprocess and stack into one batch [N, 160, 160, 3]
+        image_batch = np.stack([self.preprocess_image(image) for image in images])
         
-        # Extract embedding using FaceNet
-        embedding = self.model.embeddings(image_batch)[0]
+        # Extract embeddings using FaceNet
+        embeddings = l2_normalize(self.model.embeddings(image_batch))
         
-        # L2 normalization for cosine similarity
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            normalized_embedding = embedding / norm
-        else:
-            normalized_embedding = embedding
+        logger.debug(f"✓ Extracted {len(embeddings)} embeddings: shape={embeddings.shape}")
         
-        logger.debug(f"✓ Extracted embedding: shape={normalized_embedding.shape}, norm={norm:.4f}")
+        return embeddings
+    
+    def extract_embedding(self, image: np.ndarray) -> np.ndarray:
+        """
+        Extract the face embedding of an image.
         
-        return normalized_embedding
+        Args:
+            image: BGR image containing a face (any size)
+            
+        Returns:
+            Embedding vector (dimension,), L2 normalized
+        """
+        return self.extract_embeddings([image])[0]
     
     def calculate_similarity(
         self, 
@@ -145,89 +158,105 @@ class FaceNetService:
         Calculate cosine similarity between two embeddings.
         
         Args:
-            embedding1: First face embedding (128D)
-            embedding2: Second face embedding (128D)
+            embedding1: First face embedding
+            embedding2: Second face embedding
             
         Returns:
             Cosine similarity score (0.0 to 1.0)
         """
-        # Reshape for sklearn
-        vec1 = embedding1.reshape(1, -1)
-        vec2 = embedding2.reshape(1, -1)
+        # Dot product of unit vectors; clamp to [0, 1] (cosine can be negative for opposite vectors)
+        similarity = float(np.dot(l2_normalize(embedding1), l2_normalize(embedding2)))
+        return max(0.0, min(1.0, similarity))
+    
+    def build_gallery(self, database_embeddings: List[Tuple[int, np.ndarray]]) -> EmbeddingGallery:
+        """
+        Stack registered embeddings into a pre-normalized gallery.
+        Build it once per set of registered faces and reuse it for matching.
         
-        # Calculate cosine similarity
-        similarity = cosine_similarity(vec1, vec2)[0][0]
+        Args:
+            database_embeddings: List of (user_id, embedding) tuples
+            
+        Returns:
+            EmbeddingGallery
+        """
+        return EmbeddingGallery.from_pairs(database_embeddings)
+    
+    def find_best_matches(
+        self,
+        query_embeddings: np.ndarray,
+        gallery: Union[EmbeddingGallery, List[Tuple[int, np.ndarray]]]
+    ) -> List[Optional[Tuple[int, float]]]:
+        """
+        Find the best matching face for each query embedding (one matrix product).
         
-        # Clamp to [0, 1] range (cosine can be negative for opposite vectors)
-        similarity = max(0.0, min(1.0, similarity))
+        Args:
+            query_embeddings: (N, dimension) query face embeddings
+            gallery: EmbeddingGallery, or a list of (user_id, embedding) tuples
+            
+        Returns:
+            One (user_id, confidence) per query, None where no match is above threshold
+        """
+        if not isinstance(gallery, EmbeddingGallery):
+            gallery = self.build_gallery(gallery)
+        
+        if len(gallery) == 0:
+            logger.warning("❌ No database embeddings to match against")
         
-        return float(similarity)
+        return gallery.best_matches(query_embeddings, self.threshold)
     
     def find_best_match(
         self, 
         query_embedding: np.ndarray, 
-        database_embeddings: List[Tuple[int, np.ndarray]]
+        database_embeddings: Union[EmbeddingGallery, List[Tuple[int, np.ndarray]]]
     ) -> Optional[Tuple[int, float]]:
         """
         Find best matching face from database.
         
         Args:
-            query_embedding: Query face embedding (128D)
-            database_embeddings: List of (user_id, embedding) tuples
+            query_embedding: Query face embedding
+            database_embeddings: EmbeddingGallery, or a list of (user_id, embedding) tuples
             
         Returns:
             (user_id, confidence) if match found above threshold, else None
         """
-        if not database_embeddings:
+        gallery = database_embeddings
+        if not isinstance(gallery, EmbeddingGallery):
+            gallery = self.build_gallery(gallery)
+        
+        if len(gallery) == 0:
             logger.warning("❌ No database embeddings to match against")
             return None
         
-        best_match_id = None
-        best_similarity = -1.0
-        
-        print(f"🔍 [FaceNet] Comparing against {len(database_embeddings)} registered faces...")
-        
-        # Calculate similarity with each database embedding
-        for user_id, db_embedding in database_embeddings:
-            similarity = self.calculate_similarity(query_embedding, db_embedding)
-            
-            print(f"   • User {user_id}: similarity = {similarity:.4f}")
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match_id = user_id
+        user_ids, similarities = gallery.nearest(query_embedding)
+        best_match_id, best_similarity = int(user_ids[0]), float(similarities[0])
         
         # Check if best match exceeds threshold
         if best_similarity >= self.threshold:
-            print(f"✅ [FaceNet] Match found: user_id={best_match_id}, confidence={best_similarity:.4f}")
+            print(f"✅ [FaceNet] Match found among {len(gallery)} faces: user_id={best_match_id}, confidence={best_similarity:.4f}")
             return (best_match_id, best_similarity)
         else:
-            print(f"❌ [FaceNet] No match above threshold ({best_similarity:.4f} < {self.threshold})")
+            print(f"❌ [FaceNet] No match above threshold among {len(gallery)} faces ({best_similarity:.4f} < {self.threshold})")
             return None
     
     def recognize_face(
         self, 
         image: np.ndarray, 
-        database_embeddings: List[Tuple[int, np.ndarray]]
+        database_embeddings: Union[EmbeddingGallery, List[Tuple[int, np.ndarray]]]
     ) -> Optional[Tuple[int, float]]:
         """
         Complete face recognition pipeline.
         
         Args:
             image: BGR image containing face (from webcam)
-            database_embeddings: List of (user_id, embedding) registered in database
+            database_embeddings: EmbeddingGallery, or a list of (user_id, embedding) registered in database
             
         Returns:
             (user_id, confidence) if recognized, else None
         """
         try:
-            print("🧠 [FaceNet] Extracting face embedding...")
-            
             # Extract embedding from query image
             query_embedding = self.extract_embedding(image)
             
-            print(f"✓ [FaceNet] Embedding extracted: {query_embedding.shape}")
-            
             # Find best match in database
             match = self.find_best_match(query_embedding, database_embeddings)
             
@@ -239,6 +268,27 @@ class FaceNetService:
             traceback.print_exc()
             return None
     
+    def recognize_faces(
+        self,
+        images: List[np.ndarray],
+        gallery: Union[EmbeddingGallery, List[Tuple[int, np.ndarray]]]
+    ) -> List[Optional[Tuple[int, float]]]:
+        """
+        Recognize several face images with one forward pass and one matrix product.
+        
+        Args:
+            images: BGR images, each containing a face
+            gallery: EmbeddingGallery, or a list of (user_id, embedding) registered in database
+            
+        Returns:
+            One (user_id, confidence) per image, None where not recognized
+        """
+        if not images:
+            return []
+        
+        query_embeddings = self.extract_embeddings(images)
+        return self.find_best_matches(query_embeddings, gallery)
+    
     def verify_faces(
         self,
         image1: np.ndarray,
@@ -255,9 +305,8 @@ class FaceNetService:
             Tuple of (is_same_person, similarity_score)
         """
         try:
-            # Extract embeddings
-            embedding1 = self.extract_embedding(image1)
-            embedding2 = self.extract_embedding(image2)
+            # Extract both embeddings in one batch
+            embedding1, embedding2 = self.extract_embeddings([image1, image2])
             
             # Calculate similarity
             similarity = self.calculate_similarity(embedding1, embedding2)
@@ -0,0 +1,137 @@
+"""
+Job Handlers
+Long-running admin/teacher operations executed by the job worker, and the
+periodic housekeeping it runs between jobs.
+
+Each handler receives a `JobContext` and returns a JSON-serializable
+result dict, which is what `GET /jobs/{id}` reports when the job is done.
+"""
+
+from datetime import date
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.archive_service import AttendanceArchiveService
+from app.services.audit_service import purge_old_logs
+from app.services.job_service import JobContext, job_handler, periodic_task
+from app.services.provisioning_service import StudentProvisioningService, count_csv_rows, iter_student_csv
+from app.services.report_export_service import ReportExportService
+from app.services.token_service import RefreshTokenService
+
+
+@job_handler("student_import")
+def import_students(ctx: JobContext) -> Dict:
+    """
+    Create students from an uploaded CSV (password = NIM).
+    Payload: {"csv": CSV text}
+    """
+    text = ctx.payload.get("csv", "")
+    total = count_csv_rows(text)
+
+    result = StudentProvisioningService(ctx.db).provision(
+        iter_student_csv(text),
+        total=total,
+        on_progress=lambda done, of: ctx.progress(done / of * 100, f"{done}/{of} baris diproses", force=True)
+    )
+
+    print(f"✅ CSV Import: Created {result['created']}, Skipped {result['skipped']}")
+
+    return {
+        "message": f"Berhasil import {result['created']} mahasiswa, {result['skipped']} dilewati (NIM sudah ada)",
+        "created": result["created"],
+        "skipped": result["skipped"],
+        "skipped_nims": result["skipped_nims"][:10]  # Show first 10 only
+    }
+
+
+@job_handler("student_bulk_create")
+def bulk_create_students(ctx: JobContext) -> Dict:
+    """
+    Create students from the bulk create request.
+    Payload: {"students": [UserCreate dicts]}
+    """
+    students = ctx.payload.get("students", [])
+
+    result = StudentProvisioningService(ctx.db).provision(
+        students,
+        total=len(students),
+        on_progress=lambda done, of: ctx.progress(done / of * 100, f"{done}/{of} siswa diproses", force=True)
+    )
+
+    return {
+        "message": f"Created {result['created']} students, skipped {result['skipped']}",
+        "created": result["created"],
+        "skipped": result["skipped"],
+        "errors": result["errors"]
+    }
+
+
+@job_handler("report_export")
+def export_report(ctx: JobContext) -> Dict:
+    """
+    Render an Excel/PDF attendance report into the export cache.
+    Payload: {"format", "start_date", "end_date", "kelas", "title"}
+    """
+    payload = ctx.payload
+    start_date = date.fromisoformat(payload["start_date"]) if payload.get("start_date") else None
+    end_date = date.fromisoformat(payload["end_date"]) if payload.get("end_date") else None
+    kelas = payload.get("kelas")
+
+    service = ReportExportService(ctx.db)
+    # Re-plan: the data may have changed since the job was enqueued
+    plan = service.plan(payload["format"], start_date, end_date, kelas)
+
+    message = f"Export {payload['format']} diambil dari cache"
+    if not plan["cached"]:
+        written = service.render(
+            payload["format"],
+            plan,
+            payload.get("title") or "Laporan Absensi",
+            start_date=start_date,
+            end_date=end_date,
+            kelas=kelas,
+            on_progress=lambda percent: ctx.progress(percent)
+        )
+        message = f"Export {payload['format']} selesai ({written} baris)"
+
+    return {
+        "message": message,
+        "format": payload["format"],
+        "file_path": plan["cache_path"],
+        "filename": plan["filename"],
+        "media_type": plan["media_type"]
+    }
+
+
+# ==================== PERIODIC TASKS ====================
+
+@periodic_task("purge_refresh_tokens", settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+def purge_refresh_tokens(db: Session) -> int:
+    """Delete revoked and expired refresh tokens in bounded batches."""
+    return RefreshTokenService(db).purge(batch_size=settings.REFRESH_TOKEN_PURGE_BATCH_SIZE)
+
+
+@periodic_task("purge_audit_logs", 3600)
+def purge_audit_logs(db: Session) -> int:
+    """Delete (or archive, then delete) audit rows past the retention horizon."""
+    return purge_old_logs(
+        db,
+        retention_days=settings.AUDIT_LOG_RETENTION_DAYS,
+        batch_size=settings.AUDIT_LOG_PURGE_BATCH_SIZE,
+        archive_dir=settings.AUDIT_LOG_ARCHIVE_DIR or None
+    )
+
+
+@periodic_task("archive_attendance", 86400)
+def archive_attendance(db: Session) -> int:
+    """Move closed academic years from `absensi` to `absensi_archive`."""
+    if not settings.ATTENDANCE_ARCHIVE_ENABLED:
+        return 0
+
+    moved = AttendanceArchiveService(db).archive_closed_years(settings.ATTENDANCE_ARCHIVE_BATCH_SIZE)
+    for label, rows in moved.items():
+        if rows:
+            print(f"📦 Archived {rows} attendance records of {label}")
+    return sum(moved.values())
@@ -0,0 +1,404 @@
+"""
+Job Service
+Small background job subsystem backed by the `jobs` table.
+
+Request handlers enqueue a job and return its id at once; the worker
+process (`worker.py`, launched by `run.py`) claims due jobs one at a time,
+runs the registered handler and records progress, result or error. Failed
+jobs are retried with exponential backoff up to `max_attempts`.
+
+Handlers are registered with `@job_handler("type")` and receive a
+`JobContext` (own database session, payload, progress reporting).
+Housekeeping that should run every N seconds (purging old rows, ...) is
+registered with `@periodic_task(name, interval)` and run by the same worker
+between jobs.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import Job
+
+
+# Registered handlers: {job type: handler(ctx) -> result}
+JOB_HANDLERS: Dict[str, Callable[["JobContext"], Any]] = {}
+
+
+def job_handler(job_type: str):
+    """Register a function as the handler for a job type."""
+    def decorator(func: Callable[["JobContext"], Any]):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+# Registered periodic tasks: {name: (interval seconds, task(db) -> rows affected)}
+PERIODIC_TASKS: Dict[str, tuple] = {}
+
+
+def periodic_task(name: str, interval_seconds: float):
+    """Register a function run by the job worker every `interval_seconds`."""
+    def decorator(func: Callable[[Session], Optional[int]]):
+        PERIODIC_TASKS[name] = (interval_seconds, func)
+        return func
+    return decorator
+
+
+def job_to_dict(job: Job) -> Dict:
+    """Serialize a job for API responses."""
+    return {
+        "job_id": job.id,
+        "type": job.type,
+        "status": job.status,
+        "progress": round(job.progress or 0.0, 1),
+        "message": job.message,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+class JobContext:
+    """Passed to job handlers: payload, a work session and progress reporting."""
+
+    def __init__(self, job_id: str, payload: Dict, db: Session):
+        self.job_id = job_id
+        self.payload = payload
+        self.db = db
+        self._last_report = 0.0
+
+    def progress(self, percent: float, message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Record job progress. Written through a separate short session so it
+        is visible while the handler's own transaction is still open; updates
+        are throttled to one per second unless forced. Best effort: if the
+        database is busy the update is skipped rather than failing the job,
+        so handlers that write should commit before reporting.
+
+        Args:
+            percent: Progress in % (0-100)
+            message: Optional status message
+            force: Write even if the last update was less than a second ago
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < 1.0:
+            return
+        self._last_report = now
+
+        values = {"progress": max(0.0, min(100.0, percent))}
+        if message is not None:
+            values["message"] = message[:255]
+
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == self.job_id).update(values, synchronize_session=False)
+            db.commit()
+        except OperationalError as e:
+            db.rollback()
+            print(f"⚠️ [JobWorker] Progress update skipped for job {self.job_id}: {e.orig}")
+        finally:
+            db.close()
+
+
+class JobService:
+    """Service for enqueueing and reading jobs."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Optional[Dict] = None,
+        created_by: Optional[int] = None,
+        key: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> Job:
+        """
+        Add a job to the queue.
+
+        Args:
+            job_type: Registered handler type
+            payload: JSON-serializable input
+            created_by: User ID of the requester (optional)
+            key: Dedupe key; an unfinished job with the same type and key is returned instead
+            max_attempts: Attempts before the job is marked failed (optional)
+
+        Returns:
+            The queued (or existing) job
+        """
+        if key:
+            existing = self.db.query(Job).filter(
+                Job.type == job_type,
+                Job.key == key,
+                Job.status.in_(("pending", "running"))
+            ).first()
+            if existing:
+                return existing
+
+        job = Job(
+            type=job_type,
+            key=key,
+            payload=json.dumps(payload or {}),
+            created_by=created_by,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+
+        return job
+
+    def create_finished(
+        self,
+        job_type: str,
+        result: Dict,
+        created_by: Optional[int] = None,
+        message: Optional[str] = None
+    ) -> Job:
+        """Record a job that was satisfied immediately (e.g. from a cache)."""
+        now = datetime.now()
+        job = Job(
+            type=job_type,
+            status="done",
+            result=json.dumps(result),
+            progress=100.0,
+            message=message,
+            created_by=created_by,
+            started_at=now,
+            finished_at=now
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id."""
+        return self.db.query(Job).filter(Job.id == job_id).first()
+
+
+class JobWorker:
+    """Polls the jobs table and runs due jobs one at a time."""
+
+    def __init__(self, poll_interval: float, backoff_seconds: float):
+        self.poll_interval = poll_interval
+        self.backoff_seconds = backoff_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_run: Dict[str, float] = {}
+
+    def run_forever(self) -> None:
+        """Worker loop (blocking). Requeues jobs left running by a previous worker."""
+        # Make sure handler modules are imported and registered
+        import app.services.job_handlers  # noqa
+
+        requeued = self._requeue_interrupted()
+        print(
+            f"✅ Job worker started (pid {os.getpid()}, {len(JOB_HANDLERS)} job types, "
+            f"{len(PERIODIC_TASKS)} periodic tasks, {requeued} requeued)"
+        )
+
+        while not self._stop.is_set():
+            try:
+                ran = self.run_next()
+                self.run_periodic()
+            except Exception as e:
+                print(f"⚠️ [JobWorker] Loop error: {e}")
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+        print("👋 Job worker stopped")
+
+    def start_thread(self) -> None:
+        """Run the worker loop in a daemon thread of the current process."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="job-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the worker loop to exit after the current job."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def run_next(self) -> bool:
+        """
+        Claim and run the next due job.
+
+        Returns:
+            True if a job was run
+        """
+        job_id = self._claim()
+        if not job_id:
+            return False
+
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).one()
+            handler = JOB_HANDLERS.get(job.type)
+            payload = json.loads(job.payload) if job.payload else {}
+            job_type, attempts, max_attempts = job.type, job.attempts, job.max_attempts
+        finally:
+            db.close()
+
+        print(f"⏳ [JobWorker] Running {job_type} job {job_id} (attempt {attempts}/{max_attempts})")
+
+        work_db = SessionLocal()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type '{job_type}'")
+            result = handler(JobContext(job_id, payload, work_db))
+            work_db.commit()
+            self._finish(job_id, result)
+            print(f"✅ [JobWorker] {job_type} job {job_id} done")
+        except Exception as e:
+            work_db.rollback()
+            self._fail(job_id, attempts, max_attempts, e)
+        finally:
+            work_db.close()
+
+        return True
+
+    def run_periodic(self) -> None:
+        """Run the periodic tasks that are due (each in its own session)."""
+        now = time.monotonic()
+        for name, (interval, task) in PERIODIC_TASKS.items():
+            if now < self._next_run.get(name, 0.0):
+                continue
+            self._next_run[name] = now + interval
+
+            db = SessionLocal()
+            try:
+                affected = task(db)
+                db.commit()
+                if affected:
+                    print(f"🧹 [JobWorker] {name}: {affected} rows")
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ [JobWorker] Periodic task {name} failed: {e}")
+            finally:
+                db.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _claim(self) -> Optional[str]:
+        """Atomically move the oldest due pending job to running."""
+        db = SessionLocal()
+        try:
+            now = datetime.now()
+            candidate = db.query(Job.id).filter(
+                Job.status == "pending",
+                Job.run_after <= now
+            ).order_by(Job.run_after, Job.created_at).first()
+            if not candidate:
+                return None
+
+            # Conditional update: only one worker wins the job
+            claimed = db.query(Job).filter(
+                Job.id == candidate.id,
+                Job.status == "pending"
+            ).update({
+                "status": "running",
+                "attempts": Job.attempts + 1,
+                "started_at": now,
+                "error": None
+            }, synchronize_session=False)
+            db.commit()
+
+            return candidate.id if claimed else None
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, result: Any) -> None:
+        """Mark a job done with its result."""
+        values = {
+            "status": "done",
+            "progress": 100.0,
+            "result": json.dumps(result) if result is not None else None,
+            "payload": None,  # Inputs may hold passwords or whole CSV files
+            "finished_at": datetime.now()
+        }
+        if isinstance(result, dict) and result.get("message"):
+            values["message"] = str(result["message"])[:255]
+
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail(self, job_id: str, attempts: int, max_attempts: int, error: Exception) -> None:
+        """Schedule a retry with exponential backoff, or mark the job failed."""
+        db = SessionLocal()
+        try:
+            if attempts < max_attempts:
+                delay = self.backoff_seconds * (2 ** (attempts - 1))
+                values = {
+                    "status": "pending",
+                    "run_after": datetime.now() + timedelta(seconds=delay),
+                    "error": str(error)
+                }
+                print(f"⚠️ [JobWorker] Job {job_id} failed (attempt {attempts}/{max_attempts}), retrying in {delay:.0f}s: {error}")
+            else:
+                values = {
+                    "status": "failed",
+                    "error": str(error),
+                    "payload": None,
+                    "finished_at": datetime.now()
+                }
+                print(f"❌ [JobWorker] Job {job_id} failed permanently: {error}")
+
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _requeue_interrupted(self) -> int:
+        """Put jobs that were running when the previous worker died back in the queue."""
+        db = SessionLocal()
+        try:
+            count = db.query(Job).filter(Job.status == "running").update(
+                {"status": "pending", "run_after": datetime.now()},
+                synchronize_session=False
+            )
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+# Global worker instance (run by worker.py, or in-process when JOB_WORKER_EMBEDDED)
+job_worker = JobWorker(
+    poll_interval=settings.JOB_WORKER_POLL_INTERVAL,
+    backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS
+)
+
+
+@periodic_task("purge_finished_jobs", 3600)
+def purge_finished_jobs(db: Session) -> int:
+    """Delete finished jobs older than JOB_RETENTION_DAYS."""
+    cutoff = datetime.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    return db.query(Job).filter(
+        Job.status.in_(("done", "failed")),
+        Job.finished_at < cutoff
+    ).delete(synchronize_session=False)
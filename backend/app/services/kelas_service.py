@@ -0,0 +1,114 @@
+"""
+Kelas Service
+Links students to classes through the `User.kelas_id` foreign key.
+
+`User.kelas` keeps the class code for display and API compatibility;
+`kelas_id` is the indexed integer key that class filters and joins use.
+It is kept in sync automatically:
+
+- ORM writes of `User.kelas` resolve the id (mapper events below)
+- bulk inserts resolve ids with `resolve_kelas_ids` (one query per batch)
+- creating a class links students that already carry its code
+- renaming a class rewrites the denormalized codes with one indexed UPDATE
+
+Callers that change students' class ids move their daily summary counters
+along (`DailySummaryService.move_students`).
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.kelas import Kelas
+from app.models.user import User
+from app.services.user_cache import user_cache
+
+
+def kelas_id_for_code(code: str):
+    """
+    Scalar subquery for the id of the class with `code`, for filters such as
+    `User.kelas_id == kelas_id_for_code(code)`. Evaluated once per statement
+    (unique index on kelas.code); an unknown code matches nothing.
+    """
+    return select(Kelas.id).where(Kelas.code == code).scalar_subquery()
+
+
+def resolve_kelas_ids(db: Session, codes: Iterable[Optional[str]]) -> Dict[str, int]:
+    """
+    Map class codes to class ids in one query.
+
+    Args:
+        db: Database session
+        codes: Class codes (None and unknown codes are left out)
+
+    Returns:
+        Dict of {code: kelas_id}
+    """
+    codes = {code for code in codes if code}
+    if not codes:
+        return {}
+    return dict(db.query(Kelas.code, Kelas.id).filter(Kelas.code.in_(codes)).all())
+
+
+def link_students(db: Session, kelas: Kelas) -> List[int]:
+    """
+    Attach students whose `kelas` code matches a (new) class to it.
+    The caller commits.
+
+    Returns:
+        Ids of the students linked
+    """
+    user_ids = [
+        user_id for user_id, in db.query(User.id).filter(
+            User.kelas == kelas.code,
+            User.kelas_id.is_(None)
+        ).all()
+    ]
+    if user_ids:
+        db.query(User).filter(User.id.in_(user_ids)).update(
+            {"kelas_id": kelas.id}, synchronize_session=False
+        )
+    return user_ids
+
+
+def rename_kelas(db: Session, kelas: Kelas) -> int:
+    """
+    Carry a class code change over to its students (the daily summary is
+    keyed by class id and needs no change). The caller commits.
+
+    Args:
+        db: Database session
+        kelas: Class with its new code
+
+    Returns:
+        Number of students updated
+    """
+    updated = db.query(User).filter(
+        User.kelas_id == kelas.id
+    ).update({"kelas": kelas.code}, synchronize_session=False)
+
+    # Cached user snapshots carry the old code
+    user_cache.clear()
+
+    return updated
+
+
+def _lookup_kelas_id(connection, code: Optional[str]) -> Optional[int]:
+    if not code:
+        return None
+    return connection.execute(select(Kelas.id).where(Kelas.code == code)).scalar()
+
+
+@event.listens_for(User, "before_insert")
+def _set_kelas_id_on_insert(mapper, connection, target: User) -> None:
+    """Resolve kelas_id from the class code of a new user."""
+    if target.kelas_id is None:
+        target.kelas_id = _lookup_kelas_id(connection, target.kelas)
+
+
+@event.listens_for(User, "before_update")
+def _set_kelas_id_on_update(mapper, connection, target: User) -> None:
+    """Re-resolve kelas_id when a user's class code changes."""
+    if inspect(target).attrs.kelas.history.has_changes():
+        target.kelas_id = _lookup_kelas_id(connection, target.kelas)
@@ -0,0 +1,134 @@
+"""
+Model Warm-up
+Loads the recognition models and the face gallery in the background at startup.
+
+The FaceNet model loads lazily (TensorFlow import and weights take 10-30
+seconds) and dlib initialises its buffers on the first inference, so the
+first kiosk scan after a deploy used to pay for all of it and time out.
+The API now starts a warm-up thread from the lifespan hook: it creates the
+active embedding backend, runs one dummy inference (graph compilation,
+BLAS initialisation) and loads the gallery cache. The API keeps serving
+meanwhile; `/health/ready` reports when recognition is ready.
+
+A failed attempt (e.g. `database is locked` while the job worker migrates)
+is retried with exponential backoff, and readiness also follows the live
+state: once a request has loaded the backend and its gallery lazily, the
+API is ready even if the warm-up is still waiting for its next attempt.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+
+# Delay before the first retry, doubled per failed attempt up to the maximum
+RETRY_INITIAL_DELAY = 5.0
+RETRY_MAX_DELAY = 300.0
+
+
+class ModelWarmup:
+    """Background loading of the active embedding backend and its gallery."""
+
+    def __init__(self):
+        self.state = "pending"  # pending, loading, ready, failed (retrying)
+        self.backend_name: Optional[str] = None
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+        self.attempts = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the active backend and its gallery are loaded (by the warm-up or lazily by a request)."""
+        if self.state == "ready":
+            return True
+
+        from app.services.embedding_backends import is_backend_loaded
+        from app.services.face_gallery import face_gallery
+
+        name = settings.FACE_EMBEDDING_BACKEND
+        return is_backend_loaded(name) and name in face_gallery.stats()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the warm-up thread (returns immediately)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        """Warm up, retrying with exponential backoff until it succeeds."""
+        self.backend_name = settings.FACE_EMBEDDING_BACKEND
+        delay = RETRY_INITIAL_DELAY
+
+        while not self.warm_up():
+            if self.ready:
+                # Loaded lazily by a request in the meantime
+                self.state = "ready"
+                return
+            print(f"🔄 Retrying face recognition warm-up in {delay:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    def warm_up(self) -> bool:
+        """
+        One attempt: load the backend, run a dummy inference and load the gallery.
+
+        Returns:
+            True if recognition is ready
+        """
+        from app.db.session import SessionLocal
+        from app.services.embedding_backends import get_backend
+        from app.services.face_gallery import face_gallery
+
+        self.state = "loading"
+        self.attempts += 1
+        started = time.monotonic()
+        print(f"🔄 Warming up face recognition ({self.backend_name}, attempt {self.attempts})...")
+
+        try:
+            backend = get_backend(self.backend_name)
+            backend.warm_up()
+
+            db = SessionLocal()
+            try:
+                gallery = face_gallery.get(db, backend)
+            finally:
+                db.close()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            self.duration = round(time.monotonic() - started, 2)
+            print(f"❌ Face recognition warm-up failed: {e}")
+            return False
+
+        self.state = "ready"
+        self.error = None
+        self.duration = round(time.monotonic() - started, 2)
+        print(f"✅ Face recognition ready in {self.duration}s ({len(gallery)} registered faces)")
+        return True
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Warm-up state for the readiness probe."""
+        return {
+            "state": self.state,
+            "backend": self.backend_name or settings.FACE_EMBEDDING_BACKEND,
+            "attempts": self.attempts,
+            "duration_seconds": self.duration,
+            "error": self.error
+        }
+
+
+# Global model warm-up
+model_warmup = ModelWarmup()
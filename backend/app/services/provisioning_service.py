@@ -0,0 +1,196 @@
+"""
+Student Provisioning Service
+Bulk creation of student accounts (CSV import and bulk create).
+
+Records are consumed lazily and processed in chunks:
+1. One `nim IN (...)` / `email IN (...)` query per chunk finds existing accounts
+2. Passwords of the new students are hashed in a process pool (bcrypt is
+   CPU bound, ~100-300 ms per hash)
+3. The chunk is written with a single executemany INSERT and committed
+
+so a 2,000 student import costs a handful of queries and
+(students x bcrypt cost / CPU cores) of hashing.
+"""
+
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.services.kelas_service import resolve_kelas_ids
+
+
+# Column aliases accepted in student CSV files
+CSV_NIM_COLUMNS = ('nim', 'NIM', 'Nim')
+CSV_NAME_COLUMNS = ('nama', 'name', 'Nama', 'NAME')
+CSV_KELAS_COLUMNS = ('kelas', 'Kelas', 'class')
+
+
+def _first_value(row: Dict, columns: Iterable[str]) -> Optional[str]:
+    for column in columns:
+        if row.get(column):
+            return row[column]
+    return None
+
+
+def has_student_csv_header(text: str) -> bool:
+    """Check that CSV text has a header with NIM and name columns."""
+    header = next(csv.reader(io.StringIO(text)), [])
+    columns = {column.strip() for column in header}
+    return bool(columns & set(CSV_NIM_COLUMNS)) and bool(columns & set(CSV_NAME_COLUMNS))
+
+
+def iter_student_csv(text: str) -> Iterator[Dict]:
+    """
+    Parse student CSV rows lazily (password = NIM, generated email).
+
+    Args:
+        text: CSV content with header (nim,nama[,kelas])
+
+    Yields:
+        Student records for `StudentProvisioningService.provision`
+    """
+    for row in csv.DictReader(io.StringIO(text)):
+        nim = str(_first_value(row, CSV_NIM_COLUMNS) or '').strip()
+        nama = str(_first_value(row, CSV_NAME_COLUMNS) or '').strip()
+        kelas = _first_value(row, CSV_KELAS_COLUMNS)
+
+        if not nim or not nama:
+            continue
+
+        yield {
+            "nim": nim,
+            "name": nama,
+            "email": f"{nim}@mhs.harkatnegeri.ac.id",
+            "password": nim,  # Password = NIM
+            "kelas": kelas
+        }
+
+
+def count_csv_rows(text: str) -> int:
+    """Rough row count of CSV text (lines after the header), for progress."""
+    return max(0, sum(1 for line in text.splitlines() if line.strip()) - 1)
+
+
+class StudentProvisioningService:
+    """Service for creating student accounts in bulk."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    def provision(
+        self,
+        records: Iterable[Dict],
+        total: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Create student accounts, skipping NIMs (and emails) that already exist.
+
+        Every chunk is committed before progress is reported, so a retried
+        job skips the students an earlier attempt already created.
+
+        Args:
+            records: Dicts with nim, name, email, password, kelas (consumed lazily)
+            total: Expected number of records, for progress (optional)
+            on_progress: Called with (processed, total) after every chunk
+
+        Returns:
+            Dict with created, skipped, skipped_nims and errors (reason per skip)
+        """
+        chunk_size = max(1, settings.PROVISION_CHUNK_SIZE)
+        workers = settings.PASSWORD_HASH_PROCESSES or os.cpu_count() or 1
+
+        created = 0
+        skipped_nims: List[str] = []
+        errors: List[str] = []
+        seen_nims = set()
+        seen_emails = set()
+        processed = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in self._chunks(records, chunk_size):
+                processed += len(chunk)
+
+                existing_nims, existing_emails = self._find_existing(chunk)
+
+                new_students = []
+                for record in chunk:
+                    email = record.get("email")
+                    if record["nim"] in existing_nims or record["nim"] in seen_nims:
+                        skipped_nims.append(record["nim"])
+                        errors.append(f"NIM {record['nim']} already exists")
+                        continue
+                    if email and (email in existing_emails or email in seen_emails):
+                        skipped_nims.append(record["nim"])
+                        errors.append(f"Email {email} already exists (NIM {record['nim']})")
+                        continue
+                    seen_nims.add(record["nim"])
+                    if email:
+                        seen_emails.add(email)
+                    new_students.append(record)
+
+                if new_students:
+                    kelas_ids = resolve_kelas_ids(self.db, (record.get("kelas") for record in new_students))
+                    hashes = pool.map(
+                        get_password_hash,
+                        [record["password"] for record in new_students],
+                        chunksize=max(1, len(new_students) // (workers * 4))
+                    )
+                    self.db.execute(insert(User), [
+                        {
+                            "nim": record["nim"],
+                            "name": record["name"],
+                            "email": record.get("email"),
+                            "password_hash": password_hash,
+                            "role": "user",
+                            "kelas": record.get("kelas"),
+                            "kelas_id": kelas_ids.get(record.get("kelas")),
+                            "is_active": True,
+                            "has_face": False
+                        }
+                        for record, password_hash in zip(new_students, hashes)
+                    ])
+                    self.db.commit()
+                    created += len(new_students)
+
+                if on_progress:
+                    on_progress(processed, max(total or 0, processed))
+
+        return {
+            "created": created,
+            "skipped": len(skipped_nims),
+            "skipped_nims": skipped_nims,
+            "errors": errors
+        }
+
+    def _find_existing(self, chunk: List[Dict]):
+        """One query for the NIMs and emails of a chunk that are already taken."""
+        nims = [record["nim"] for record in chunk]
+        emails = [record["email"] for record in chunk if record.get("email")]
+
+        condition = User.nim.in_(nims)
+        if emails:
+            condition = or_(condition, User.email.in_(emails))
+
+        rows = self.db.query(User.nim, User.email).filter(condition).all()
+        return {row.nim for row in rows}, {row.email for row in rows if row.email}
+
+    @staticmethod
+    def _chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
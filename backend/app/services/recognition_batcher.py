@@ -0,0 +1,244 @@
+"""
+Recognition Batcher
+Micro-batching scheduler in front of the embedding backend.
+
+When several kiosks send frames at once, every request used to run its
+own single-image forward pass and gallery match. Requests are now
+collected by a background thread for up to RECOGNITION_BATCH_MAX_WAIT_MS
+(or until RECOGNITION_BATCH_SIZE images are waiting), embedded with one
+`embed_batch` call and matched with one `match_batch` call per gallery;
+each caller's future is then resolved with its own result.
+
+The wait bounds the latency added to a lone request; the batch size
+bounds how much work one pass does. Batching pays off most for FaceNet,
+where a batched forward pass costs little more than a single one.
+
+Async endpoints await the result without blocking the event loop. When
+the batcher is not started, requests are processed inline.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.embedding_backends import EmbeddingBackend
+from app.services.face_matching import EmbeddingGallery
+
+
+@dataclass
+class RecognitionRequest:
+    """One image waiting to be recognized against a gallery."""
+    backend: EmbeddingBackend
+    image: Image.Image
+    gallery: EmbeddingGallery
+    future: Future = field(default_factory=Future)
+
+
+class RecognitionBatcher:
+    """Collects concurrent recognition requests into batched passes."""
+
+    def __init__(self, max_wait_ms: int, batch_size: int):
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_size = max(1, batch_size)
+
+        self._queue: "queue.Queue[RecognitionRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True while the scheduler thread is running."""
+        return self._running
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="recognition-batcher", daemon=True)
+        self._thread.start()
+        print(f"✅ Recognition batcher started (max wait {self.max_wait * 1000:.0f} ms, batch size {self.batch_size})")
+
+    def stop(self) -> None:
+        """Stop the scheduler thread and answer the requests still waiting."""
+        if not self._running:
+            return
+
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=10)
+
+        while not self._queue.empty():
+            self._process(self._take_batch(block=False))
+
+        print(f"👋 Recognition batcher stopped ({self.requests} requests in {self.batches} batches)")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        backend: EmbeddingBackend,
+        image: Image.Image,
+        gallery: EmbeddingGallery
+    ) -> Future:
+        """
+        Schedule one image for recognition.
+
+        Args:
+            backend: Embedding backend
+            image: PIL Image object
+            gallery: Gallery to match against (built with the same backend)
+
+        Returns:
+            Future of (face_detected, match); match is {user_id, confidence,
+            score} or None if not recognized. Raises what the backend raised
+            for this image (e.g. BadRequestException for a poor image).
+        """
+        request = RecognitionRequest(backend=backend, image=image, gallery=gallery)
+        if self._running:
+            self._queue.put(request)
+        else:
+            self._process([request])
+        return request.future
+
+    async def recognize(
+        self,
+        backend: EmbeddingBackend,
+        image: Image.Image,
+        gallery: EmbeddingGallery
+    ) -> Tuple[bool, Optional[Dict]]:
+        """Awaitable `submit` for async endpoints (see submit)."""
+        return await asyncio.wrap_future(self.submit(backend, image, gallery))
+
+    def stats(self) -> Dict:
+        """Scheduler counters."""
+        return {
+            "enabled": self._running,
+            "queued": self._queue.qsize(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "average_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        """Scheduler loop: process a batch whenever requests are waiting."""
+        while self._running:
+            batch = self._take_batch(block=True)
+            if batch:
+                self._process(batch)
+
+    def _take_batch(self, block: bool) -> List[RecognitionRequest]:
+        """Wait for a first request, then collect more for up to max_wait or batch_size."""
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=0.5))
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _process(self, batch: List[RecognitionRequest]) -> None:
+        """Embed each backend's images in one pass, then match per gallery."""
+        if not batch:
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        by_backend: Dict[int, List[RecognitionRequest]] = {}
+        for request in batch:
+            by_backend.setdefault(id(request.backend), []).append(request)
+
+        for requests in by_backend.values():
+            embedded = self._embed(requests)
+
+            by_gallery: Dict[int, List[Tuple[RecognitionRequest, np.ndarray]]] = {}
+            for request, embedding in embedded:
+                if embedding is None:
+                    self._resolve(request.future, (False, None))
+                else:
+                    by_gallery.setdefault(id(request.gallery), []).append((request, embedding))
+
+            for pairs in by_gallery.values():
+                backend, gallery = pairs[0][0].backend, pairs[0][0].gallery
+                try:
+                    matches = backend.match_batch([embedding for _, embedding in pairs], gallery)
+                except Exception as e:
+                    for request, _ in pairs:
+                        self._fail(request.future, e)
+                    continue
+                for (request, _), match in zip(pairs, matches):
+                    self._resolve(request.future, (True, match))
+
+    def _embed(self, requests: List[RecognitionRequest]) -> List[Tuple[RecognitionRequest, Optional[np.ndarray]]]:
+        """
+        Embeddings of one backend's requests in one batched call. If the
+        batch fails, images are retried one by one so only the bad image's
+        caller gets the error.
+        """
+        backend = requests[0].backend
+        try:
+            return list(zip(requests, backend.embed_batch([request.image for request in requests])))
+        except Exception:
+            pass
+
+        embedded = []
+        for request in requests:
+            try:
+                embedded.append((request, backend.embed(request.image)))
+            except Exception as e:
+                self._fail(request.future, e)
+        return embedded
+
+    @staticmethod
+    def _resolve(future: Future, result) -> None:
+        try:
+            future.set_result(result)
+        except InvalidStateError:
+            pass  # Caller went away (request cancelled)
+
+    @staticmethod
+    def _fail(future: Future, error: Exception) -> None:
+        try:
+            future.set_exception(error)
+        except InvalidStateError:
+            pass
+
+
+# Global recognition batcher
+recognition_batcher = RecognitionBatcher(
+    max_wait_ms=settings.RECOGNITION_BATCH_MAX_WAIT_MS,
+    batch_size=settings.RECOGNITION_BATCH_SIZE
+)
@@ -0,0 +1,330 @@
+"""
+Report Export Service
+Builds Excel and PDF attendance reports for the `report_export` job.
+
+Exports for big ranges take tens of seconds, so the request handler only
+enqueues a job and returns its id; the job worker renders the file with
+streaming writers (write-only openpyxl workbook, page-by-page ReportLab
+canvas) while rows come from a server-side cursor.
+
+Finished files are cached on disk by (format, range, kelas, data version).
+The data version is a fingerprint of the daily summary counters for that
+range, which change with every insert, status change or rebuild, plus the
+latest student and class edit times (names, NIMs and class codes are in
+the rows), so repeat downloads of unchanged data are served instantly.
+"""
+
+import glob
+import hashlib
+import os
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.daily_summary import DailyAttendanceSummary
+from app.models.kelas import Kelas
+from app.models.user import User
+from app.services.archive_service import AttendanceArchiveService
+from app.services.daily_summary_service import DailySummaryService
+from app.services.kelas_service import kelas_id_for_code
+from app.utils.csv_export import STREAM_BATCH_SIZE
+from app.utils.helpers import ensure_directory_exists
+
+
+REPORT_HEADER = ["Tanggal", "Nama", "NIS", "Kelas", "Status", "Method", "Confidence"]
+
+EXPORT_FORMATS = {
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("pdf", "application/pdf"),
+}
+
+# Rows rendered between progress updates
+PROGRESS_EVERY = 500
+
+
+def build_report_query(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    kelas: Optional[str] = None
+):
+    """
+    Column query behind teacher report exports, ordered by (date, nim).
+
+    Args:
+        db: Database session
+        start_date: Start date (optional)
+        end_date: End date (optional)
+        kelas: Class code filter (optional)
+
+    Returns:
+        Query of (date, name, nim, kelas, status, confidence)
+    """
+    source = AttendanceArchiveService(db).source(start_date)
+    query = db.query(
+        source.date,
+        User.name,
+        User.nim,
+        User.kelas,
+        source.status,
+        source.confidence
+    ).join(User, source.user_id == User.id)
+
+    if kelas:
+        query = query.filter(User.kelas_id == kelas_id_for_code(kelas))
+    if start_date:
+        query = query.filter(source.date >= start_date)
+    if end_date:
+        query = query.filter(source.date <= end_date)
+
+    return query.order_by(source.date, User.nim)
+
+
+def format_report_row(row) -> List[str]:
+    """Format a `build_report_query` row in REPORT_HEADER order."""
+    day, name, nim, kelas, status, confidence = row
+    return [
+        day.strftime("%Y-%m-%d") if day else "",
+        name or "",
+        nim or "",
+        kelas or "",
+        status,
+        "face_recognition" if confidence else "manual",
+        f"{confidence:.1f}%" if confidence else ""
+    ]
+
+
+class ReportExportService:
+    """Renders report files; used by the `report_export` job handler."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    def get_data_version(
+        self,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        kelas: Optional[str]
+    ) -> str:
+        """
+        Fingerprint the data of a range's report.
+
+        Attendance changes show in the range's daily summary counters (any
+        insert, status edit or delete updates them). Exported rows also
+        carry each student's name, NIM and class code, so the latest user
+        and class edit times are part of the fingerprint as well.
+
+        Returns:
+            Short hex digest that changes whenever the range's data changes
+        """
+        query = self.db.query(
+            func.count(DailyAttendanceSummary.id),
+            func.coalesce(func.sum(DailyAttendanceSummary.total), 0),
+            func.coalesce(func.sum(DailyAttendanceSummary.hadir), 0),
+            func.coalesce(func.sum(DailyAttendanceSummary.terlambat), 0),
+            func.coalesce(func.sum(DailyAttendanceSummary.izin), 0),
+            func.coalesce(func.sum(DailyAttendanceSummary.sakit), 0),
+            func.max(DailyAttendanceSummary.updated_at),
+            select(func.max(User.updated_at)).scalar_subquery(),
+            select(func.max(Kelas.updated_at)).scalar_subquery()
+        )
+
+        if start_date:
+            query = query.filter(DailyAttendanceSummary.date >= start_date)
+        if end_date:
+            query = query.filter(DailyAttendanceSummary.date <= end_date)
+        if kelas:
+            query = query.filter(DailyAttendanceSummary.kelas_id == kelas_id_for_code(kelas))
+
+        fingerprint = "|".join(str(value) for value in query.one())
+        return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+    def iter_rows(
+        self,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        kelas: Optional[str]
+    ) -> Iterator[List[str]]:
+        """Stream formatted report rows through a server-side cursor."""
+        query = build_report_query(self.db, start_date, end_date, kelas)
+        for row in query.execution_options(stream_results=True).yield_per(STREAM_BATCH_SIZE):
+            yield format_report_row(row)
+
+    def write_excel(
+        self,
+        path: str,
+        title: str,
+        rows: Iterator[List[str]],
+        on_row: Callable[[], None]
+    ) -> None:
+        """
+        Write rows to an xlsx file with a write-only (constant memory) workbook.
+
+        Args:
+            path: Output file path
+            title: Report title (first row)
+            rows: Formatted report rows
+            on_row: Called after each row (progress reporting)
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Laporan Absensi")
+        sheet.append([title])
+        sheet.append([])
+        sheet.append(REPORT_HEADER)
+
+        for row in rows:
+            sheet.append(row)
+            on_row()
+
+        workbook.save(path)
+
+    def write_pdf(
+        self,
+        path: str,
+        title: str,
+        rows: Iterator[List[str]],
+        on_row: Callable[[], None]
+    ) -> None:
+        """
+        Render rows to a PDF one page at a time (landscape A4, header per page).
+
+        Args:
+            path: Output file path
+            title: Report title (top of every page)
+            rows: Formatted report rows
+            on_row: Called after each row (progress reporting)
+        """
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.pdfgen import canvas
+
+        page_width, page_height = landscape(A4)
+        margin = 36
+        line_height = 14
+        column_x = [margin + offset for offset in (0, 80, 300, 400, 500, 580, 680)]
+
+        pdf = canvas.Canvas(path, pagesize=(page_width, page_height))
+        page = 0
+
+        def start_page() -> float:
+            nonlocal page
+            page += 1
+            pdf.setFont("Helvetica-Bold", 12)
+            pdf.drawString(margin, page_height - margin, title)
+            pdf.setFont("Helvetica", 8)
+            pdf.drawRightString(page_width - margin, page_height - margin, f"Halaman {page}")
+            y = page_height - margin - 2 * line_height
+            pdf.setFont("Helvetica-Bold", 9)
+            for x, label in zip(column_x, REPORT_HEADER):
+                pdf.drawString(x, y, label)
+            pdf.setFont("Helvetica", 9)
+            return y - line_height
+
+        y = start_page()
+        for row in rows:
+            if y < margin:
+                pdf.showPage()
+                y = start_page()
+            for x, value in zip(column_x, row):
+                pdf.drawString(x, y, str(value)[:40])
+            y -= line_height
+            on_row()
+
+        pdf.save()
+
+    def plan(
+        self,
+        export_format: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kelas: Optional[str] = None
+    ) -> Dict:
+        """
+        Work out where an export lives in the cache.
+
+        Args:
+            export_format: "excel" or "pdf"
+            start_date: Start date (optional)
+            end_date: End date (optional)
+            kelas: Class code filter (optional)
+
+        Returns:
+            Dict with cache_path, filename, media_type, range_key and
+            cached (file for the current data version already exists)
+        """
+        extension, media_type = EXPORT_FORMATS[export_format]
+        version = self.get_data_version(start_date, end_date, kelas)
+        range_key = hashlib.sha1(
+            f"{export_format}|{start_date}|{end_date}|{kelas or ''}".encode()
+        ).hexdigest()[:16]
+        cache_path = os.path.join(settings.REPORT_EXPORT_DIR, f"report_{range_key}_{version}.{extension}")
+        filename = f"report_{start_date or 'all'}_{end_date or 'all'}{'_' + kelas if kelas else ''}.{extension}"
+
+        return {
+            "cache_path": cache_path,
+            "filename": filename,
+            "media_type": media_type,
+            "range_key": range_key,
+            "cached": os.path.exists(cache_path)
+        }
+
+    def render(
+        self,
+        export_format: str,
+        plan: Dict,
+        title: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kelas: Optional[str] = None,
+        on_progress: Optional[Callable[[float], None]] = None
+    ) -> int:
+        """
+        Render an export into the cache directory (atomic rename when done)
+        and delete cached files of older data versions of the same export.
+
+        Args:
+            export_format: "excel" or "pdf"
+            plan: Result of `plan`
+            title: Report title
+            start_date: Start date (optional)
+            end_date: End date (optional)
+            kelas: Class code filter (optional)
+            on_progress: Called with progress in % every PROGRESS_EVERY rows
+
+        Returns:
+            Number of rows written
+        """
+        ensure_directory_exists(settings.REPORT_EXPORT_DIR)
+        cache_path = plan["cache_path"]
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+
+        expected = DailySummaryService(self.db).get_range_counts(start_date, end_date, kelas)["total"]
+        written = 0
+
+        def on_row() -> None:
+            nonlocal written
+            written += 1
+            if on_progress and expected and written % PROGRESS_EVERY == 0:
+                on_progress(min(99.0, written / expected * 100))
+
+        try:
+            rows = self.iter_rows(start_date, end_date, kelas)
+            if export_format == "excel":
+                self.write_excel(tmp_path, title, rows, on_row)
+            else:
+                self.write_pdf(tmp_path, title, rows, on_row)
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        for path in glob.glob(os.path.join(settings.REPORT_EXPORT_DIR, f"report_{plan['range_key']}_*")):
+            if path != cache_path and not path.endswith(".tmp"):
+                os.remove(path)
+
+        return written
@@ -0,0 +1,215 @@
+"""
+Session Attendance Service
+Attendance per class session (teacher roll calls and bulk face scans).
+
+A session is (kelas, date, slot). Marks are read and written with one
+query on the (kelas_id, date, ...) unique index per roll call, and each
+student's daily `absensi` record is derived in the same transaction:
+
+- the first present/excused mark of the day creates the daily record
+  (streaks and daily summary counters are updated as for kiosk check-ins)
+- a later, better mark (e.g. terlambat -> hadir) upgrades it
+- "alpa" never creates a daily record (absent = no record)
+
+so kiosk check-ins and teacher roll calls end up in the same daily row.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.models.absensi import Absensi
+from app.models.absensi_sesi import AbsensiSesi
+from app.models.kelas import Kelas
+from app.models.user import User
+from app.services.attendance_queue import attendance_queue
+from app.services.attendance_service import AttendanceService
+
+
+# Statuses a teacher can record for a session
+SESSION_STATUSES = ("hadir", "terlambat", "izin", "sakit", "alpa")
+
+# Statuses that have a daily record, ranked (a higher rank replaces a lower one)
+DAILY_STATUS_RANK = {"izin": 1, "sakit": 1, "terlambat": 2, "hadir": 3}
+
+
+class SessionAttendanceService:
+    """Service for class session attendance."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    def get_roll_call(self, kelas: Kelas, target_date: date, slot: int = 1) -> List[Dict]:
+        """
+        Class roster with each student's mark for a session (one query).
+
+        Args:
+            kelas: Class
+            target_date: Session date
+            slot: Schedule slot of the day
+
+        Returns:
+            List of {id, name, nis, status, daily_status}; status is the
+            session mark (None if not marked yet), daily_status the student's
+            daily record (e.g. a kiosk check-in)
+        """
+        rows = self.db.query(
+            User.id, User.name, User.nim, AbsensiSesi.status, Absensi.status
+        ).outerjoin(
+            AbsensiSesi,
+            and_(
+                AbsensiSesi.kelas_id == kelas.id,
+                AbsensiSesi.date == target_date,
+                AbsensiSesi.slot == slot,
+                AbsensiSesi.user_id == User.id
+            )
+        ).outerjoin(
+            Absensi,
+            and_(Absensi.user_id == User.id, Absensi.date == target_date)
+        ).filter(
+            User.role == "user",
+            User.kelas_id == kelas.id
+        ).order_by(User.name).all()
+
+        return [
+            {
+                "id": student_id,
+                "name": name,
+                "nis": nim,
+                "status": session_status,
+                "daily_status": daily_status
+            }
+            for student_id, name, nim, session_status, daily_status in rows
+        ]
+
+    def mark(
+        self,
+        kelas: Kelas,
+        target_date: date,
+        marks: List[Dict],
+        slot: int = 1,
+        method: str = "manual",
+        marked_by: Optional[int] = None,
+        overwrite: bool = True
+    ) -> List[int]:
+        """
+        Record session marks and derive the daily records, then commit.
+
+        Args:
+            kelas: Class
+            target_date: Session date
+            marks: Dicts with user_id, status and optional keterangan/confidence
+            slot: Schedule slot of the day
+            method: manual or face_recognition
+            marked_by: Teacher user ID (optional)
+            overwrite: Replace existing marks (False keeps the first mark,
+                e.g. for repeated face scans)
+
+        Returns:
+            IDs of the students whose mark was written
+        """
+        marks_by_user = {
+            mark["user_id"]: mark
+            for mark in marks
+            if mark.get("user_id") and mark.get("status") in SESSION_STATUSES
+        }
+        if not marks_by_user:
+            return []
+
+        # Only students on the class roster can be marked
+        roster = {
+            user_id for (user_id,) in self.db.query(User.id).filter(
+                User.id.in_(marks_by_user),
+                User.role == "user",
+                User.kelas_id == kelas.id
+            ).all()
+        }
+
+        existing = {
+            record.user_id: record
+            for record in self.db.query(AbsensiSesi).filter(
+                AbsensiSesi.kelas_id == kelas.id,
+                AbsensiSesi.date == target_date,
+                AbsensiSesi.slot == slot,
+                AbsensiSesi.user_id.in_(roster)
+            ).all()
+        }
+
+        now = datetime.now()
+        written = {}
+        for user_id in roster:
+            mark = marks_by_user[user_id]
+            record = existing.get(user_id)
+            if record is None:
+                record = AbsensiSesi(kelas_id=kelas.id, user_id=user_id, date=target_date, slot=slot)
+                self.db.add(record)
+            elif not overwrite:
+                continue
+
+            record.status = mark["status"]
+            record.method = method
+            record.confidence = mark.get("confidence")
+            record.keterangan = mark.get("keterangan")
+            record.marked_by = marked_by
+            record.timestamp = now
+            written[user_id] = mark["status"]
+
+        daily = self._derive_daily(target_date, written, method)
+        self.db.commit()
+
+        # Later kiosk check-ins must see these as today's records
+        if attendance_queue.enabled:
+            attendance_queue.record_existing(daily)
+
+        return list(written)
+
+    def _derive_daily(self, target_date: date, statuses: Dict[int, str], method: str) -> List[Absensi]:
+        """
+        Create or upgrade daily `absensi` records from session marks (no commit).
+
+        Returns:
+            The daily records created or upgraded
+        """
+        statuses = {
+            user_id: status for user_id, status in statuses.items()
+            if status in DAILY_STATUS_RANK
+        }
+        if not statuses:
+            return []
+
+        daily = {
+            record.user_id: record
+            for record in self.db.query(Absensi).filter(
+                Absensi.user_id.in_(statuses),
+                Absensi.date == target_date
+            ).all()
+        }
+
+        created = []
+        upgraded = []
+        for user_id, status in statuses.items():
+            record = daily.get(user_id)
+            if record is None:
+                # A kiosk check-in still waiting in the write queue is the daily record
+                if target_date == date.today() and attendance_queue.enabled and attendance_queue.get_today(user_id):
+                    continue
+                record = Absensi(
+                    user_id=user_id,
+                    date=target_date,
+                    timestamp=datetime.now(),
+                    status=status,
+                    device_info=f"Class session ({method})"
+                )
+                self.db.add(record)
+                created.append(record)
+            elif DAILY_STATUS_RANK[status] > DAILY_STATUS_RANK.get(record.status, 0):
+                old_status = record.status
+                record.status = status
+                AttendanceService.apply_status_change(self.db, record, old_status)
+                upgraded.append(record)
+
+        AttendanceService.apply_inserts(self.db, created)
+        return created + upgraded
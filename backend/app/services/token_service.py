@@ -0,0 +1,112 @@
+"""
+Refresh Token Service
+Issues, rotates and revokes refresh tokens.
+
+Only a SHA-256 digest of each token is stored (fixed 64 chars, unique
+index), so lookups are a single index probe and a leaked database does not
+leak usable tokens. Revoked and expired rows are purged in bounded batches
+by the job worker, keeping the table proportional to active sessions.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_refresh_token, hash_token
+from app.models.refresh_token import RefreshToken
+
+
+class RefreshTokenService:
+    """Service for refresh token storage."""
+
+    def __init__(self, db: Session):
+        """Initialize service with database session."""
+        self.db = db
+
+    def issue(self, user_id: int) -> str:
+        """
+        Create a refresh token for a user and store its hash.
+        The caller commits.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            The refresh token (only ever returned to the client)
+        """
+        token = create_refresh_token(data={"sub": user_id})
+        self.db.add(RefreshToken(
+            user_id=user_id,
+            token_hash=hash_token(token),
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        return token
+
+    def get_active(self, token: str, user_id: int) -> Optional[RefreshToken]:
+        """
+        Find a stored, unrevoked and unexpired refresh token.
+
+        Args:
+            token: Refresh token from the client
+            user_id: User ID from the token payload
+
+        Returns:
+            RefreshToken row or None
+        """
+        return self.db.query(RefreshToken).filter(
+            RefreshToken.token_hash == hash_token(token),
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked == False,
+            RefreshToken.expires_at > datetime.utcnow()
+        ).first()
+
+    def revoke_all(self, user_id: int) -> int:
+        """
+        Revoke every active refresh token of a user in one indexed UPDATE.
+        The caller commits.
+
+        Returns:
+            Number of tokens revoked
+        """
+        return self.db.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked == False
+        ).update({"revoked": True}, synchronize_session=False)
+
+    def purge(self, batch_size: int = 1000, max_batches: int = 100) -> int:
+        """
+        Delete revoked and expired tokens, one bounded batch per transaction
+        so the purge never holds a long write lock.
+
+        Args:
+            batch_size: Rows deleted per batch
+            max_batches: Upper bound of batches per call
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        for _ in range(max_batches):
+            ids = [
+                row.id for row in self.db.query(RefreshToken.id).filter(
+                    or_(
+                        RefreshToken.revoked == True,
+                        RefreshToken.expires_at <= datetime.utcnow()
+                    )
+                ).limit(batch_size).all()
+            ]
+            if not ids:
+                break
+
+            deleted += self.db.query(RefreshToken).filter(
+                RefreshToken.id.in_(ids)
+            ).delete(synchronize_session=False)
+            self.db.commit()
+
+            if len(ids) < batch_size:
+                break
+
+        return deleted
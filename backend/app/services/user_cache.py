@@ -0,0 +1,139 @@
+"""
+User Cache
+Short-TTL, size-bounded cache of authenticated user snapshots.
+
+`get_current_user` runs on every authenticated request; with the cache the
+user row is read once per TTL instead of once per call. A cached snapshot
+(identity, role, class and flags) is attached to the request's session
+with `merge(load=False)`, so endpoints still get a regular `User` instance:
+columns outside the snapshot (streak, timestamps, password hash) and
+relationships load lazily, and changes are flushed as usual.
+
+Entries are dropped whenever a snapshot column of the user is updated or
+the user is deleted through the ORM in this process; other processes see
+changes after at most USER_CACHE_TTL_SECONDS.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+
+# Columns kept in a snapshot: auth/role checks plus what UserResponse shows.
+# The streak columns are left out on purpose: attendance writes update them
+# on this same instance and must never start from a cached value.
+SNAPSHOT_FIELDS = (
+    "id", "nim", "name", "email", "role", "kelas", "is_active", "has_face",
+    "created_at", "last_login"
+)
+
+
+class UserSnapshotCache:
+    """Thread-safe LRU cache of user snapshots with per-entry expiry."""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get_user(self, db: Session, user_id: int) -> Optional[User]:
+        """
+        Get a user by id, from the cache when possible.
+
+        Args:
+            db: Request database session (the user is attached to it)
+            user_id: User ID
+
+        Returns:
+            User instance or None if not found
+        """
+        if not self.enabled:
+            return db.query(User).filter(User.id == user_id).first()
+
+        snapshot = self._get(user_id)
+        if snapshot is not None:
+            user = User(**snapshot)
+            # Detached with an identity: unset columns load on first access
+            make_transient_to_detached(user)
+            return db.merge(user, load=False)
+
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            self._put(user_id, {field: getattr(user, field) for field in SNAPSHOT_FIELDS})
+        return user
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's snapshot."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop all snapshots."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Cache size and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0
+            }
+
+    def _get(self, user_id: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return dict(entry[1])
+
+    def _put(self, user_id: int, snapshot: Dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# Global cache instance
+user_cache = UserSnapshotCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE
+)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target: User) -> None:
+    """Invalidate when a snapshot column changed (streak updates don't count)."""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in SNAPSHOT_FIELDS):
+        user_cache.invalidate(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
@@ -0,0 +1,70 @@
+"""
+Streaming CSV export helpers.
+
+Exports are produced by generators so rows go from a server-side cursor to
+the client in chunks and memory stays flat regardless of the date range.
+
+The request-scoped session from `get_db` is closed before a streaming
+response body is sent, so export generators open their own session with
+`stream_rows` and close it when the stream ends (or the client disconnects).
+"""
+
+import csv
+import io
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy.orm import Query, Session
+
+from app.db.session import SessionLocal
+
+
+# Rows fetched per round-trip from the database cursor
+STREAM_BATCH_SIZE = 1000
+
+# Rows written per emitted chunk
+CSV_CHUNK_ROWS = 500
+
+
+def stream_rows(build_query: Callable[[Session], Query], batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+    """
+    Iterate a query's rows through a server-side cursor in its own session.
+
+    Args:
+        build_query: Builds the query from the export's session
+        batch_size: Rows fetched per round-trip
+
+    Yields:
+        Result rows
+    """
+    db = SessionLocal()
+    try:
+        query = build_query(db).execution_options(stream_results=True)
+        yield from query.yield_per(batch_size)
+    finally:
+        db.close()
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence[Any]], chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Encode rows as CSV, emitting one chunk every `chunk_rows` rows.
+
+    Args:
+        header: Header row
+        rows: Row values (consumed lazily)
+        chunk_rows: Rows per emitted chunk
+
+    Yields:
+        CSV text chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
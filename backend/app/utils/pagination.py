@@ -0,0 +1,104 @@
+"""
+Keyset (cursor) pagination for attendance listings.
+
+Pages are ordered by (date DESC, id DESC) and continue from the last row of
+the previous page, so every page is an index range scan no matter how deep
+it is. The cursor is an opaque URL-safe token; clients pass back the
+`next_cursor` of the previous response.
+"""
+
+import base64
+from datetime import date
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from app.core.exceptions import BadRequestException
+from app.models.absensi import Absensi
+
+
+def encode_cursor(day: date, record_id: int) -> str:
+    """
+    Encode a (date, id) position as an opaque cursor token.
+
+    Args:
+        day: Attendance date of the last row
+        record_id: Attendance id of the last row
+
+    Returns:
+        URL-safe cursor token
+    """
+    raw = f"{day.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """
+    Decode a cursor token produced by `encode_cursor`.
+
+    Args:
+        cursor: Cursor token
+
+    Returns:
+        Tuple of (date, id)
+
+    Raises:
+        BadRequestException: If the token is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, record_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return date.fromisoformat(day), int(record_id)
+    except (ValueError, UnicodeDecodeError):
+        raise BadRequestException("Invalid pagination cursor")
+
+
+def paginate_attendance(
+    query,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    key: Callable[[Any], Absensi] = lambda row: row,
+    entity: Any = Absensi
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of an attendance query ordered by (date DESC, id DESC).
+
+    With a cursor the page starts right after the cursor position. Without
+    one, `skip` is still honoured so existing offset-based clients keep
+    working; the returned cursor lets them switch to keyset paging.
+
+    Args:
+        query: Query selecting Absensi (alone or with joined entities)
+        limit: Page size
+        cursor: Cursor from the previous page (optional)
+        skip: Offset, only used without a cursor
+        key: Extracts the Absensi entity from a result row
+        entity: Attendance entity the query selects from (`Absensi`, or the
+            live + archive alias from `AttendanceArchiveService.source`)
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                entity.date < cursor_date,
+                and_(entity.date == cursor_date, entity.id < cursor_id)
+            )
+        )
+
+    query = query.order_by(entity.date.desc(), entity.id.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = key(rows[-1])
+        next_cursor = encode_cursor(last.date, last.id)
+
+    return rows, next_cursor
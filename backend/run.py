@@ -2,6 +2,10 @@
 Simple runner script for the FastAPI application.
 """
 
+import subprocess
+import sys
+from pathlib import Path
+
 import uvicorn
 from app.core.config import settings
 
@@ -13,10 +17,24 @@ if __name__ == "__main__":
     print(f"🔧 Debug Mode: {settings.DEBUG}")
     print("="*60)
     
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8001,
-        reload=settings.DEBUG,
-        log_level="info"
-    )
+    # Background job worker (imports, exports) runs in its own process
+    worker = None
+    if settings.JOB_WORKER_ENABLED and not settings.JOB_WORKER_EMBEDDED:
+        worker = subprocess.Popen([sys.executable, str(Path(__file__).parent / "worker.py")])
+        print(f"⚙️  Job worker started (pid {worker.pid})")
+    
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8001,
+            reload=settings.DEBUG,
+            log_level="info"
+        )
+    finally:
+        if worker:
+            worker.terminate()
+            try:
+                worker.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                worker.kill()
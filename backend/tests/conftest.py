@@ -0,0 +1,140 @@
+"""
+Shared test fixtures: the API on a scratch SQLite database, seeded with
+classes, students, teachers and attendance, plus an SQL query counter.
+"""
+
+import os
+import tempfile
+
+# Settings are read when the app is imported; point them at a scratch database first
+_db_dir = tempfile.mkdtemp(prefix="smart_absensi_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'absensi.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-that-is-long-enough-32")
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-key-that-is-long-enough")
+
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.security import create_access_token
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.absensi import Absensi
+from app.models.face_encoding import FaceEncoding
+from app.models.kelas import Kelas
+from app.models.user import User
+from app.services.daily_summary_service import DailySummaryService
+
+
+KELAS_CODES = ("X-1", "X-2", "XI-1", "XI-2", "XII-1")
+STUDENTS_PER_KELAS = 6
+TEACHERS = 5
+ATTENDANCE_DAYS = 3
+
+
+class QueryCounter:
+    """Records the SQL statements executed on an engine while active."""
+
+    def __init__(self, bind: Engine):
+        self.bind = bind
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.bind, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.bind, "before_cursor_execute", self._before_cursor_execute)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+def _seed(db) -> User:
+    """Classes, students (some with faces), teachers and a few days of attendance."""
+    admin = User(nim="admin", name="Administrator", password_hash="x", role="admin")
+    db.add(admin)
+
+    for code in KELAS_CODES:
+        db.add(Kelas(code=code, name=f"Kelas {code}"))
+    db.flush()
+
+    users = []
+    for code in KELAS_CODES:
+        for i in range(STUDENTS_PER_KELAS):
+            users.append(User(
+                nim=f"{code}-{i:03d}",
+                name=f"Siswa {code} {i}",
+                password_hash="x",
+                role="user",
+                kelas=code,
+                has_face=i % 2 == 0
+            ))
+    for i in range(TEACHERS):
+        users.append(User(nim=f"guru-{i:03d}", name=f"Guru {i}", password_hash="x", role="teacher"))
+    db.add_all(users)
+    db.flush()
+
+    today = date.today()
+    for user in users:
+        if user.has_face:
+            db.add(FaceEncoding(user_id=user.id, encoding_data=b"\x00", model_version="dlib"))
+        for offset in range(ATTENDANCE_DAYS):
+            day = today - timedelta(days=offset)
+            db.add(Absensi(
+                user_id=user.id,
+                date=day,
+                timestamp=datetime.combine(day, datetime.min.time()) + timedelta(hours=7),
+                status="hadir" if offset else "terlambat",
+                confidence=0.9
+            ))
+    db.flush()
+
+    DailySummaryService(db).rebuild()
+    db.commit()
+    return admin
+
+
+@pytest.fixture(scope="session")
+def admin_id() -> int:
+    """Migrate and seed the scratch database once; returns the admin's id."""
+    run_migrations(engine)
+
+    db = SessionLocal()
+    try:
+        return _seed(db).id
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def client(admin_id) -> TestClient:
+    """API client (without the lifespan hook: no model warm-up or background writers)."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def admin_headers(admin_id) -> dict:
+    """Authorization header of the seeded admin."""
+    token = create_access_token({"sub": admin_id, "role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager counting the statements executed on the app's engine."""
+    @contextmanager
+    def counter():
+        with QueryCounter(engine) as queries:
+            yield queries
+    return counter
@@ -0,0 +1,38 @@
+"""
+Admin listings must run a fixed number of queries per request, however
+many rows a page holds (no per-row lookups).
+"""
+
+import pytest
+
+
+SMALL_PAGE = 2
+LARGE_PAGE = 20
+
+LISTINGS = (
+    "/api/v1/admin/attendance",
+    "/api/v1/admin/students",
+    "/api/v1/admin/teachers",
+    "/api/v1/admin/classrooms",
+)
+
+
+@pytest.mark.parametrize("path", LISTINGS)
+def test_listing_query_count_does_not_grow_with_page_size(client, admin_headers, count_queries, path):
+    # Warm the per-process caches (user snapshot of the admin) first
+    assert client.get(path, params={"limit": 1}, headers=admin_headers).status_code == 200
+
+    counts, sizes = {}, {}
+    for limit in (SMALL_PAGE, LARGE_PAGE):
+        with count_queries() as queries:
+            response = client.get(path, params={"limit": limit}, headers=admin_headers)
+
+        assert response.status_code == 200, response.text
+        counts[limit] = queries.count
+        sizes[limit] = len(response.json()["items"])
+
+    assert sizes[LARGE_PAGE] > sizes[SMALL_PAGE]
+    assert counts[SMALL_PAGE] == counts[LARGE_PAGE], (
+        f"{path}: {counts[SMALL_PAGE]} queries for {sizes[SMALL_PAGE]} rows, "
+        f"{counts[LARGE_PAGE]} queries for {sizes[LARGE_PAGE]} rows"
+    )
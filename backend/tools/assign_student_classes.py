@@ -17,6 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.models.user import User
+import app.services.kelas_service  # noqa: keeps users.kelas_id in sync with the assigned code
+from app.services.daily_summary_service import DailySummaryService
 
 # Class options matching seed_kelas.py structure
 CLASSES = {
@@ -56,6 +58,9 @@ def assign_classes(db: Session):
         updated_count += 1
     
     try:
+        # Attendance counts towards each student's current class
+        db.flush()
+        DailySummaryService(db).rebuild()
         db.commit()
         print(f"\n✅ Successfully assigned classes to {updated_count} students")
     except Exception as e:
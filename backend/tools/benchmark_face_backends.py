@@ -0,0 +1,98 @@
+"""
+Benchmark the embedding backends on the stored registration photos.
+
+For every backend: embedding time per photo (one batch per user), and a
+leave-one-out identification test: each photo is matched against all
+other photos with the backend's metric and calibrated threshold.
+  accuracy     - closest other photo is the same student and passes
+  false accept - closest other photo is another student and passes
+  rejected     - closest other photo does not pass the threshold
+
+Usage:
+    python tools/benchmark_face_backends.py            # all backends
+    python tools/benchmark_face_backends.py facenet    # selected backends
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.face_encoding import FaceEncoding
+from app.services.embedding_backends import EMBEDDING_BACKENDS, get_backend
+
+
+def load_photos():
+    """Stored registration photos as {user_id: [PIL Image]}."""
+    db = SessionLocal()
+    try:
+        rows = db.query(FaceEncoding.user_id, FaceEncoding.image_path).filter(
+            FaceEncoding.image_path.isnot(None)
+        ).distinct().all()
+    finally:
+        db.close()
+
+    photos = defaultdict(list)
+    for user_id, image_path in rows:
+        full_path = os.path.join(settings.FACE_STORAGE_PATH, image_path)
+        if os.path.exists(full_path):
+            photos[user_id].append(Image.open(full_path).convert("RGB"))
+    return photos
+
+
+def benchmark_backend(name: str, photos):
+    """Print timing and leave-one-out results of one backend."""
+    backend = get_backend(name)
+
+    user_ids, embeddings = [], []
+    started = time.perf_counter()
+    for user_id, images in photos.items():
+        for embedding in backend.embed_batch(images):
+            if embedding is not None:
+                user_ids.append(user_id)
+                embeddings.append(embedding)
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(images) for images in photos.values())
+    print(f"\n📊 {backend.name} ({backend.dimension}D, {backend.metric}, threshold {backend.threshold})")
+    print(f"   Embedding: {elapsed / max(total, 1) * 1000:.1f} ms/photo, faces found in {len(embeddings)}/{total} photos")
+    if len(embeddings) < 2:
+        print("   Not enough faces for identification test")
+        return
+
+    gallery = backend.build_gallery(zip(user_ids, embeddings))
+    scores = gallery.scores(np.vstack(embeddings))
+    # Leave one out: a photo never matches itself
+    np.fill_diagonal(scores, -np.inf if backend.metric == "cosine" else np.inf)
+    best = scores.argmax(axis=1) if backend.metric == "cosine" else scores.argmin(axis=1)
+
+    correct = false_accept = rejected = 0
+    for row, column in enumerate(best):
+        if not backend.is_match(scores[row, column]):
+            rejected += 1
+        elif gallery.user_ids[column] == gallery.user_ids[row]:
+            correct += 1
+        else:
+            false_accept += 1
+
+    n = len(embeddings)
+    print(f"   Accuracy: {correct / n:.1%}, false accept: {false_accept / n:.1%}, rejected: {rejected / n:.1%}")
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or sorted(EMBEDDING_BACKENDS)
+    photos = load_photos()
+    print(f"📸 {sum(len(images) for images in photos.values())} photos of {len(photos)} students")
+    for name in names:
+        try:
+            benchmark_backend(name, photos)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
@@ -0,0 +1,91 @@
+"""
+Enroll the registered faces for an embedding backend.
+Re-embeds every stored registration photo (FACE_STORAGE_PATH) with the
+backend and stores the vectors under its name, so a deployment can
+switch FACE_EMBEDDING_BACKEND without students registering again.
+Existing vectors of that backend are replaced; other backends are kept.
+
+Usage:
+    python tools/enroll_face_backend.py facenet
+"""
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.face_encoding import FaceEncoding
+from app.services.embedding_backends import EMBEDDING_BACKENDS, get_backend
+
+
+def enroll_backend(name: str):
+    """Embed all stored registration photos with one backend."""
+    backend = get_backend(name)
+    db = SessionLocal()
+
+    try:
+        # Registration photos per user (each photo once, whatever backend stored it)
+        photos = defaultdict(dict)
+        for user_id, image_path, confidence in db.query(
+            FaceEncoding.user_id, FaceEncoding.image_path, FaceEncoding.confidence
+        ).filter(FaceEncoding.image_path.isnot(None)).all():
+            photos[user_id].setdefault(image_path, confidence)
+
+        enrolled = 0
+        for user_id, user_photos in photos.items():
+            paths, images = [], []
+            for image_path in user_photos:
+                full_path = os.path.join(settings.FACE_STORAGE_PATH, image_path)
+                if os.path.exists(full_path):
+                    paths.append(image_path)
+                    images.append(Image.open(full_path).convert("RGB"))
+
+            try:
+                embeddings = backend.embed_batch(images)
+            except Exception as e:
+                print(f"⚠️ User {user_id}: {e}")
+                continue
+
+            rows = [
+                FaceEncoding(
+                    user_id=user_id,
+                    encoding_data=backend.serialize(embedding),
+                    model_version=backend.name,
+                    image_path=image_path,
+                    confidence=user_photos[image_path]
+                )
+                for image_path, embedding in zip(paths, embeddings)
+                if embedding is not None
+            ]
+            if not rows:
+                print(f"⚠️ User {user_id}: no face found in {len(paths)} photos, skipped")
+                continue
+
+            db.query(FaceEncoding).filter(
+                FaceEncoding.user_id == user_id,
+                FaceEncoding.model_version == backend.name
+            ).delete(synchronize_session=False)
+            db.add_all(rows)
+            db.commit()
+            enrolled += 1
+
+        print(f"✅ Enrolled {enrolled} users for backend '{backend.name}'")
+
+    except Exception as e:
+        print(f"❌ Error enrolling backend: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in EMBEDDING_BACKENDS:
+        print(f"Usage: python tools/enroll_face_backend.py <{'|'.join(sorted(EMBEDDING_BACKENDS))}>")
+        sys.exit(1)
+    enroll_backend(sys.argv[1])
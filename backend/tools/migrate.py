@@ -0,0 +1,38 @@
+"""
+Apply pending schema migrations (app/db/migrations) to the database.
+The API applies them on startup too; run this to upgrade ahead of a
+deploy or to inspect the schema version. Safe to run multiple times.
+
+Usage:
+    python tools/migrate.py            # apply pending migrations
+    python tools/migrate.py --status   # list applied / pending migrations
+    python tools/migrate.py --analyze  # refresh query planner statistics only
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.session import engine
+from app.db.migrations import MIGRATIONS, analyze, applied_versions, run_migrations, version_of
+
+
+def show_status():
+    """Print every migration with its state."""
+    applied = applied_versions(engine)
+    for migration in MIGRATIONS:
+        version, name = version_of(migration)
+        state = "✅ applied" if version in applied else "⏳ pending"
+        print(f"{state}  v{version:03d} {name}")
+
+
+if __name__ == "__main__":
+    if "--status" in sys.argv:
+        show_status()
+    elif "--analyze" in sys.argv:
+        analyze(engine)
+        print("✅ Query planner statistics updated (ANALYZE)")
+    else:
+        applied = run_migrations(engine)
+        print(f"✅ Database schema up to date ({len(applied)} migrations applied)")
@@ -0,0 +1,42 @@
+"""
+Rebuild the daily_attendance_summary table from attendance records.
+Use after importing historical data or to repair drifted counters.
+
+Usage:
+    python tools/rebuild_daily_summary.py                       # all dates
+    python tools/rebuild_daily_summary.py 2025-07-01 2026-06-30 # date range
+"""
+import sys
+from pathlib import Path
+from datetime import date
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.session import SessionLocal, engine
+from app.db.migrations import run_migrations
+from app.services.daily_summary_service import DailySummaryService
+
+
+def rebuild_daily_summary(start_date=None, end_date=None):
+    """Recompute summary counters for the given range."""
+    # Make sure the summary table exists on older databases
+    run_migrations(engine)
+
+    db = SessionLocal()
+
+    try:
+        rows = DailySummaryService(db).rebuild(start_date, end_date)
+        db.commit()
+        print(f"✅ Rebuilt {rows} daily summary rows")
+    except Exception as e:
+        print(f"❌ Error rebuilding daily summary: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    start = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    end = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    rebuild_daily_summary(start, end)
@@ -0,0 +1,29 @@
+"""
+Background job worker.
+Runs queued jobs (CSV imports, report exports, ...) outside the API process.
+Started automatically by run.py; can also be run on its own: python worker.py
+"""
+
+import signal
+
+from app.core.config import settings
+from app.db.migrations import run_migrations
+from app.db.session import engine
+from app.services.job_service import job_worker
+
+
+def main():
+    # The worker may start before the API: bring the schema up to date
+    # first (waits if the API is migrating at the same time)
+    run_migrations(engine)
+    
+    # Finish the current job, then exit on Ctrl+C / terminate
+    signal.signal(signal.SIGTERM, lambda *_: job_worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: job_worker.stop())
+    
+    print(f"⚙️  Job worker for {settings.APP_NAME} (poll every {settings.JOB_WORKER_POLL_INTERVAL}s)")
+    job_worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import api from './api';
+import { waitForJob } from './jobService';
 import type { User, UserCreate, UserUpdate, UserWithStats } from '../types/user.types';
 import type { Attendance, AttendanceFilter } from '../types/attendance.types';
 import type { PaginatedResponse } from '../types/api.types';
@@ -179,13 +180,18 @@ export const adminService = {
   /**
    * Bulk import students from CSV
    */
-  async importStudentsCSV(file: File): Promise<any> {
+  async importStudentsCSV(
+    file: File,
+    onProgress?: (progress: number, message: string | null) => void
+  ): Promise<any> {
     const formData = new FormData();
     formData.append('file', file);
     const response = await api.post('/admin/students/import-csv', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
-    return response.data;
+    // The import runs as a background job; wait for its result
+    const job = await waitForJob(response.data.data, onProgress);
+    return { success: true, message: job.message, data: job.result };
   },
 
   /**
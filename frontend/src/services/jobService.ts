@@ -0,0 +1,45 @@
+/**
+ * Job Service - polling for background jobs (CSV imports, report exports)
+ */
+import api from './api';
+import type { Job } from '../types/api.types';
+
+/**
+ * Get the current state of a background job
+ */
+export const getJob = async <R = any>(jobId: string): Promise<Job<R>> => {
+  const response = await api.get(`/jobs/${jobId}`);
+  return response.data;
+};
+
+/**
+ * Poll a job until it is done (or failed) and return the finished job
+ */
+export const waitForJob = async <R = any>(
+  job: Job<R>,
+  onProgress?: (progress: number, message: string | null) => void,
+  intervalMs = 1000
+): Promise<Job<R>> => {
+  while (job.status === 'pending' || job.status === 'running') {
+    onProgress?.(job.progress, job.message);
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    job = await getJob<R>(job.job_id);
+  }
+
+  if (job.status === 'failed') {
+    throw new Error(job.error || 'Job failed');
+  }
+
+  onProgress?.(100, job.message);
+  return job;
+};
+
+/**
+ * Download the file produced by a finished job
+ */
+export const downloadJobFile = async (jobId: string): Promise<Blob> => {
+  const response = await api.get(`/jobs/${jobId}/download`, {
+    responseType: 'blob',
+  });
+  return response.data;
+};
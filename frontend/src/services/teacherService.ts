@@ -1,4 +1,6 @@
 import api from './api';
+import { waitForJob, downloadJobFile } from './jobService';
+import type { Job } from '../types/api.types';
 
 // ==================== TYPES ====================
 export interface TeacherDashboardSummary {
@@ -243,26 +245,37 @@ export const getLowAttendanceStudents = async (filters: {
   return response.data;
 };
 
+/**
+ * Start a background export, poll until it finishes, then download the file
+ */
+const runExportJob = async (
+  format: 'excel' | 'pdf',
+  filters: ReportFilters,
+  onProgress?: (progress: number) => void
+): Promise<Blob> => {
+  const job: Job = (await api.get(`/teachers/reports/export/${format}`, { params: filters })).data;
+  const finished = await waitForJob(job, (progress) => onProgress?.(progress));
+  return downloadJobFile(finished.job_id);
+};
+
 /**
  * Export report to PDF
  */
-export const exportReportPDF = async (filters: ReportFilters): Promise<Blob> => {
-  const response = await api.get('/teachers/reports/export/pdf', {
-    params: filters,
-    responseType: 'blob',
-  });
-  return response.data;
+export const exportReportPDF = async (
+  filters: ReportFilters,
+  onProgress?: (progress: number) => void
+): Promise<Blob> => {
+  return runExportJob('pdf', filters, onProgress);
 };
 
 /**
  * Export report to Excel
  */
-export const exportReportExcel = async (filters: ReportFilters): Promise<Blob> => {
-  const response = await api.get('/teachers/reports/export/excel', {
-    params: filters,
-    responseType: 'blob',
-  });
-  return response.data;
+export const exportReportExcel = async (
+  filters: ReportFilters,
+  onProgress?: (progress: number) => void
+): Promise<Blob> => {
+  return runExportJob('excel', filters, onProgress);
 };
 
 /**
@@ -19,3 +19,17 @@ export interface ApiError {
   statusCode: number;
   detail?: any;
 }
+
+export interface Job<R = any> {
+  job_id: string;
+  type: string;
+  status: 'pending' | 'running' | 'done' | 'failed';
+  progress: number; // 0-100
+  message: string | null;
+  result: R | null;
+  error: string | null;
+  attempts: number;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}